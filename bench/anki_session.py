@@ -0,0 +1,89 @@
+"""
+Simulates a review session against a large synthetic deck.
+
+Compares picking the next card by scanning every card (the old get_due_cards path)
+with the precomputed due queue, then times whole reviews end to end.
+
+    python -m bench.anki_session [--cards 50000] [--reviews 500] [--seed 1]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+
+def make_deck(n_cards, rng):
+    today = date.today()
+    cards = []
+    for i in range(n_cards):
+        review = today + timedelta(days=rng.randint(-30, 365))
+        cards.append({
+            "id": uuid.UUID(int=rng.getrandbits(128)).hex,
+            "front": f"Question {i}",
+            "back": f"Answer {i}",
+            "reverse": False,
+            "easiness_factor": round(rng.uniform(1.3, 2.8), 2),
+            "interval": rng.randint(1, 300),
+            "repetitions": rng.randint(0, 10),
+            "review_date": review.isoformat(),
+            "created_date": (today - timedelta(days=400)).isoformat(),
+        })
+    return {"cards": cards}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cards", type=int, default=50_000)
+    parser.add_argument("--reviews", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    data_dir = tempfile.mkdtemp(prefix="pt-bench-")
+    with open(os.path.join(data_dir, "anki.json"), "w", encoding="utf-8") as f:
+        json.dump(make_deck(args.cards, rng), f)
+
+    # The modules read their configuration at import time.
+    os.environ["PROJECTTRACKER_DATA_DIR"] = data_dir
+    os.environ.setdefault("PROJECTTRACKER_JOURNAL", "1")
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    from src import anki
+
+    today = date.today().isoformat()
+    anki.get_next_due_card()  # warm the cache and build the queue
+
+    start = time.perf_counter()
+    for _ in range(args.reviews):
+        cards = anki._cache.peek()["cards"]
+        due = [c for c in cards if c.get("review_date", "9999-12-31") <= today]
+        _ = due[0] if due else None, len(due)
+    scan = (time.perf_counter() - start) / args.reviews
+
+    start = time.perf_counter()
+    for _ in range(args.reviews):
+        anki.get_next_due_card()
+    queued = (time.perf_counter() - start) / args.reviews
+
+    start = time.perf_counter()
+    reviewed = 0
+    for _ in range(args.reviews):
+        card, _remaining = anki.get_next_due_card()
+        if card is None:
+            break
+        anki.process_card_review(card["id"], rng.randint(0, 5))
+        reviewed += 1
+    session = (time.perf_counter() - start) / max(reviewed, 1)
+
+    print(f"deck: {args.cards} cards, session: {reviewed} reviews, journal: {anki._cache.journal}")
+    print(f"next card by scan:  {scan * 1e3:8.3f} ms/review")
+    print(f"next card by queue: {queued * 1e3:8.3f} ms/review  ({scan / queued:.0f}x)")
+    print(f"full review:        {session * 1e3:8.3f} ms/review")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Throughput of the bulk import and export (src/bulk.py) on 100k-row files.
+
+Writes a cards file (with a share of near-duplicate cards: same text, different
+case or spacing) and a tasks file spread over a set of projects, in NDJSON and
+CSV, then for each storage backend and format imports them into an empty data
+folder and exports them again, each step in its own process so its peak RSS is
+its own. For comparison, adds a sample of the cards one create_card() at a time,
+the way /anki/add does, and scales the time up to the full file.
+
+    python -m bench.bulk_io [--rows 100000] [--storage json,sqlite] [--batch 0]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROJECTS = 1_000
+DUPLICATES = 0.02
+SAMPLE = 300
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_files(directory, rows, seed=1):
+    """Writes projects/tasks/cards files in both formats; returns {kind: row count}."""
+    rng = random.Random(seed)
+    projects = [{"id": f"p{i}", "title": f"Project {i}", "description": "bulk", "status": "active",
+                 "start_date": "2026-01-05"} for i in range(PROJECTS)]
+    tasks = [{"id": f"t{i}", "project_id": f"p{rng.randrange(PROJECTS)}", "description": f"Task {i}",
+              "additional_info": "", "status": rng.choice(["active", "completed", "on hold"]),
+              "start_date": "2026-02-01", "target_completion_date": "2026-03-01"} for i in range(rows)]
+    cards = []
+    for i in range(rows):
+        if cards and rng.random() < DUPLICATES:
+            front, back = rng.choice(cards[-1000:])
+            cards.append((f"  {front.upper()} ", back))
+        else:
+            cards.append((f"Question {i}: what is {rng.getrandbits(32):x}?", f"Answer {i}"))
+    records = {"projects": projects, "tasks": tasks,
+               "cards": [{"front": front, "back": back, "reverse": False} for front, back in cards]}
+    for kind, items in records.items():
+        with open(os.path.join(directory, f"{kind}.ndjson"), "w", encoding="utf-8") as file:
+            for item in items:
+                file.write(json.dumps(item) + "\n")
+        with open(os.path.join(directory, f"{kind}.csv"), "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, list(items[0]))
+            writer.writeheader()
+            writer.writerows(items)
+    return {kind: len(items) for kind, items in records.items()}
+
+
+def measure(step, files, fmt, batch):
+    """Runs in the child process: one step against PROJECTTRACKER_DATA_DIR, result as a JSON line."""
+    from src import bulk
+
+    result = {}
+    if step == "import":
+        for kind in bulk.KINDS:
+            with open(os.path.join(files, f"{kind}.{fmt}"), encoding="utf-8", newline="") as stream:
+                report = bulk.import_rows(kind, stream, fmt, batch_size=batch)
+            result[kind] = {k: report[k] for k in ("rows", "imported", "duplicates", "invalid", "seconds", "saves")}
+    elif step == "export":
+        for kind in bulk.KINDS:
+            next(bulk.export_lines(kind, fmt), None)  # loads the data, as a running app has
+            start, rows = time.perf_counter(), 0
+            for chunk in bulk.export_lines(kind, fmt):
+                rows += chunk.count("\n")
+            result[kind] = {"rows": rows, "seconds": time.perf_counter() - start}
+    else:
+        from src import anki
+
+        with open(os.path.join(files, "cards.ndjson"), encoding="utf-8") as stream:
+            sample = [json.loads(next(stream)) for _ in range(SAMPLE)]
+        start = time.perf_counter()
+        for card in sample:
+            anki.create_card(card["front"], card["back"], card["reverse"])
+        result["cards"] = {"rows": SAMPLE, "seconds": time.perf_counter() - start}
+    result["rss"] = rss_mb()
+    print(json.dumps(result))
+
+
+def run(data_dir, storage, args):
+    env = dict(os.environ, PROJECTTRACKER_DATA_DIR=data_dir, PROJECTTRACKER_STORAGE=storage)
+    out = subprocess.run([sys.executable, "-m", "bench.bulk_io", "--measure"] + args, cwd=ROOT, env=env,
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="tasks and cards per file")
+    parser.add_argument("--storage", default="json,sqlite")
+    parser.add_argument("--batch", type=int, default=0, help="save every N rows (default: one save per file)")
+    parser.add_argument("--measure", nargs=3, metavar=("STEP", "FILES", "FORMAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.measure:
+        return measure(*args.measure, args.batch)
+
+    files = tempfile.mkdtemp(prefix="pt-bulk-files-")
+    try:
+        counts = write_files(files, args.rows)
+        sizes = {fmt: os.path.getsize(os.path.join(files, f"cards.{fmt}")) / 1e6 for fmt in ("ndjson", "csv")}
+        print(f"{counts['projects']} projects, {counts['tasks']} tasks, {counts['cards']} cards "
+              f"(~{DUPLICATES:.0%} near-duplicates); cards file {sizes['ndjson']:.1f} MB NDJSON, "
+              f"{sizes['csv']:.1f} MB CSV\n")
+        print(f"{'':22s} {'projects':>14s} {'tasks':>14s} {'cards':>14s} {'peak RSS':>9s}")
+        for storage in args.storage.split(","):
+            for fmt in ("ndjson", "csv"):
+                data_dir = tempfile.mkdtemp(prefix="pt-bulk-data-")
+                try:
+                    for step in ("import", "export"):
+                        result = run(data_dir, storage, [step, files, fmt, "--batch", str(args.batch)])
+                        cells = "".join(f" {result[kind]['rows'] / result[kind]['seconds']:9.0f} r/s"
+                                        for kind in ("projects", "tasks", "cards"))
+                        print(f"{storage} {fmt} {step}".ljust(22) + cells + f" {result['rss']:6.0f} MB")
+                        if step == "import":
+                            print("  duplicates skipped".ljust(22) + "".join(
+                                f" {result[kind]['duplicates']:14d}" for kind in ("projects", "tasks", "cards")))
+                    result = run(data_dir, storage, ["import", files, fmt, "--batch", str(args.batch)])
+                    print(f"{storage} {fmt} re-import".ljust(22) + "".join(
+                        f" {result[kind]['duplicates']:10d} dup" for kind in ("projects", "tasks", "cards"))
+                        + f" {result['rss']:6.0f} MB")
+                finally:
+                    shutil.rmtree(data_dir, ignore_errors=True)
+            data_dir = tempfile.mkdtemp(prefix="pt-bulk-data-")
+            try:
+                result = run(data_dir, storage, ["create_card", files, "ndjson"])
+                per_card = result["cards"]["seconds"] / result["cards"]["rows"]
+                print(f"{storage} create_card x{SAMPLE}: {1 / per_card:.0f} cards/s, "
+                      f"~{per_card * counts['cards']:.0f} s for {counts['cards']} cards\n")
+            finally:
+                shutil.rmtree(data_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(files, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
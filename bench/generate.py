@@ -0,0 +1,150 @@
+"""
+Seeded generator for large, realistic project_data.json / anki.json files.
+
+Status mixes, date spreads and text lengths follow sampledata.zip, scaled up.
+Files are written one project / card at a time, so even the largest presets don't
+need the whole document in memory.
+
+    python -m bench.generate OUT_DIR [--projects 10000] [--tasks 500000] [--cards 200000]
+                                     [--updates 40] [--seed 1]
+"""
+import argparse
+import json
+import os
+import random
+import uuid
+from datetime import date, datetime, timedelta
+
+# (projects, tasks, cards, average updates per project) for the runner's --scale.
+SCALES = {
+    "small": (200, 5_000, 2_000, 10),
+    "medium": (2_000, 50_000, 20_000, 20),
+    "large": (10_000, 500_000, 200_000, 40),
+}
+
+PROJECT_STATUSES = (("active", 38), ("complete", 25), ("archived", 17), ("on hold", 12), ("ongoing", 8))
+TASK_STATUSES = (("active", 41), ("completed", 31), ("on hold", 20), ("cancelled", 8))
+WORDS = ("plan review draft prepare ship audit migrate refactor demo backlog customer release "
+         "design research budget vendor contract sprint report notes follow-up kickoff").split()
+TOPICS = ("Python", "CSS", "SQL", "Networking", "Spanish", "History", "Statistics", "Chemistry")
+
+
+def _choose(rng, weighted):
+    return rng.choices([v for v, _ in weighted], [w for _, w in weighted])[0]
+
+
+def _id(rng):
+    return uuid.UUID(int=rng.getrandbits(128)).hex
+
+
+def _text(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize()
+
+
+def _day(base, rng, low, high):
+    return (base + timedelta(days=rng.randint(low, high))).isoformat()
+
+
+def make_task(rng, today):
+    status = _choose(rng, TASK_STATUSES)
+    start = today + timedelta(days=rng.randint(-900, 60))
+    done = status == "completed"
+    return {
+        "id": _id(rng),
+        "description": _text(rng, 2, 6),
+        "additional_info": _text(rng, 0, 40) if rng.random() < 0.3 else "",
+        "start_date": start.isoformat(),
+        "target_completion_date": _day(start, rng, 1, 120) if rng.random() < 0.85 else None,
+        "actual_completion_date": _day(start, rng, 0, 150) if done else None,
+        "status": status,
+        "updates": [],
+    }
+
+
+def make_project(rng, today, n, n_tasks, n_updates):
+    status = _choose(rng, PROJECT_STATUSES)
+    start = today + timedelta(days=rng.randint(-1200, 30))
+    stamp = datetime.combine(start, datetime.min.time())
+    updates = []
+    for _ in range(n_updates):
+        stamp += timedelta(minutes=rng.randint(30, 60 * 24 * 10))
+        updates.append({"id": _id(rng), "timestamp": stamp.strftime("%Y-%m-%d %H:%M:%S"),
+                        "description": _text(rng, 3, 60)})
+    return {
+        "id": _id(rng),
+        "title": f"Project {n:05d} - {_text(rng, 1, 3)}",
+        "description": _text(rng, 4, 30),
+        "start_date": start.isoformat(),
+        "target_completion_date": _day(start, rng, 30, 400),
+        "actual_completion_date": _day(start, rng, 20, 450) if status == "complete" else None,
+        "status": status,
+        "updates": updates,
+        "tasks": [make_task(rng, today) for _ in range(n_tasks)],
+    }
+
+
+def make_card(rng, today, n):
+    topic = rng.choice(TOPICS)
+    reps = rng.randint(0, 12)
+    return {
+        "id": _id(rng),
+        "front": f"{topic}: {_text(rng, 3, 12)}? ({n})",
+        "back": _text(rng, 3, 30),
+        "reverse": False,
+        "easiness_factor": round(rng.uniform(1.3, 2.9), 2),
+        "interval": 1 if reps == 0 else rng.randint(1, 400),
+        "repetitions": reps,
+        "review_date": _day(today, rng, -45, 400),
+        "created_date": _day(today, rng, -1000, 0),
+    }
+
+
+def _write_list(path, key, items):
+    """Writes {key: [items...]} item by item, pretty-printed like files from older versions."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{\n    "%s": [' % key)
+        for i, item in enumerate(items):
+            body = json.dumps(item, indent=4, ensure_ascii=False).replace("\n", "\n        ")
+            f.write(("," if i else "") + "\n        " + body)
+        f.write("\n    ]\n}")
+
+
+def generate(out_dir, projects, tasks, cards, updates, seed=1):
+    """Writes project_data.json and anki.json into out_dir; returns their paths."""
+    rng = random.Random(seed)
+    today = date.today()
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Spread tasks unevenly: a few big projects, many small ones.
+    weights = [rng.paretovariate(1.5) for _ in range(projects)]
+    scale = tasks / sum(weights) if projects else 0
+    task_counts = [int(w * scale) for w in weights]
+    for i in range(tasks - sum(task_counts)):
+        task_counts[i % max(projects, 1)] += 1
+
+    project_path = os.path.join(out_dir, "project_data.json")
+    _write_list(project_path, "projects", (
+        make_project(rng, today, n, task_counts[n], rng.randint(0, 2 * updates))
+        for n in range(projects)))
+
+    anki_path = os.path.join(out_dir, "anki.json")
+    _write_list(anki_path, "cards", (make_card(rng, today, n) for n in range(cards)))
+    return project_path, anki_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--projects", type=int, default=SCALES["large"][0])
+    parser.add_argument("--tasks", type=int, default=SCALES["large"][1])
+    parser.add_argument("--cards", type=int, default=SCALES["large"][2])
+    parser.add_argument("--updates", type=int, default=SCALES["large"][3], help="average updates per project")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    for path in generate(args.out_dir, args.projects, args.tasks, args.cards, args.updates, args.seed):
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
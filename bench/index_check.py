@@ -0,0 +1,252 @@
+"""
+Checks the in-memory indexes (src/indexes.py) against a full scan of the document.
+
+Applies a seeded random sequence of creates, updates and deletes through the
+public data functions, the same calls the routes make, and after every step
+compares the ProjectIndex, CardIndex and DueQueue the writers carried forward
+with what a linear scan of the cached document gives: exact positions for
+every id, the status sets, the due-date buckets, and the lookup results
+(projects_with_status, tasks_with_status, next_due, due_count, due_ids).
+The document and indexes taken before each step are checked again after it, since
+a reader may still hold them: a write must leave them as they were.
+Exits non-zero on the first mismatch, printing the step that caused it.
+
+With --threads N the steps run while N reader threads keep taking fresh views,
+checking them the same way and calling the read functions the routes use
+(get_project, get_projects_by_category, get_all_tasks, get_due_cards). Any
+mismatch or exception in a reader is counted and printed, and fails the run.
+
+    python -m bench.index_check [--steps 2000] [--seed 1] [--journal] [--layout single|split|sharded]
+                                [--threads 4]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROJECT_STATUSES = ["active", "on hold", "complete", "archived", "ongoing"]
+TASK_STATUSES = ["active", "completed", "on hold", "cancelled"]
+
+
+class Mismatch(AssertionError):
+    pass
+
+
+def expect(what, got, want):
+    if got != want:
+        raise Mismatch(f"{what}: index gives {got!r}, scan gives {want!r}")
+
+
+def check_projects(data, index):
+    projects = data.get("projects", [])
+    expect("project positions", dict(index.projects.items()), {p["id"]: pos for pos, p in enumerate(projects)})
+    expect("task positions", dict(index.tasks.items()),
+           {t["id"]: (p["id"], pos) for p in projects for pos, t in enumerate(p.get("tasks", []))})
+    by_status, task_status = {}, {}
+    for project in projects:
+        by_status.setdefault(project.get("status"), set()).add(project["id"])
+        for task in project.get("tasks", []):
+            task_status.setdefault(task.get("status"), set()).add(task["id"])
+    expect("project statuses", {s: set(ids) for s, ids in index.project_status.items() if ids}, by_status)
+    expect("task statuses", {s: set(ids) for s, ids in index.task_status.items() if ids}, task_status)
+    for statuses in ([s] for s in PROJECT_STATUSES):
+        expect(f"projects_with_status({statuses})",
+               [p["id"] for p in index.projects_with_status(data, statuses)],
+               [p["id"] for p in projects if p.get("status") in statuses])
+    for statuses in (["active"], ["completed", "on hold"]):
+        expect(f"tasks_with_status({statuses})",
+               [t["id"] for _, t in index.tasks_with_status(data, statuses)],
+               [t["id"] for p in projects for t in p.get("tasks", []) if t.get("status") in statuses])
+
+
+def check_cards(data, index):
+    cards = data.get("cards", [])
+    expect("card positions", dict(index.cards.items()), {c["id"]: pos for pos, c in enumerate(cards)})
+
+
+def check_queue(data, queue, today):
+    cards = data.get("cards", [])
+    expect("due dates", dict(queue.card_date.items()), {c["id"]: c["review_date"] for c in cards if c.get("review_date")})
+    expect("due buckets", sorted(queue.buckets), sorted({c["review_date"] for c in cards if c.get("review_date")}))
+    expect("sorted dates", queue.dates, sorted(queue.buckets))
+    due = [c for c in cards if c.get("review_date") and c["review_date"] <= today]
+    expect("due_count", queue.due_count(today), len(due))
+    due_ids = list(queue.due_ids(today))
+    expect("due_ids", set(due_ids), {c["id"] for c in due})
+    dates = [queue.card_date[cid] for cid in due_ids]
+    expect("due_ids order", dates, sorted(dates))
+    next_id = queue.next_due(today)
+    expect("next_due date", queue.card_date[next_id] if next_id else None,
+           min((c["review_date"] for c in due), default=None))
+
+
+def views(data_handler, anki):
+    """The (document, index) pairs a reader would get now."""
+    return data_handler.get_index(), anki.get_card_index(), anki.get_due_queue()
+
+
+def check_views(views, today):
+    (data, index), (cards, card_index), (due_cards, queue) = views
+    check_projects(data, index)
+    check_cards(cards, card_index)
+    check_queue(due_cards, queue, today)
+
+
+def read(data_handler, anki, rng, today):
+    """One reader pass: checks a fresh view, then calls the read functions on it."""
+    current = views(data_handler, anki)
+    check_views(current, today)
+    (data, _), _, _ = current
+    if data["projects"]:
+        project = rng.choice(data["projects"])
+        data_handler.get_project(project["id"], rng.choice(TASK_STATUSES))
+    data_handler.get_projects_by_category(rng.choice(PROJECT_STATUSES))
+    data_handler.get_all_tasks(selected_project_statuses=["active", "ongoing"],
+                               selected_task_statuses=["active", "on hold"])
+    anki.get_due_cards(limit=20)
+    anki.get_next_due_card()
+
+
+def reader(data_handler, anki, seed, today, stop, results):
+    rng = random.Random(seed)
+    reads, errors = 0, []
+    while not stop.is_set():
+        try:
+            read(data_handler, anki, rng, today)
+        except Exception:  # reported by main, which fails the run
+            errors.append(traceback.format_exc(limit=3))
+        reads += 1
+    results.append((reads, errors))
+
+
+def random_day(rng):
+    return (date.today() + timedelta(days=rng.randint(-20, 20))).isoformat()
+
+
+def step(rng, data_handler, anki):
+    """Applies one random edit; returns a description of it."""
+    data = data_handler.load_data()
+    projects = data["projects"]
+    cards = anki.load_anki_data()["cards"]
+    action = rng.choice(["create_project", "update_project", "create_task", "update_task", "add_update",
+                         "delete_update", "import_projects", "create_card", "update_card", "delete_card",
+                         "review_card", "review_cards", "import_cards"])
+    if action == "create_project" or (not projects and action in (
+            "update_project", "create_task", "update_task", "add_update", "delete_update")):
+        data_handler.create_project(f"P{rng.random():.4f}", "d", random_day(rng), random_day(rng),
+                                    rng.choice(PROJECT_STATUSES))
+        return "create_project"
+    if action in ("create_card", "update_card", "delete_card", "review_card", "review_cards") and not cards:
+        action = "create_card"
+    project = rng.choice(projects) if projects else None
+    if action == "update_project":
+        data_handler.update_project(project["id"], project["title"] + "!", project["description"],
+                                    rng.choice(PROJECT_STATUSES), project["start_date"],
+                                    project["target_completion_date"], project.get("actual_completion_date"),
+                                    project.get("updates", []))
+    elif action == "create_task" or (action == "update_task" and not project.get("tasks")):
+        action = "create_task"
+        data_handler.create_task(project["id"], f"T{rng.random():.4f}", "", random_day(rng), random_day(rng),
+                                 None, rng.choice(TASK_STATUSES))
+    elif action == "update_task":
+        task = rng.choice(project["tasks"])
+        data_handler.update_task(project["id"], task["id"], task["description"], task.get("additional_info", ""),
+                                 rng.choice(TASK_STATUSES), task.get("start_date"), random_day(rng),
+                                 task.get("actual_completion_date"))
+    elif action == "add_update":
+        data_handler.add_project_update(project["id"], f"U{rng.random():.4f}")
+    elif action == "delete_update":
+        if project.get("updates"):
+            data_handler.delete_project_update(project["id"], rng.choice(project["updates"])["id"])
+    elif action == "import_projects":
+        new = data_handler.new_project_record("Imported", "", random_day(rng), None, rng.choice(PROJECT_STATUSES))
+        tasks = [(project["id"], data_handler.new_task_record("Imported task", "", random_day(rng), None, None,
+                                                              rng.choice(TASK_STATUSES)))] if project else []
+        data_handler.import_projects([new], tasks)
+    elif action == "create_card":
+        anki.create_card(f"F{rng.random():.4f}", f"B{rng.random():.4f}", rng.random() < 0.3)
+    elif action == "update_card":
+        card = rng.choice(cards)
+        anki.update_card(card["id"], card["front"] + "!", card["back"], rng.random() < 0.5)
+    elif action == "delete_card":
+        anki.delete_card(rng.choice(cards)["id"])
+    elif action == "review_card":
+        anki.process_card_review(rng.choice(cards)["id"], rng.randint(0, 5))
+    elif action == "review_cards":
+        anki.process_card_reviews([{"card_id": rng.choice(cards)["id"], "rating": rng.randint(0, 5)}
+                                   for _ in range(rng.randint(1, 5))])
+    elif action == "import_cards":
+        anki.import_cards([anki.new_card_record(f"I{rng.random():.4f}", "b", rng.random() < 0.3)])
+    return action
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--journal", action="store_true", help="with the edit journal on")
+    parser.add_argument("--layout", default="single", choices=["single", "split", "sharded"])
+    parser.add_argument("--threads", type=int, default=0, help="reader threads running alongside the writes")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="pt-index-check-")
+    os.environ.update(PROJECTTRACKER_DATA_DIR=data_dir, PROJECTTRACKER_STORAGE="json",
+                      PROJECTTRACKER_LAYOUT=args.layout, PROJECTTRACKER_JOURNAL="1" if args.journal else "0")
+    sys.path.insert(0, ROOT)
+    from src import anki, data_handler
+
+    rng = random.Random(args.seed)
+    today = date.today().isoformat()
+    counts = {}
+    stop, results = threading.Event(), []
+    readers = [threading.Thread(target=reader, args=(data_handler, anki, args.seed + n, today, stop, results))
+               for n in range(1, args.threads + 1)]
+    if readers:
+        # Switch threads far more often than the default 5 ms so that reads
+        # land inside writes.
+        sys.setswitchinterval(1e-5)
+    started = time.perf_counter()
+    for thread in readers:
+        thread.start()
+    try:
+        for number in range(1, args.steps + 1):
+            before = views(data_handler, anki)
+            action = step(rng, data_handler, anki)
+            counts[action] = counts.get(action, 0) + 1
+            try:
+                check_views(views(data_handler, anki), today)
+            except Mismatch as e:
+                print(f"step {number} ({action}): {e}")
+                return 1
+            try:
+                check_views(before, today)
+            except Mismatch as e:
+                print(f"step {number} ({action}) changed the indexes of the previous document: {e}")
+                return 1
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    print(f"{args.steps} steps, indexes matched a full scan after each: "
+          + ", ".join(f"{action} {n}" for action, n in sorted(counts.items())))
+    if readers:
+        elapsed = time.perf_counter() - started
+        reads = sum(n for n, _ in results)
+        errors = [error for _, found in results for error in found]
+        print(f"{len(readers)} reader threads: {reads} checked reads ({reads / elapsed:.0f}/s), {len(errors)} errors")
+        if errors:
+            print(errors[0])
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Checks and times the JSON codec in safe_io.
+
+First a compatibility pass over every file in sampledata.zip: each one is encoded
+with every codec path (orjson compact, stdlib compact, pretty) and decoded with both
+decoders, and the result must equal the stdlib parse of the original, key order
+included. Then encode/decode times and file sizes on a generated dataset, against
+the old stdlib indent=4 path.
+
+    python -m bench.json_codec [--projects 2000] [--tasks 50000] [--cards 20000]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src import safe_io  # noqa: E402
+from src.safe_io import dumps_json, loads_json  # noqa: E402
+
+from .generate import generate  # noqa: E402
+
+SAMPLEDATA = os.path.join(os.path.dirname(__file__), "..", "sampledata.zip")
+
+
+def same(a, b):
+    """Equal values with identical key order (dict == ignores order, so compare dumps too)."""
+    return a == b and json.dumps(a) == json.dumps(b)
+
+
+def without_orjson(fn, *args, **kwargs):
+    """Runs a safe_io codec function as if orjson weren't installed."""
+    fast, safe_io.orjson = safe_io.orjson, None
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        safe_io.orjson = fast
+
+
+def codecs():
+    """(name, encode) for every path dumps_json can take."""
+    return [
+        ("compact", dumps_json),
+        ("compact (stdlib)", lambda obj: without_orjson(dumps_json, obj)),
+        ("pretty", lambda obj: dumps_json(obj, indent=4)),
+    ]
+
+
+def check_compatibility():
+    with zipfile.ZipFile(SAMPLEDATA) as archive:
+        names = [n for n in archive.namelist() if n.endswith(".json")]
+        for name in names:
+            raw = archive.read(name)
+            expected = json.loads(raw.decode("utf-8"))
+            if not same(loads_json(raw), expected) or not same(without_orjson(loads_json, raw), expected):
+                raise AssertionError(f"{name}: fast decode differs from json.load")
+            for codec, encode in codecs():
+                encoded = encode(expected)
+                for decoded in (loads_json(encoded), without_orjson(loads_json, encoded), json.loads(encoded)):
+                    if not same(decoded, expected):
+                        raise AssertionError(f"{name}: {codec} output does not round-trip")
+    print(f"compatibility: {len(names)} sample files round-trip through every encoder and decoder"
+          f" (orjson {'installed' if safe_io.orjson else 'not installed'})")
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=2_000)
+    parser.add_argument("--tasks", type=int, default=50_000)
+    parser.add_argument("--cards", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    check_compatibility()
+
+    data_dir = tempfile.mkdtemp(prefix="pt-bench-")
+    path, _ = generate(data_dir, args.projects, args.tasks, args.cards, 20)
+    with open(path, "rb") as f:
+        doc = json.loads(f.read())
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+    old_encode, old_bytes = timed(lambda: json.dumps(doc, indent=4, ensure_ascii=False).encode("utf-8"))
+    print(f"{'encoder':18s} {'encode':>10s} {'size':>10s} {'decode':>10s}")
+    old_decode, _ = timed(lambda: json.loads(old_bytes.decode("utf-8")))
+    print(f"{'json indent=4':18s} {old_encode * 1e3:8.1f}ms {len(old_bytes) / 1e6:8.1f}MB {old_decode * 1e3:8.1f}ms")
+    for codec, encode in codecs():
+        encode_time, encoded = timed(lambda: encode(doc))
+        decode_time, decoded = timed(lambda: loads_json(encoded))
+        if not same(decoded, doc):
+            raise AssertionError(f"{codec} output does not round-trip")
+        print(f"{codec:18s} {encode_time * 1e3:8.1f}ms {len(encoded) / 1e6:8.1f}MB {decode_time * 1e3:8.1f}ms"
+              f"  ({old_encode / encode_time:.1f}x encode, {old_decode / decode_time:.1f}x decode)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Checks that converting the project data between layouts loses nothing.
+
+Generates a dataset and gives it shapes real data has but the generator doesn't
+write: tasks whose additional_info is None, "" or missing, and projects without
+`updates` or `tasks`. It stores the dataset as single, then converts it
+single -> split -> single and single -> sharded -> single. While the data is
+split or sharded, the joined document (what read_project_data gives) must equal
+the original. The file written back as single must equal the original file apart
+from its `revision` and `journal_epoch` stamps. Exits non-zero on the first
+difference, printing where it is.
+
+    python -m bench.layout_check [--scale small] [--seed 1] [--journal]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from .generate import SCALES, generate
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STAMPS = ("revision", "journal_epoch")
+
+
+def roughen(path, rng):
+    """Rewrites the generated file with empty and missing fields mixed in."""
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    for project in doc["projects"]:
+        roll = rng.random()
+        if roll < 0.05:
+            del project["updates"]
+        elif roll < 0.1:
+            del project["tasks"]
+        elif roll < 0.15:
+            project["tasks"] = []
+        for task in project.get("tasks", []):
+            roll = rng.random()
+            if roll < 0.1:
+                task["additional_info"] = None
+            elif roll < 0.2:
+                del task["additional_info"]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f)
+
+
+def read_file(path):
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    return unstamped(doc)
+
+
+def unstamped(doc):
+    return {k: v for k, v in doc.items() if k not in STAMPS}
+
+
+def difference(got, want, where="document"):
+    """Where `got` first differs from `want`, or None if they are equal."""
+    if type(got) is not type(want):
+        return f"{where}: {got!r} instead of {want!r}"
+    if isinstance(want, dict):
+        for key in want.keys() | got.keys():
+            if key not in got:
+                return f"{where}[{key!r}] is missing"
+            if key not in want:
+                return f"{where}[{key!r}] = {got[key]!r} was added"
+            found = difference(got[key], want[key], f"{where}[{key!r}]")
+            if found:
+                return found
+    elif isinstance(want, list):
+        if len(got) != len(want):
+            return f"{where} has {len(got)} items instead of {len(want)}"
+        for i, (a, b) in enumerate(zip(got, want)):
+            found = difference(a, b, f"{where}[{i}]")
+            if found:
+                return found
+    elif got != want:
+        return f"{where}: {got!r} instead of {want!r}"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--journal", action="store_true", help="with the edit journal on")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="pt-layout-check-")
+    try:
+        projects, tasks, _, updates = SCALES[args.scale]
+        path, _ = generate(data_dir, projects, tasks, 0, updates, seed=args.seed)
+        roughen(path, random.Random(args.seed))
+        os.environ.update(PROJECTTRACKER_DATA_DIR=data_dir, PROJECTTRACKER_STORAGE="json",
+                          PROJECTTRACKER_LAYOUT="single", PROJECTTRACKER_JOURNAL="1" if args.journal else "0")
+        sys.path.insert(0, ROOT)
+        from src import data_handler
+        from src.shards import read_project_data
+
+        data_handler.convert_layout("single")  # adds the project summaries the other layouts keep
+        original = read_file(path)
+        for layout in ("split", "sharded"):
+            data_handler.convert_layout(layout)
+            found = difference(unstamped(read_project_data(path)), original)
+            if found:
+                print(f"single -> {layout}: {found}")
+                return 1
+            data_handler.convert_layout("single")
+            found = difference(read_file(path), original)
+            if found:
+                print(f"single -> {layout} -> single: {found}")
+                return 1
+            print(f"single -> {layout} -> single: {len(original['projects'])} projects unchanged")
+        return 0
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Compares the project data layouts (PROJECTTRACKER_LAYOUT) on a generated dataset.
+
+Generates a dataset, converts it to each layout in turn (timed, in its own
+process) and measures that layout in a fresh process: the first project list
+(cold, so it includes loading the data), the all-tasks list, a warm project list,
+opening one project's detail view, and two edits (a task change and a new project
+update) with the bytes each one writes. Also prints the process's resident memory
+after the list views and after the project view, and each layout's change against
+the first one. (This replaces bench/lazy_fields.py, which compared only the
+single and split layouts on the same views.)
+
+    python -m bench.layouts [--scale large] [--layouts single,split,sharded] [--repeat 20] [--writes 3]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .generate import SCALES, generate
+from .runner import bytes_written, peak_rss_mb, percentile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ROWS = [
+    ("first project list (cold)", "list_cold", "ms"),
+    ("all tasks", "tasks", "ms"),
+    ("project list (warm p50)", "list_warm", "ms"),
+    ("project view (cold)", "project_cold", "ms"),
+    ("project view (warm p50)", "project_warm", "ms"),
+    ("task edit (p50)", "task_edit", "ms"),
+    ("new project update (p50)", "update_edit", "ms"),
+    ("written per edit", "edit_bytes", "KB"),
+    ("RSS after list views", "rss_lists", "MB"),
+    ("peak RSS after list views", "peak_lists", "MB"),
+    ("RSS after project view", "rss_project", "MB"),
+]
+
+
+def rss_mb():
+    """Current resident set size of this process (Linux only), or None."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1e3
+
+
+def p50(fn, repeat):
+    return percentile(sorted(timed_ms(fn) for _ in range(repeat)), 50)
+
+
+def measure(repeat, writes):
+    """Runs in the child process: times the views and edits against PROJECTTRACKER_DATA_DIR."""
+    sys.path.insert(0, ROOT)
+    from src import data_handler
+
+    result = {"rss_start": rss_mb()}
+    result["list_cold"] = timed_ms(lambda: data_handler.get_projects_by_category("active"))
+    result["tasks"] = timed_ms(lambda: data_handler.get_all_tasks())
+    result["list_warm"] = p50(lambda: data_handler.get_projects_by_category("active"), repeat)
+    result["rss_lists"], result["peak_lists"] = rss_mb(), peak_rss_mb()
+
+    data, index = data_handler.get_index()
+    project = next(p for p in index.projects_with_status(data, ["active"]) if p["tasks"])
+    project_id, task = project["id"], project["tasks"][0]
+    result["project_cold"] = timed_ms(lambda: data_handler.get_project(project_id, None))
+    result["project_warm"] = p50(lambda: data_handler.get_project(project_id, None), repeat)
+    result["rss_project"] = rss_mb()
+
+    if writes:
+        written = bytes_written()
+        result["task_edit"] = p50(lambda: data_handler.update_task(
+            project_id, task["id"], task["description"] + ".", "edited", task["status"], task.get("start_date"),
+            task.get("target_completion_date"), task.get("actual_completion_date")), writes)
+        result["update_edit"] = p50(lambda: data_handler.add_project_update(project_id, "benchmark update"), writes)
+        if written is not None:
+            result["edit_bytes"] = (bytes_written() - written) / (2 * writes) / 1e3
+    print(json.dumps(result))
+
+
+def run(data_dir, layout, args):
+    env = dict(os.environ, PROJECTTRACKER_DATA_DIR=data_dir, PROJECTTRACKER_LAYOUT=layout,
+               PROJECTTRACKER_STORAGE="json")
+    out = subprocess.run([sys.executable, "-m"] + args, cwd=ROOT, env=env,
+                         check=True, capture_output=True, text=True).stdout
+    return out.strip().splitlines()[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="large")
+    parser.add_argument("--layouts", default="single,split,sharded")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per warm read")
+    parser.add_argument("--writes", type=int, default=3, help="runs per edit")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.measure:
+        return measure(args.repeat, args.writes)
+
+    layouts = args.layouts.split(",")
+    data_dir = tempfile.mkdtemp(prefix="pt-layouts-")
+    try:
+        projects, tasks, cards, updates = SCALES[args.scale]
+        path, _ = generate(data_dir, projects, tasks, 0, updates)
+        print(f"{args.scale} dataset: {projects} projects, {tasks} tasks, ~{updates} updates per project, "
+              f"{os.path.getsize(path) / 1e6:.0f} MB")
+
+        results = {}
+        for layout in layouts:
+            start = time.perf_counter()
+            run(data_dir, layout, ["src.shards", layout])
+            files = ""
+            for directory in ("project_details", "projects"):
+                count = len(os.listdir(os.path.join(data_dir, directory))) if os.path.isdir(
+                    os.path.join(data_dir, directory)) else 0
+                if count:
+                    files += f" + {count} files in {directory}/"
+            print(f"converted to {layout} in {time.perf_counter() - start:.1f}s: project_data.json "
+                  f"{os.path.getsize(path) / 1e6:.1f} MB{files}")
+            results[layout] = json.loads(run(data_dir, layout, ["bench.layouts", "--measure", "--repeat",
+                                                                str(args.repeat), "--writes", str(args.writes)]))
+
+        print(f"\n{'':28s}" + "".join(f" {layout:>13s}" for layout in layouts)
+              + "".join(f" {layout + ' chg':>12s}" for layout in layouts[1:]))
+        for label, key, unit in ROWS:
+            values = [results[layout].get(key) for layout in layouts]
+            if None in values:
+                continue
+            changes = "".join(f" {(value - values[0]) / values[0]:+12.0%}" if values[0] else f" {'':12s}"
+                              for value in values[1:])
+            print(f"{label:28s}" + "".join(f" {value:10.1f} {unit}" for value in values) + changes)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+HTTP load test for the production server mode: throughput vs. waitress threads.
+
+Generates a dataset, then for each thread count starts `src/app.py` with
+PROJECTTRACKER_SERVER=waitress and PROJECTTRACKER_THREADS=n and hammers it for a
+fixed time from client processes holding keep-alive connections. The mix is
+mostly reads (JSON API and HTML pages) with a share of writes (project updates,
+each a full atomic save). Prints requests/s, latency percentiles and the speed-up
+over one thread.
+
+    python -m bench.load_test [--scale small] [--threads 1,2,4,8] [--clients 16]
+                              [--duration 10] [--writes 0.05] [--server waitress]
+
+Python threads share the GIL, so extra threads pay off where requests wait
+rather than compute: socket I/O, fsync during saves, readers overlapping a
+writer's disk write. CPU-bound rendering won't scale past one core.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+from .generate import SCALES, generate
+from .runner import percentile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(data_dir, port, server, threads):
+    env = dict(os.environ, PROJECTTRACKER_DATA_DIR=data_dir, PROJECTTRACKER_PORT=str(port),
+               PROJECTTRACKER_SERVER=server, PROJECTTRACKER_THREADS=str(threads))
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "src", "app.py")], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/__health")
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def requests_for(project_ids):
+    """(weight, method, path-or-factory, body-factory) for the request mix."""
+    pick = lambda: random.choice(project_ids)  # noqa: E731
+    return [
+        (30, "GET", lambda: f"/api/project/{pick()}", None),
+        (20, "GET", lambda: "/api/tasks?limit=100", None),
+        (15, "GET", lambda: f"/project/{pick()}", None),
+        (10, "GET", lambda: "/api/calendar", None),
+        (10, "GET", lambda: "/projects/active", None),
+        (10, "GET", lambda: "/api/anki", None),
+        (5, "GET", lambda: "/tasks?limit=100", None),
+    ], (1, "POST", lambda: f"/project/{pick()}/add_update",
+        lambda: urllib.parse.urlencode({"update_text": "load test update"}))
+
+
+def client(port, project_ids, n_threads, duration, writes, seed, results):
+    """One client process: n_threads keep-alive connections issuing the mix until time runs out."""
+    import threading
+
+    reads, write = requests_for(project_ids)
+    weights = [w for w, *_ in reads]
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def run(rng):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine, failed = [], 0
+        while time.monotonic() < deadline:
+            _, method, path, body = write if rng.random() < writes else rng.choices(reads, weights)[0]
+            headers = {"Content-Type": "application/x-www-form-urlencoded"} if body else {}
+            start = time.perf_counter()
+            try:
+                conn.request(method, path(), body=body() if body else None, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    random.seed(seed)
+    threads = [threading.Thread(target=run, args=(random.Random(seed * 1000 + i),)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put((latencies, errors[0]))
+
+
+def run_load(port, project_ids, clients, duration, writes):
+    procs_n = min(clients, max(2, os.cpu_count() or 2))
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    per_proc = [clients // procs_n + (i < clients % procs_n) for i in range(procs_n)]
+    procs = [ctx.Process(target=client, args=(port, project_ids, n, duration, writes, i, results))
+             for i, n in enumerate(per_proc)]
+    for p in procs:
+        p.start()
+    latencies, errors = [], 0
+    for _ in procs:
+        got, failed = results.get()
+        latencies.extend(got)
+        errors += failed
+    for p in procs:
+        p.join()
+    latencies.sort()
+    return latencies, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--threads", default="1,2,4,8", help="comma-separated waitress thread counts")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per thread count")
+    parser.add_argument("--writes", type=float, default=0.05, help="share of requests that save")
+    parser.add_argument("--server", default="waitress", help="PROJECTTRACKER_SERVER value")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="pt-load-")
+    try:
+        projects, tasks, cards, updates = SCALES[args.scale]
+        path, _ = generate(data_dir, projects, tasks, cards, updates)
+        with open(path, "rb") as f:
+            project_ids = [p["id"] for p in json.loads(f.read())["projects"]]
+
+        print(f"{args.scale} dataset, {args.clients} clients, {args.duration:.0f}s per run, "
+              f"{args.writes:.0%} writes, {os.cpu_count()} CPU(s)")
+        print(f"{'threads':>7s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'errors':>7s} {'speed-up':>8s}")
+        single = None
+        for threads in [int(n) for n in args.threads.split(",")]:
+            port = free_port()
+            server = start_server(data_dir, port, args.server, threads)
+            try:
+                run_load(port, project_ids, args.clients, 1.0, args.writes)  # warm caches and indexes
+                latencies, errors = run_load(port, project_ids, args.clients, args.duration, args.writes)
+            finally:
+                server.terminate()
+                server.wait()
+            rate = len(latencies) / args.duration
+            single = single or rate
+            ms = [percentile(latencies, p) * 1e3 if latencies else 0.0 for p in (50, 95, 99)]
+            print(f"{threads:7d} {rate:8.1f} {ms[0]:8.1f} {ms[1]:8.1f} {ms[2]:8.1f} {errors:7d} {rate / single:7.2f}x")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""
+Drives every Flask route and every data_handler / anki function against a generated
+dataset and reports p50/p95/p99 latency, peak RSS and bytes written per call.
+
+Results are saved as JSON baselines; later runs compare against the baseline and
+flag regressions (exit status 1), so the suite can gate a change. When NumPy is
+installed, the vectorized SM2 step (src/anki_sim.py) is also checked against
+anki.apply_sm2 on randomized decks, and a mismatch fails the run the same way.
+
+    python -m bench.runner [--scale small|medium|large] [--data-dir DIR] [--only TEXT]
+                           [--repeat 20] [--budget 2.0] [--save] [--baseline PATH]
+                           [--tolerance 0.25] [--metric p50]
+
+Storage settings (PROJECTTRACKER_STORAGE, PROJECTTRACKER_LAYOUT, PROJECTTRACKER_JOURNAL,
+PROJECTTRACKER_WRITE_BEHIND_MS) come from the environment as usual and are part of
+the default baseline name, e.g. medium-json-split-journal-wb50.json; the defaults
+(single layout, write-behind off) are left out of it.
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from .generate import SCALES, generate
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+# Latency differences below this are treated as noise when flagging regressions.
+NOISE_FLOOR_MS = 0.5
+
+# Rows per call in the bulk import cases.
+IMPORT_ROWS = 100
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def bytes_written():
+    """Bytes this process has passed to write() so far (Linux only), or None."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def measure(run, setup=None, repeat=20, budget=2.0):
+    """Times run(*setup()) up to `repeat` times (at least 3, fewer if `budget` seconds run out)."""
+    timings, written = [], 0
+    deadline = time.perf_counter() + budget
+    while len(timings) < repeat and (len(timings) < 3 or time.perf_counter() < deadline):
+        args = setup() if setup else ()
+        before = bytes_written()
+        start = time.perf_counter()
+        run(*args)
+        timings.append(time.perf_counter() - start)
+        after = bytes_written()
+        if before is not None and after is not None:
+            written += after - before
+    timings.sort()
+    return {
+        "runs": len(timings),
+        "p50_ms": round(percentile(timings, 50) * 1e3, 3),
+        "p95_ms": round(percentile(timings, 95) * 1e3, 3),
+        "p99_ms": round(percentile(timings, 99) * 1e3, 3),
+        "bytes_written": written // len(timings) if bytes_written() is not None else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def pick_ids(data_handler, anki):
+    """Picks a project with tasks, one of its tasks and a card from the loaded data."""
+    projects = data_handler.load_data()["projects"]
+    project = max(projects[:50], key=lambda p: len(p.get("tasks", [])))
+    return project, project["tasks"][0], anki.load_anki_data()["cards"][0]
+
+
+def search_query(project):
+    """A word prefix from the project's title, so a search matches it and plenty of other records."""
+    return project["title"].split()[-1][:4]
+
+
+def route_cases(app, data_handler, anki, project, task, card):
+    """(name, rule, setup, run) for every route; `rule` is the url_map rule it covers."""
+    client = app.test_client()
+    pid, tid, cid = project["id"], task["id"], card["id"]
+
+    def get(url, **kwargs):
+        return lambda: client.get(url, **kwargs)
+
+    def post(url, **kwargs):
+        return lambda: client.post(url, **kwargs)
+
+    def new_card():
+        return (anki.create_card("bench front", "bench back"),)
+
+    def due_card():
+        # Review a different card each run; one card reviewed over and over grows its interval without bound.
+        return ((anki.get_next_due_card()[0] or card)["id"],)
+
+    def new_update():
+        data_handler.add_project_update(pid, "bench update")
+        return (data_handler.get_project(pid, task_status=None)["updates"][-1]["id"],)
+
+    def card_rows():
+        # New text every run, so no row is skipped as a duplicate.
+        tag = uuid.uuid4().hex
+        return ("".join(json.dumps({"front": f"Bench {tag} {n}", "back": "Card"}) + "\n"
+                        for n in range(IMPORT_ROWS)),)
+
+    def open_events():
+        response = client.get("/events", buffered=False)
+        chunks = response.iter_encoded()
+        next(chunks)  # the retry: line, sent as soon as the stream is subscribed
+        return response, chunks
+
+    def pushed_change(response, chunks):
+        # Waits for the event naming the new project; SQLite storage can't name ids and sends null.
+        project_id = data_handler.create_project("Bench", "", "2025-01-01", None)
+        try:
+            while True:
+                chunk = next(chunks)
+                if chunk.startswith(b"event: change") and (project_id.encode() in chunk or b"null" in chunk):
+                    return
+        finally:
+            response.close()
+
+    tasks_etag = client.get("/tasks").headers.get("ETag", "")
+    query = {"q": search_query(project)}
+    project_form = {"title": project["title"], "description": "", "status": project["status"],
+                    "start_date": project["start_date"], "target_completion_date": "",
+                    "actual_completion_date": ""}
+    task_form = {"description": task["description"], "additional_info": "", "status": task["status"],
+                 "start_date": "", "target_completion_date": "", "actual_completion_date": ""}
+    return [
+        ("GET /__health", "/__health", None, get("/__health")),
+        ("GET /__page_cache", "/__page_cache", None, get("/__page_cache")),
+        ("GET /projects", "/projects", None, get("/projects")),
+        ("GET /", "/", None, get("/", follow_redirects=True)),
+        ("GET /projects/<category>", "/projects/<category>", None, get("/projects/complete")),
+        ("GET /project/<id>", "/project/<project_id>", None, get(f"/project/{pid}")),
+        ("GET /project/<id>/edit", "/project/<project_id>/edit", None, get(f"/project/{pid}/edit")),
+        ("GET /edit_task", "/edit_task/<project_id>/<task_id>", None, get(f"/edit_task/{pid}/{tid}")),
+        ("GET /tasks", "/tasks", None, get("/tasks")),
+        ("GET /tasks (304)", "/tasks", None, get("/tasks", headers={"If-None-Match": tasks_etag})),
+        ("GET /tasks?stream=1", "/tasks", None, lambda: client.get("/tasks?stream=1").get_data()),
+        ("GET /calendar", "/calendar", None, get("/calendar")),
+        ("GET /add_project", "/add_project", None, get("/add_project")),
+        ("GET /api/projects", "/api/projects", None, get("/api/projects")),
+        ("GET /api/projects/<category>", "/api/projects/<category>", None, get("/api/projects/complete")),
+        ("GET /api/project/<id>", "/api/project/<project_id>", None, get(f"/api/project/{pid}")),
+        ("GET /api/tasks", "/api/tasks", None, get("/api/tasks")),
+        ("GET /api/calendar", "/api/calendar", None, get("/api/calendar")),
+        ("GET /api/anki", "/api/anki", None, get("/api/anki")),
+        ("GET /anki", "/anki", None, get("/anki")),
+        ("GET /anki?batch=1", "/anki", None, get("/anki?batch=1")),
+        ("GET /anki/manage", "/anki/manage", None, get("/anki/manage")),
+        ("GET /anki/add", "/anki/add", None, get("/anki/add")),
+        ("GET /anki/edit/<id>", "/anki/edit/<card_id>", None, get(f"/anki/edit/{cid}")),
+        ("GET /export/tasks.ndjson", "/export/<kind>.<fmt>", None,
+         lambda: client.get("/export/tasks.ndjson").get_data()),
+        ("GET /export/cards.csv", "/export/<kind>.<fmt>", None, lambda: client.get("/export/cards.csv").get_data()),
+        (f"POST /import/cards ({IMPORT_ROWS} rows)", "/import/<kind>", card_rows,
+         lambda body: client.post("/import/cards?format=ndjson", data=body, content_type="application/x-ndjson")),
+        ("GET /events", "/events", None, lambda: open_events()[0].close()),
+        ("GET /events (change pushed)", "/events", open_events, pushed_change),
+        ("GET /search", "/search", None, get("/search", query_string=query)),
+        ("GET /api/search", "/api/search", None, get("/api/search", query_string=query)),
+        ("POST /set_style", "/set_style", None,
+         post("/set_style", data={"selected_style": "default.css"}, headers={"Referer": "/projects"})),
+        ("POST /add_project", "/add_project", None,
+         post("/add_project", data={"title": "Bench", "start_date": "2025-01-01", "status": "active"})),
+        ("POST /add_task/<id>", "/add_task/<project_id>", None,
+         post(f"/add_task/{pid}", data={"description": "Bench task", "status": "active"})),
+        ("POST /project/<id>/edit", "/project/<project_id>/edit", None,
+         post(f"/project/{pid}/edit", data=project_form)),
+        ("POST /edit_task", "/edit_task/<project_id>/<task_id>", None,
+         post(f"/edit_task/{pid}/{tid}", data=task_form)),
+        ("POST /project/<id>/add_update", "/project/<project_id>/add_update", None,
+         post(f"/project/{pid}/add_update", data={"update_text": "Bench update"})),
+        ("POST /project/<id>/delete_update", "/project/<project_id>/delete_update/<update_id>", new_update,
+         lambda uid: client.post(f"/project/{pid}/delete_update/{uid}")),
+        ("POST /anki/review/<id>", "/anki/review/<card_id>", due_card,
+         lambda due_id: client.post(f"/anki/review/{due_id}", data={"rating": "4"})),
+        ("POST /anki/review/batch", "/anki/review/batch", due_card,
+         lambda due_id: client.post("/anki/review/batch", json=[{"card_id": due_id, "rating": 4}])),
+        ("POST /anki/add", "/anki/add", None, post("/anki/add", data={"front": "Bench", "back": "Card"})),
+        ("POST /anki/edit/<id>", "/anki/edit/<card_id>", None,
+         post(f"/anki/edit/{cid}", data={"front": card["front"], "back": card["back"]})),
+        ("POST /anki/delete/<id>", "/anki/delete/<card_id>", new_card,
+         lambda new_id: client.post(f"/anki/delete/{new_id}")),
+        ("POST /__flush", "/__flush", None, post("/__flush")),
+    ]
+
+
+def function_cases(data_handler, anki, project, task, card):
+    """(name, function name, setup, run) for the data_handler and anki functions."""
+    dh, pid, tid, cid = data_handler, project["id"], task["id"], card["id"]
+    today = date.today()
+
+    def new_update():
+        dh.add_project_update(pid, "bench update")
+        return (dh.get_project(pid, task_status=None)["updates"][-1]["id"],)
+
+    def new_card():
+        return (anki.create_card("bench front", "bench back"),)
+
+    def due_card():
+        return ((anki.get_next_due_card()[0] or card)["id"],)
+
+    def project_records():
+        projects = [dh.new_project_record("Bench", "", "2025-01-01", None) for _ in range(10)]
+        tasks = [(pid, dh.new_task_record(f"Bench task {n}", "", None, None, None, "active"))
+                 for n in range(IMPORT_ROWS)]
+        return projects, tasks
+
+    def card_records():
+        tag = uuid.uuid4().hex
+        return ([anki.new_card_record(f"Bench {tag} {n}", "Card") for n in range(IMPORT_ROWS)],)
+
+    fields = (project["title"], project["description"], project["status"], project["start_date"],
+              project["target_completion_date"], project["actual_completion_date"], project["updates"])
+    return [
+        ("data_handler.data_version", "data_version", None, dh.data_version),
+        ("data_handler.load_data", "load_data", None, dh.load_data),
+        ("data_handler.get_index", "get_index", None, dh.get_index),
+        ("data_handler.get_project", "get_project", None, lambda: dh.get_project(pid)),
+        ("data_handler.get_projects_by_category", "get_projects_by_category", None,
+         lambda: dh.get_projects_by_category("active")),
+        ("data_handler.build_project_summary", "build_project_summary", None,
+         lambda: dh.build_project_summary(project)),
+        ("data_handler.project_list_entry", "project_list_entry", lambda: (dh.build_project_summary(project),),
+         lambda summary: dh.project_list_entry(project, summary, today)),
+        ("data_handler.get_all_tasks", "get_all_tasks", None,
+         lambda: dh.get_all_tasks("due_date", "asc", ["active", "ongoing"], ["active"])),
+        ("data_handler.get_tasks_page", "get_tasks_page", None,
+         lambda: dh.get_tasks_page("due_date", "asc", ["active", "ongoing"], ["active"])),
+        ("data_handler.get_search_index", "get_search_index", None, dh.get_search_index),
+        ("data_handler.search", "search", None, lambda: dh.search(search_query(project))),
+        ("data_handler.project_search_fields", "project_search_fields", None,
+         lambda: dh.project_search_fields(project)),
+        ("data_handler.task_search_fields", "task_search_fields", None, lambda: dh.task_search_fields(task)),
+        ("data_handler.update_search_fields", "update_search_fields", lambda: (dh.new_update_record("u"),),
+         dh.update_search_fields),
+        ("data_handler.build_completion_counts", "build_completion_counts", lambda: (dh.load_data(),),
+         dh.build_completion_counts),
+        ("data_handler.get_completion_counts", "get_completion_counts", None,
+         lambda: dh.get_completion_counts(today - timedelta(days=370), today)),
+        ("data_handler.get_completion_data", "get_completion_data", None, dh.get_completion_data),
+        ("data_handler.new_project_record", "new_project_record", None,
+         lambda: dh.new_project_record("t", "d", "2025-01-01", None)),
+        ("data_handler.new_task_record", "new_task_record", None,
+         lambda: dh.new_task_record("d", "", None, None, None, "active")),
+        ("data_handler.new_update_record", "new_update_record", None, lambda: dh.new_update_record("u")),
+        ("data_handler.create_project", "create_project", None,
+         lambda: dh.create_project("Bench", "", "2025-01-01", None)),
+        ("data_handler.update_project", "update_project", None, lambda: dh.update_project(pid, *fields)),
+        ("data_handler.create_task", "create_task", None,
+         lambda: dh.create_task(pid, "Bench task", "", None, None, None, "active")),
+        ("data_handler.update_task", "update_task", None,
+         lambda: dh.update_task(pid, tid, task["description"], "", task["status"], None, None,
+                                datetime.now().date().isoformat())),
+        ("data_handler.add_project_update", "add_project_update", None,
+         lambda: dh.add_project_update(pid, "bench update")),
+        ("data_handler.delete_project_update", "delete_project_update", new_update,
+         lambda uid: dh.delete_project_update(pid, uid)),
+        ("data_handler.iter_projects", "iter_projects", None, lambda: sum(1 for _ in dh.iter_projects())),
+        ("data_handler.import_projects", "import_projects", project_records, dh.import_projects),
+        ("data_handler.save_data", "save_data", lambda: (dh.load_data(),), dh.save_data),
+        ("data_handler.flush_data", "flush_data", None, dh.flush_data),
+        ("data_handler.convert_layout (no change)", "convert_layout", None, lambda: dh.convert_layout(dh.LAYOUT)),
+        ("anki.data_version", "data_version", None, anki.data_version),
+        ("anki.load_anki_data", "load_anki_data", None, anki.load_anki_data),
+        ("anki.get_card_index", "get_card_index", None, anki.get_card_index),
+        ("anki.get_due_queue", "get_due_queue", None, anki.get_due_queue),
+        ("anki.get_card", "get_card", None, lambda: anki.get_card(cid)),
+        ("anki.get_due_cards", "get_due_cards", None, lambda: anki.get_due_cards(limit=50)),
+        ("anki.card_sort_key", "card_sort_key", None, lambda: anki.card_sort_key("review_date")(card)),
+        ("anki.get_cards_page", "get_cards_page", None, anki.get_cards_page),
+        ("anki.get_next_due_card", "get_next_due_card", None, anki.get_next_due_card),
+        ("anki.get_search_index", "get_search_index", None, anki.get_search_index),
+        ("anki.search_cards", "search_cards", None, lambda: anki.search_cards(card["front"].split()[0])),
+        ("anki.card_search_fields", "card_search_fields", None, lambda: anki.card_search_fields(card)),
+        ("anki.new_card_record", "new_card_record", None, lambda: anki.new_card_record("f", "b")),
+        ("anki.apply_sm2", "apply_sm2", lambda: (dict(card),), lambda c: anki.apply_sm2(c, 4)),
+        ("anki.parse_reviews", "parse_reviews", None,
+         lambda: anki.parse_reviews([{"card_id": cid, "rating": 3, "reviewed_at": "2025-01-01T10:00:00Z"}])),
+        ("anki.create_card", "create_card", None, lambda: anki.create_card("Bench", "Card")),
+        ("anki.update_card", "update_card", None, lambda: anki.update_card(cid, card["front"], card["back"])),
+        ("anki.process_card_review", "process_card_review", due_card,
+         lambda due_id: anki.process_card_review(due_id, 4)),
+        ("anki.process_card_reviews", "process_card_reviews", due_card,
+         lambda due_id: anki.process_card_reviews([{"card_id": due_id, "rating": 4}])),
+        ("anki.delete_card", "delete_card", new_card, anki.delete_card),
+        ("anki.card_key", "card_key", None, lambda: anki.card_key(card["front"], card["back"])),
+        ("anki.iter_cards", "iter_cards", None, lambda: sum(1 for _ in anki.iter_cards())),
+        ("anki.import_cards", "import_cards", card_records, anki.import_cards),
+        ("anki.save_anki_data", "save_anki_data", lambda: (anki.load_anki_data(),), anki.save_anki_data),
+        ("anki.flush_anki_data", "flush_anki_data", None, anki.flush_anki_data),
+    ]
+
+
+def public_functions(module):
+    names = set()
+    for name, obj in inspect.getmembers(module, inspect.isfunction):
+        if not name.startswith("_") and obj.__module__ in (module.__name__, "src.sqlite_store"):
+            names.add(name)
+    return names
+
+
+def compare(results, baseline, tolerance, metric="p50"):
+    """Returns human-readable regression notes for results that got worse than the baseline."""
+    notes = []
+    field = f"{metric}_ms"
+    for name, result in results.items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            continue
+        if result[field] > base[field] * (1 + tolerance) and result[field] - base[field] > NOISE_FLOOR_MS:
+            notes.append(f"{name}: {metric} {base[field]:.3f} -> {result[field]:.3f} ms")
+        if result["bytes_written"] is not None and base.get("bytes_written") is not None:
+            if result["bytes_written"] > base["bytes_written"] * (1 + tolerance) + 4096:
+                notes.append(f"{name}: bytes written {base['bytes_written']} -> {result['bytes_written']}")
+    return notes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--data-dir", help="benchmark a copy of an existing data folder instead")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per case")
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds per case before cutting runs short")
+    parser.add_argument("--baseline", help="baseline JSON file (default: bench/baselines/<scale>-<storage>[-<layout>][-journal][-wb<ms>].json)")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument("--metric", choices=("p50", "p95", "p99"), default="p50",
+                        help="latency compared against the baseline (tail percentiles need more --repeat)")
+    args = parser.parse_args(argv)
+
+    storage = os.getenv("PROJECTTRACKER_STORAGE", "json")
+    layout = os.getenv("PROJECTTRACKER_LAYOUT", "single")
+    journal = os.getenv("PROJECTTRACKER_JOURNAL", "0") == "1"
+    write_behind_ms = int(os.getenv("PROJECTTRACKER_WRITE_BEHIND_MS", "0"))
+    label = "-".join([args.scale if not args.data_dir else "custom", storage]
+                     + ([layout] if layout != "single" else [])
+                     + (["journal"] if journal else [])
+                     + ([f"wb{write_behind_ms}"] if write_behind_ms else []))
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{label}.json")
+
+    data_dir = tempfile.mkdtemp(prefix="pt-bench-")
+    if args.data_dir:
+        for name in ("project_data.json", "anki.json"):
+            shutil.copy(os.path.join(args.data_dir, name), data_dir)
+    else:
+        start = time.perf_counter()
+        generate(data_dir, *SCALES[args.scale], seed=args.seed)
+        print(f"generated {args.scale} dataset in {time.perf_counter() - start:.1f} s")
+
+    # The modules read their configuration at import time.
+    os.environ["PROJECTTRACKER_DATA_DIR"] = data_dir
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    from src import anki, anki_sim, data_handler
+    from src.app import app
+    if storage == "sqlite":
+        from src import sqlite_store
+        sqlite_store.import_json()
+
+    project, task, card = pick_ids(data_handler, anki)
+    cases = route_cases(app, data_handler, anki, project, task, card)
+    functions = function_cases(data_handler, anki, project, task, card)
+
+    rules = {rule.rule for rule in app.url_map.iter_rules() if rule.endpoint != "static"}
+    missing = sorted(rules - {rule for _, rule, _, _ in cases})
+    covered = {name for _, name, _, _ in functions}
+    missing += sorted(f"{module.__name__}.{name}" for module in (data_handler, anki)
+                      for name in public_functions(module) - covered)
+    if missing:
+        print("not benchmarked: " + ", ".join(missing))
+
+    results = {}
+    for name, _, setup, run in cases + functions:
+        if args.only and args.only not in name:
+            continue
+        results[name] = result = measure(run, setup, args.repeat, args.budget)
+        print(f"{name:45s} p50 {result['p50_ms']:9.3f}  p95 {result['p95_ms']:9.3f}  "
+              f"p99 {result['p99_ms']:9.3f} ms  {result['bytes_written'] or 0:>10} B/call  "
+              f"rss {result['peak_rss_mb']} MB  ({result['runs']} runs)")
+
+    report = {
+        "meta": {"label": label, "scale": args.scale, "seed": args.seed, "storage": storage,
+                 "layout": layout, "journal": journal, "write_behind_ms": write_behind_ms,
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "date": datetime.now().isoformat(timespec="seconds")},
+        "cases": results,
+    }
+    for module in (data_handler, anki):
+        module._cache.compact()  # fold any journal now rather than at exit, after the folder is gone
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+    status = 0
+    if anki_sim.np is not None:
+        from . import sm2_vectorized
+        try:
+            sm2_vectorized.check(50, random.Random(args.seed))
+            print("sm2 check: vectorized SM2 step identical to apply_sm2 on 50 randomized decks")
+        except AssertionError as e:
+            print(f"REGRESSION sm2 check: {e}")
+            status = 1
+    else:
+        print("sm2 check skipped: NumPy is not installed")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"saved baseline {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            notes = compare(results, json.load(f), args.tolerance, args.metric)
+        for note in notes:
+            print(f"REGRESSION {note}")
+        print(f"{len(notes)} regression(s) against {baseline_path}")
+        status = 1 if notes else status
+    else:
+        print(f"no baseline at {baseline_path}; run with --save to create one")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
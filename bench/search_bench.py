@@ -0,0 +1,126 @@
+"""
+Times the full-text search index on a generated dataset.
+
+Builds the index from a generated project_data.json, saves it, reloads it (the
+cold-start path), then times a fixed set of queries: common words, rare words,
+prefixes, multi-word ANDs and misses. Prints each query's first (cold) run, which
+builds the per-term arrays it needs, latency percentiles over --repeat runs, and
+how many of its results score the same as the exact top-k from a full scan
+(SearchIndex.scan); fewer means the walk stopped at WALK_LIMIT. Then runs --check
+random queries with the walk unlimited, which must give the full scan's scores.
+Fails if any query's median is over --budget milliseconds or an unlimited walk
+differs from the scan.
+
+The generator draws all text from ~20 words, so every word is in a large share of
+documents: a harder case for ANDed words than real notes.
+
+    python -m bench.search_bench [--scale large] [--repeat 50] [--budget 10] [--check 20]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src import search  # noqa: E402
+
+from .generate import SCALES, WORDS, generate  # noqa: E402
+from .runner import percentile  # noqa: E402
+
+QUERIES = [
+    "plan",                     # in roughly a fifth of all documents
+    "customer release",
+    "re",                       # short prefix: expands to many terms
+    "migr",
+    "project 00042",
+    "kickoff vendor contract",
+    "follow up",
+    "audit budget sprint report",
+    "nothingmatchesthis",
+]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="large")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=10.0, help="max median ms per query")
+    parser.add_argument("--check", type=int, default=20, help="random queries checked against a full scan")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="pt-search-")
+    try:
+        projects, tasks, cards, updates = SCALES[args.scale]
+        generate(data_dir, projects, tasks, cards, updates)
+        os.environ["PROJECTTRACKER_DATA_DIR"] = data_dir
+        os.environ["PROJECTTRACKER_STORAGE"] = "json"
+        from src import data_handler
+
+        seconds, doc = timed(data_handler.load_data)
+        current = search.stamp(doc)
+        print(f"{args.scale} dataset: {tasks} tasks, {projects} projects; load {seconds:.2f}s")
+        seconds, index = timed(lambda: search.SearchIndex.build(data_handler._search_entries(doc), current))
+        print(f"build   {seconds:6.2f}s  {len(index)} documents, {len(index._terms)} terms")
+        path = os.path.join(data_dir, "bench.search")
+        seconds, _ = timed(lambda: index.save(path))
+        print(f"save    {seconds:6.2f}s  {os.path.getsize(path) / 1e6:.1f} MB")
+        seconds, index = timed(lambda: search.SearchIndex.load(path, current))
+        print(f"load    {seconds:6.2f}s")
+
+        print(f"\n{'query':30s} {'hits':>5s} {'cold ms':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'max ms':>8s}"
+              f" {'exact':>6s}")
+        over = []
+        for query in QUERIES + [" ".join(WORDS[:2])]:
+            cold, _ = timed(lambda: index.search(query, args.limit))
+            times = []
+            for _ in range(args.repeat):
+                seconds, hits = timed(lambda: index.search(query, args.limit))
+                times.append(seconds)
+            times.sort()
+            exact = index.scan(query, args.limit)
+            same = sum(hit[0] == best[0] for hit, best in zip(hits, exact))
+            p50 = percentile(times, 50) * 1e3
+            print(f"{query:30s} {len(hits):5d} {cold * 1e3:8.2f} {p50:8.2f} {percentile(times, 95) * 1e3:8.2f}"
+                  f" {times[-1] * 1e3:8.2f} {same:3d}/{len(exact):<2d}")
+            if p50 > args.budget:
+                over.append(query)
+
+        rng = random.Random(1)
+        walk_limit, search.WALK_LIMIT = search.WALK_LIMIT, float("inf")
+        wrong = []
+        try:
+            for _ in range(args.check):
+                words = rng.sample(WORDS, rng.randint(1, 4))
+                if rng.random() < 0.3:
+                    words[0] = words[0][:rng.randint(2, 4)]
+                query = " ".join(words)
+                if [hit[0] for hit in index.search(query, args.limit)] != [hit[0] for hit in index.scan(query, args.limit)]:
+                    wrong.append(query)
+        finally:
+            search.WALK_LIMIT = walk_limit
+        print(f"\n{args.check} random queries with an unlimited walk: {args.check - len(wrong)} match a full scan")
+        if wrong:
+            print(f"differ from a full scan: {', '.join(wrong)}")
+        if over:
+            print(f"over the {args.budget:g} ms budget: {', '.join(over)}")
+        if wrong or over:
+            return 1
+        print(f"every query under {args.budget:g} ms (median)")
+        return 0
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Times the backend's cold start the way the Electron shell sees it.
+
+Each run spawns `src/app.py` on a free port against a generated data folder and
+records two moments from the spawn: when the backend is known to be ready, and
+when the first page (/projects) has been received in full, which is as close to
+first paint as a script gets. Three ways of starting are compared:
+
+    polling      poll /__health every 100 ms (how main.js used to wait), no template cache
+    ready, cold  wait for the PROJECTTRACKER_READY line, empty template cache
+    ready, warm  wait for the PROJECTTRACKER_READY line, template cache filled by an earlier start
+
+    python -m bench.startup [--scale small] [--repeat 10]
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from .generate import SCALES, generate
+from .runner import percentile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+POLL_INTERVAL = 0.1
+TIMEOUT = 30
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=TIMEOUT) as response:
+        return response.read()
+
+
+def wait_for_ready_line(process):
+    for line in process.stdout:
+        if line.startswith("PROJECTTRACKER_READY "):
+            return int(line.split()[1])
+    raise RuntimeError(f"backend exited with code {process.wait()} before it was ready")
+
+
+def wait_for_health(port, start):
+    while time.perf_counter() - start < TIMEOUT:
+        try:
+            get(f"http://127.0.0.1:{port}/__health")
+            return
+        except OSError:
+            time.sleep(POLL_INTERVAL)
+    raise RuntimeError("backend did not answer /__health")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_once(data_dir, template_cache, poll):
+    """Returns (ms until ready, ms until the first page arrived) for one backend start."""
+    port = free_port() if poll else 0
+    env = dict(os.environ, PROJECTTRACKER_DATA_DIR=data_dir, PROJECTTRACKER_PORT=str(port),
+               PROJECTTRACKER_TEMPLATE_CACHE=template_cache, PROJECTTRACKER_STORAGE="json")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join("src", "app.py")], cwd=ROOT, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        if poll:
+            wait_for_health(port, start)
+        else:
+            port = wait_for_ready_line(process)
+        ready = time.perf_counter()
+        get(f"http://127.0.0.1:{port}/projects")
+        page = time.perf_counter()
+    finally:
+        process.terminate()
+        process.wait()
+    return (ready - start) * 1e3, (page - start) * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--repeat", type=int, default=10, help="starts per mode")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="pt-startup-")
+    try:
+        projects, tasks, cards, updates = SCALES[args.scale]
+        generate(data_dir, projects, tasks, cards, updates)
+        print(f"{args.scale} dataset: {projects} projects, {tasks} tasks; {args.repeat} starts per mode")
+        warm_cache = os.path.join(data_dir, "template_cache")
+        start_once(data_dir, warm_cache, poll=False)  # fills the warm cache
+
+        modes = [
+            ("polling", lambda i: start_once(data_dir, "off", poll=True)),
+            ("ready, cold", lambda i: start_once(data_dir, os.path.join(data_dir, f"cold-{i}"), poll=False)),
+            ("ready, warm", lambda i: start_once(data_dir, warm_cache, poll=False)),
+        ]
+        print(f"\n{'':14s} {'ready p50':>10s} {'first page p50':>15s} {'first page max':>15s}")
+        for label, run in modes:
+            times = [run(i) for i in range(args.repeat)]
+            ready = sorted(t[0] for t in times)
+            page = sorted(t[1] for t in times)
+            print(f"{label:14s} {percentile(ready, 50):7.0f} ms {percentile(page, 50):12.0f} ms {page[-1]:12.0f} ms")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
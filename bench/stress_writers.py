@@ -0,0 +1,133 @@
+"""
+Multi-process write stress test for the JSON data files.
+
+Starts several worker processes against one data directory. Each worker adds
+tasks and project updates to a shared project and creates flashcards, all as
+fast as it can. Afterwards every item each worker added must be on disk, and
+each file's `revision` stamp must equal the number of saves made. Exits non-zero
+if anything was lost.
+
+    python -m bench.stress_writers [--workers 6] [--ops 60] [--journal] [--no-lock]
+
+--no-lock calls the writer functions without their lock-and-retry wrapper. Most
+racing saves are then refused with WriteConflict (counted, not retried), and any
+that slip between the conflict check and the write are silently lost.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _import_store(data_dir, journal):
+    """Imports the data modules for `data_dir`; must run before anything else imports them."""
+    os.environ["PROJECTTRACKER_DATA_DIR"] = data_dir
+    os.environ["PROJECTTRACKER_STORAGE"] = "json"
+    os.environ["PROJECTTRACKER_WRITE_BEHIND_MS"] = "0"
+    os.environ["PROJECTTRACKER_JOURNAL"] = "1" if journal else "0"
+    sys.path.insert(0, ROOT)
+    from src import anki, data_handler
+    return data_handler, anki
+
+
+def worker(n, data_dir, project_id, ops, journal, lock, start, refused):
+    data_handler, anki = _import_store(data_dir, journal)
+    from src.doc_cache import WriteConflict
+
+    def call(kind, fn, *args):
+        if lock:
+            return fn(*args)
+        try:
+            fn.__wrapped__(*args)
+        except WriteConflict:
+            with refused.get_lock():
+                refused[kind] += 1
+
+    start.wait()
+    for i in range(ops):
+        call(0, data_handler.create_task, project_id, f"w{n}-task-{i}", "", "2024-01-01", None, None, "active")
+        call(1, data_handler.add_project_update, project_id, f"w{n}-update-{i}")
+        call(2, anki.create_card, f"w{n}-card-{i}", "back")
+    if journal:
+        data_handler._cache.compact()
+        anki._cache.compact()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--ops", type=int, default=60, help="iterations per worker (3 saves each)")
+    parser.add_argument("--journal", action="store_true", help="run with PROJECTTRACKER_JOURNAL=1")
+    parser.add_argument("--no-lock", action="store_true", help="bypass the lock and retries to show what they prevent")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="pt-stress-")
+    try:
+        data_handler, anki = _import_store(data_dir, args.journal)
+        project_id = data_handler.create_project("Stress", "shared by every worker", "2024-01-01", None)
+        start_revision = data_handler.load_data()["revision"]
+
+        ctx = multiprocessing.get_context("spawn")  # fresh imports, so each worker has its own caches
+        start = ctx.Event()
+        refused = ctx.Array("i", 3)
+        procs = [ctx.Process(target=worker, args=(n, data_dir, project_id, args.ops, args.journal,
+                                                  not args.no_lock, start, refused))
+                 for n in range(args.workers)]
+        for p in procs:
+            p.start()
+        time.sleep(1.0)  # let every worker finish importing before the race starts
+        began = time.perf_counter()
+        start.set()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - began
+        data_handler._cache.compact()  # fold this process's journal in before the directory goes
+        anki._cache.compact()
+        failed = [p.exitcode for p in procs if p.exitcode]
+        if failed:
+            print(f"{len(failed)} worker(s) crashed")
+            return 1
+
+        from src.shards import read_project_data
+        projects = read_project_data(data_handler.DATA_FILE)
+        with open(anki.ANKI_FILE, "rb") as f:
+            cards = json.loads(f.read())
+        project = next(p for p in projects["projects"] if p["id"] == project_id)
+        expected = args.workers * args.ops
+        found = {
+            "tasks": sum(t["description"].startswith("w") for t in project["tasks"]),
+            "updates": len(project["updates"]),
+            "cards": len(cards["cards"]),
+        }
+        saved = {kind: expected - refused[i] for i, kind in enumerate(found)}
+        revisions = {
+            "project_data.json": (projects.get("revision", 0) - start_revision, saved["tasks"] + saved["updates"]),
+            "anki.json": (cards.get("revision", 0), saved["cards"]),
+        }
+
+        saves = 3 * expected
+        print(f"{args.workers} workers x {args.ops} ops, journal {'on' if args.journal else 'off'}, "
+              f"locking {'off' if args.no_lock else 'on'}: {saves} saves in {elapsed:.2f}s "
+              f"({saves / elapsed:.0f}/s)")
+        ok = True
+        for name, count in found.items():
+            refusals = f" ({expected - saved[name]} refused with WriteConflict)" if saved[name] != expected else ""
+            print(f"  {name:8s} {count:6d} / {saved[name]}{refusals}")
+            ok &= count == saved[name]
+        for name, (revision, want) in revisions.items():
+            print(f"  {name} revision +{revision} / {want}")
+            ok &= revision == want
+        print("no updates lost" if ok else "UPDATES LOST")
+        return 0 if ok else 1
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
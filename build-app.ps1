@@ -98,10 +98,10 @@ if (-not $SkipPipUpgrade) {
     }
 }
 
-Write-ColorOutput "  - Installing/upgrading Flask and PyInstaller..." "Gray"
-& python -m pip install --upgrade flask pyinstaller --quiet
+Write-ColorOutput "  - Installing/upgrading Flask, waitress and PyInstaller..." "Gray"
+& python -m pip install --upgrade flask waitress pyinstaller --quiet
 if ($LASTEXITCODE -ne 0) {
-    Handle-Error "Failed to install Flask/PyInstaller"
+    Handle-Error "Failed to install Flask/waitress/PyInstaller"
 }
 Write-ColorOutput "  OK: Python environment ready" "Green"
 
@@ -129,6 +129,17 @@ if (Test-Path $staticPath) {
     Write-ColorOutput "  - Including static folder" "Gray"
 }
 
+# Precompiled templates: the first page render skips Jinja's compile step (see src/template_cache.py)
+$templateCachePath = Join-Path $scriptDir "build\template_cache"
+Write-ColorOutput "  - Precompiling templates..." "Gray"
+& python -m src.template_cache $templateCachePath
+if ($LASTEXITCODE -eq 0) {
+    $addDataArgs += "--add-data", "$templateCachePath;template_cache"
+    Write-ColorOutput "  - Including precompiled templates" "Gray"
+} else {
+    Write-ColorOutput "  ! Warning: Could not precompile templates; the backend will compile them on first use" "Yellow"
+}
+
 Write-ColorOutput "  - Running PyInstaller..." "Gray"
 $pyInstallerArgs = @(
     "-m", "PyInstaller",
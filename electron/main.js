@@ -15,6 +15,7 @@ async function startBackend() {
     ...process.env,
     PROJECTTRACKER_PORT: String(currentPort),
     PROJECTTRACKER_DATA_DIR: dataDir,
+    PROJECTTRACKER_SERVER: process.env.PROJECTTRACKER_SERVER || 'waitress',
   };
   if (app.isPackaged) {
     const exe = path.join(process.resourcesPath, 'projecttracker-backend.exe');
@@ -27,9 +28,47 @@ async function startBackend() {
   backend.on('exit', (code) => {
     console.log('Backend exited', code);
   });
+  await waitForBackend();
+}
+
+// The backend prints "PROJECTTRACKER_READY <port>" once it is listening. Wait for
+// that line rather than polling; fall back to polling /__health if it never comes.
+const READY_TIMEOUT_MS = 30000;
+
+async function waitForBackend() {
+  const port = await waitForReadyLine(READY_TIMEOUT_MS).catch((e) => {
+    console.log('No readiness signal from the backend, polling instead:', e.message);
+    return null;
+  });
+  if (port) {
+    currentPort = port;
+    return;
+  }
   await waitForHealth();
 }
 
+function waitForReadyLine(timeoutMs) {
+  return new Promise((resolve, reject) => {
+    let buffered = '';
+    const timer = setTimeout(() => finish(reject, new Error('timed out')), timeoutMs);
+    const onData = (chunk) => {
+      buffered += chunk.toString();
+      const match = buffered.match(/^PROJECTTRACKER_READY (\d+)\r?\n/m);
+      if (match) finish(resolve, Number(match[1]));
+      else buffered = buffered.slice(buffered.lastIndexOf('\n') + 1);
+    };
+    const onExit = (code) => finish(reject, new Error(`backend exited with code ${code}`));
+    function finish(settle, value) {
+      clearTimeout(timer);
+      backend.stdout.off('data', onData);
+      backend.off('exit', onExit);
+      settle(value);
+    }
+    backend.stdout.on('data', onData);
+    backend.on('exit', onExit);
+  });
+}
+
 async function waitForHealth() {
   const url = `http://127.0.0.1:${currentPort}/__health`;
   for (let i = 0; i < 50; i++) {
@@ -54,8 +93,28 @@ async function createWindow() {
 
 app.whenReady().then(createWindow);
 
-app.on('before-quit', () => {
-  if (backend) backend.kill();
+async function flushBackend() {
+  // Write-behind saves may still be in memory; kill() on Windows gives the backend no chance to exit cleanly.
+  const controller = new AbortController();
+  const timer = setTimeout(() => controller.abort(), 5000);
+  try {
+    await fetch(`http://127.0.0.1:${currentPort}/__flush`, { method: 'POST', signal: controller.signal });
+  } catch (e) {
+    console.log('Backend flush failed', e);
+  } finally {
+    clearTimeout(timer);
+  }
+}
+
+let quitting = false;
+app.on('before-quit', async (event) => {
+  if (!backend || quitting) return;
+  event.preventDefault();
+  quitting = true;
+  await flushBackend();
+  backend.kill();
+  backend = null;
+  app.quit();
 });
 
 ipcMain.handle('choose-data-dir', async () => {
@@ -1,41 +1,103 @@
-import json
+import atexit
+import hashlib
 import os
+import unicodedata
 import uuid
 from datetime import datetime, timedelta
+from itertools import islice
 
-from .safe_io import atomic_write_json
+from .doc_cache import DocumentCache, copy_json, copy_path
+from .indexes import CardIndex, DueQueue
+from .journal import append_item, remove_item, set_fields
+from .pagination import paginate
+from .search import open_index, save_index
 
 DATA_DIR = os.getenv("PROJECTTRACKER_DATA_DIR", os.getcwd())
 os.makedirs(DATA_DIR, exist_ok=True)
 ANKI_FILE = os.path.join(DATA_DIR, "anki.json")
+SEARCH_FILE = ANKI_FILE + ".search"
+STORAGE_BACKEND = os.getenv("PROJECTTRACKER_STORAGE", "json")
+
+_cache = DocumentCache(ANKI_FILE, lambda: {"cards": []})
 
 
 def load_anki_data():
-    """Loads flashcard data from JSON file."""
-    if not os.path.exists(ANKI_FILE):
-        return {"cards": []}
-    try:
-        with open(ANKI_FILE, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except json.JSONDecodeError:
-        print(f"Error decoding JSON from {ANKI_FILE}. Returning empty card list.")
-        return {"cards": []}
+    """Loads flashcard data (a private copy of the cached document)."""
+    return _cache.load()
 
 
 def save_anki_data(data):
-    """Saves flashcard data to JSON file atomically."""
-    atomic_write_json(ANKI_FILE, data)
+    """Saves flashcard data atomically and makes it the cached document."""
+    _cache.store(data)
 
 
-def create_card(front, back, reverse=False):
-    """Creates a new flashcard and its reverse if specified."""
-    data = load_anki_data()
-    today = datetime.now().strftime("%Y-%m-%d")
+def data_version():
+    """Returns a token that changes whenever the data file changes (stat only, no load)."""
+    return _cache.version()
 
-    # Create main card
-    card_id = uuid.uuid4().hex
-    new_card = {
-        "id": card_id,
+
+def flush_anki_data():
+    """Writes out a save still waiting in write-behind mode (and the search index); returns once on disk."""
+    _cache.flush()
+    _save_search_index()
+
+
+def get_card_index():
+    """Returns (cached document, CardIndex) for read-only lookups."""
+    return _cache.derived('index', CardIndex)
+
+
+def get_due_queue():
+    """Returns (cached document, DueQueue) for read-only lookups."""
+    return _cache.derived('due', DueQueue)
+
+
+def card_search_fields(card):
+    return [(card.get('front'), 6), (card.get('back'), 2)]
+
+
+def _search_entries(data):
+    for card in data.get('cards', []):
+        yield 'c', card['id'], None, card_search_fields(card)
+
+
+def get_search_index():
+    """Returns (cached document, SearchIndex), loading the persisted index when it is current."""
+    return _cache.derived('search', lambda data: open_index(SEARCH_FILE, data, _search_entries))
+
+
+def _save_search_index():
+    save_index(SEARCH_FILE, _cache.cached('search'))
+
+
+atexit.register(_save_search_index)
+
+
+def search_cards(query, limit=20):
+    """Returns up to `limit` cards whose front or back match every word of `query`, best first."""
+    data, index = get_card_index()
+    _, search_index = get_search_index()
+    results = []
+    for score, _, card_id, _ in search_index.search(query, limit):
+        card = index.card(data, card_id)
+        if card is not None:
+            results.append({'score': score, 'kind': 'card', 'card_id': card_id,
+                            'front': card['front'], 'back': card['back'],
+                            'review_date': card.get('review_date')})
+    return results
+
+
+def _snapshot():
+    """Returns (cached document, generation, index) for a copy-on-write update."""
+    doc, generation = _cache.snapshot()
+    return doc, generation, get_card_index()[1]
+
+
+def new_card_record(front, back, reverse=False):
+    """Builds a fresh, due-today card dict with a new id."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    return {
+        "id": uuid.uuid4().hex,
         "front": front,
         "back": back,
         "reverse": reverse,
@@ -45,43 +107,115 @@ def create_card(front, back, reverse=False):
         "review_date": today,
         "created_date": today
     }
-    if "cards" not in data:
-        data["cards"] = []
+
+
+@_cache.writer
+def create_card(front, back, reverse=False):
+    """Creates a new flashcard and its reverse if specified."""
+    doc, generation, _ = _snapshot()
+
+    # Create main card
+    new_card = new_card_record(front, back, reverse)
+    card_id = new_card["id"]
+    data = dict(doc)
+    data["cards"] = list(doc.get("cards", []))
+    first_pos = len(data["cards"])
     data["cards"].append(new_card)
 
     # Create reverse card if requested
     if reverse:
-        reverse_id = uuid.uuid4().hex
-        reverse_card = {
-            "id": reverse_id,
-            "front": back,
-            "back": front,
-            "reverse": False,  # Don't mark the reverse card as reverse
-            "easiness_factor": 2.5,
-            "interval": 1,
-            "repetitions": 0,
-            "review_date": today,
-            "created_date": today
-        }
-        data["cards"].append(reverse_card)
-
-    save_anki_data(data)
+        # Don't mark the reverse card as reverse
+        data["cards"].append(new_card_record(back, front, reverse=False))
+
+    def index_new_cards(index):
+        for pos in range(first_pos, len(data["cards"])):
+            index.add_card(data["cards"][pos], pos)
+
+    def queue_new_cards(queue):
+        for card in data["cards"][first_pos:]:
+            queue.schedule(card["id"], card["review_date"])
+
+    def search_new_cards(search):
+        for card in data["cards"][first_pos:]:
+            search.add('c', card["id"], None, card_search_fields(card))
+
+    records = [append_item(["cards"], card) for card in data["cards"][first_pos:]]
+    _cache.append(data, records, base=generation,
+                  carry={'index': index_new_cards, 'due': queue_new_cards, 'search': search_new_cards})
     return card_id
 
 
+def card_key(front, back):
+    """Hash of a card's front and back ignoring case, spacing and Unicode form, for spotting duplicates."""
+    normalized = (" ".join(unicodedata.normalize("NFKC", text or "").split()).casefold() for text in (front, back))
+    return hashlib.sha1("\x1f".join(normalized).encode("utf-8")).hexdigest()
+
+
+@_cache.writer
+def import_cards(cards):
+    """
+    Adds many card records (see new_card_record) with a single save, plus the
+    reverse card of each one marked reverse. Cards whose id is in use or whose
+    card_key() matches an existing card or an earlier one in `cards` are skipped.
+    Returns the counts {"cards", "duplicates"}.
+    """
+    doc, generation, _ = _snapshot()
+    data = dict(doc)
+    data["cards"] = list(doc.get("cards", []))
+    first_pos = len(data["cards"])
+    seen = {card_key(card.get("front"), card.get("back")) for card in data["cards"]}
+    ids = {card["id"] for card in data["cards"]}
+    duplicates = 0
+    for card in cards:
+        key = card_key(card["front"], card["back"])
+        if key in seen or card["id"] in ids:
+            duplicates += 1
+            continue
+        seen.add(key)
+        ids.add(card["id"])
+        data["cards"].append(card)
+        reverse_key = card_key(card["back"], card["front"])
+        if card.get("reverse") and reverse_key not in seen:
+            seen.add(reverse_key)
+            data["cards"].append(new_card_record(card["back"], card["front"], reverse=False))
+    added = data["cards"][first_pos:]
+    if added:
+        def index_new_cards(index):
+            for pos in range(first_pos, len(data["cards"])):
+                index.add_card(data["cards"][pos], pos)
+
+        def queue_new_cards(queue):
+            for card in added:
+                queue.schedule(card["id"], card["review_date"])
+
+        _cache.store(data, base=generation, carry={'index': index_new_cards, 'due': queue_new_cards})
+    return {"cards": len(added), "duplicates": duplicates}
+
+
+def iter_cards():
+    """Yields every card as a private copy, one at a time."""
+    data, _ = get_card_index()
+    for card in data.get("cards", []):
+        yield copy_json(card)
+
+
 def get_card(card_id):
     """Retrieves a specific flashcard by ID."""
-    data = load_anki_data()
-    return next((card for card in data.get("cards", []) if card["id"] == card_id), None)
+    data, index = get_card_index()
+    card = index.card(data, card_id)
+    return copy_json(card) if card else None
 
 
+@_cache.writer
 def update_card(card_id, front, back, reverse=False):
     """Updates an existing flashcard."""
-    data = load_anki_data()
-    cards = data.get("cards", [])
-    card = next((c for c in cards if c["id"] == card_id), None)
+    doc, generation, index = _snapshot()
+    pos = index.card_pos(doc, card_id)
 
-    if card:
+    if pos is not None:
+        data, cards = copy_path(doc, "cards")
+        old_fields = card_search_fields(cards[pos])
+        card = cards[pos] = dict(cards[pos])
         original_back = card["back"]
         was_reverse = card.get("reverse", False)
 
@@ -91,34 +225,59 @@ def update_card(card_id, front, back, reverse=False):
         card["reverse"] = reverse
 
         # Find the potential reverse card based on the *original* content
-        reverse_card = next((
-            c for c in cards
+        reverse_pos = next((
+            i for i, c in enumerate(cards)
             if c.get("front") == original_back and c.get("back") == card["front"]
         ), None)
+        reverse_card = None if reverse_pos is None else cards[reverse_pos]
+        reindexed = [(card_id, old_fields, card)]  # (id, old fields, card or None if removed)
+        added = None
 
         # Case 1: Turning on reverse for the first time
         if reverse and not was_reverse:
             # Check if a reverse card doesn't already exist accidentally
             if not reverse_card:
-                create_card(back, front, reverse=False) # Create a new one
+                added = new_card_record(back, front, reverse=False)
+                cards.append(added)
         # Case 2: Turning off reverse
         elif not reverse and was_reverse:
             if reverse_card:
                 data["cards"] = [c for c in cards if c["id"] != reverse_card["id"]]
+                reindexed.append((reverse_card["id"], card_search_fields(reverse_card), None))
         # Case 3: Reverse was on and is still on (content changed)
         elif reverse and was_reverse:
             if reverse_card:
+                reverse_fields = card_search_fields(reverse_card)
+                reverse_card = cards[reverse_pos] = dict(reverse_card)
                 reverse_card["front"] = back
                 reverse_card["back"] = front
-
-        save_anki_data(data)
-
-
+                reindexed.append((reverse_card["id"], reverse_fields, reverse_card))
+
+        def reindex(search):
+            for cid, fields, new_card in reindexed:
+                if new_card is None:
+                    search.remove(cid, fields)
+                else:
+                    search.replace(cid, fields, card_search_fields(new_card))
+            if added is not None:
+                search.add('c', added["id"], None, card_search_fields(added))
+
+        carry = {'search': reindex}
+        # Removing a card shifts positions, so only carry the index when none was removed.
+        if data["cards"] is cards and added is None:
+            carry.update(index=None, due=None)
+        elif data["cards"] is cards:
+            carry.update(index=lambda index: index.add_card(added, len(cards) - 1),
+                         due=lambda queue: queue.schedule(added["id"], added["review_date"]))
+        _cache.store(data, base=generation, carry=carry)
+
+
+@_cache.writer
 def delete_card(card_id):
     """Deletes a flashcard and its reverse if it exists."""
-    data = load_anki_data()
-    cards = data.get("cards", [])
-    card_to_delete = next((c for c in cards if c["id"] == card_id), None)
+    doc, generation, index = _snapshot()
+    cards = doc.get("cards", [])
+    card_to_delete = index.card(doc, card_id)
 
     if not card_to_delete:
         return
@@ -135,48 +294,174 @@ def delete_card(card_id):
             ids_to_remove.add(reverse_card["id"])
 
     # Filter the card list in one go
+    data = dict(doc)
     data["cards"] = [c for c in cards if c["id"] not in ids_to_remove]
-    save_anki_data(data)
+    removed = [c for c in cards if c["id"] in ids_to_remove]
+
+    def unindex(search):
+        for card in removed:
+            search.remove(card["id"], card_search_fields(card))
+
+    _cache.append(data, [remove_item(["cards"], cid) for cid in ids_to_remove], base=generation,
+                  carry={'search': unindex})
 
 
-def get_due_cards():
-    """Returns all cards due for review."""
-    data = load_anki_data()
+def get_due_cards(limit=None):
+    """Returns cards due for review (at most `limit`), most overdue first."""
+    data, index = get_card_index()
+    _, queue = get_due_queue()
     today = datetime.now().strftime("%Y-%m-%d")
 
-    due_cards = [card for card in data.get("cards", [])
-                 if card.get("review_date", "9999-12-31") <= today]
+    due_cards = [index.card(data, card_id) for card_id in islice(queue.due_ids(today), limit)]
+    return [copy_json(card) for card in due_cards if card]
 
-    return due_cards
 
+def card_sort_key(sort_by):
+    """Unique sort key for paging cards: by review date then id, or by id alone."""
+    if sort_by == 'review_date':
+        return lambda c: (c.get('review_date') or '9999-12-31', c['id'])
+    return lambda c: (c['id'],)
 
+
+def get_cards_page(sort_by='review_date', after=None, limit=100):
+    """Returns (cards, next cursor or None), copying only the cards on the page."""
+    cards = _cache.peek().get('cards', [])
+    page, cursor = paginate(cards, card_sort_key(sort_by), after, limit)
+    return [copy_json(card) for card in page], cursor
+
+
+def get_next_due_card():
+    """Returns (most overdue due card or None, number of cards due today) without a scan."""
+    data, index = get_card_index()
+    _, queue = get_due_queue()
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    card_id = queue.next_due(today)
+    card = index.card(data, card_id) if card_id else None
+    return (copy_json(card) if card else None), queue.due_count(today)
+
+
+def apply_sm2(card, rating, reviewed_at=None):
+    """Applies one SM2 review with `rating` (0-5) to the card dict in place.
+
+    The next review date counts from `reviewed_at` (a datetime), defaulting to now.
+    """
+    rating = int(rating)
+    if rating < 3:
+        card["repetitions"] = 0
+        card["interval"] = 1
+    else:
+        if card.get("repetitions", 0) == 0:
+            card["interval"] = 1
+        elif card["repetitions"] == 1:
+            card["interval"] = 6
+        else:
+            card["interval"] = round(card.get("interval", 1) * card.get("easiness_factor", 2.5))
+        card["repetitions"] = card.get("repetitions", 0) + 1
+
+    # Update easiness factor
+    easiness = card.get("easiness_factor", 2.5)
+    new_easiness = easiness + (0.1 - (5 - rating) * (0.08 + (5 - rating) * 0.02))
+    card["easiness_factor"] = max(1.3, new_easiness)
+
+    # Calculate next review date
+    next_date = (reviewed_at or datetime.now()) + timedelta(days=card.get("interval", 1))
+    card["review_date"] = next_date.strftime("%Y-%m-%d")
+
+
+@_cache.writer
 def process_card_review(card_id, rating):
     """Processes a card review using the SM2 algorithm."""
-    data = load_anki_data()
-    card = next((card for card in data.get("cards", []) if card["id"] == card_id), None)
-
-    if card:
-        rating = int(rating)
-        # Apply SM2 algorithm
-        if rating < 3:
-            card["repetitions"] = 0
-            card["interval"] = 1
+    doc, generation, index = _snapshot()
+    pos = index.card_pos(doc, card_id)
+
+    if pos is not None:
+        data, card = copy_path(doc, "cards", pos)
+        apply_sm2(card, rating)
+        fields = {k: card[k] for k in ("repetitions", "interval", "easiness_factor", "review_date")}
+        _cache.append(data, [set_fields(["cards", {"id": card_id}], fields)], base=generation,
+                      carry={'index': None, 'search': None,
+                             'due': lambda queue: queue.schedule(card_id, card["review_date"])})
+
+
+def parse_reviews(reviews):
+    """
+    Validates a batch of reviews before anything is applied.
+
+    Each entry is {"card_id", "rating", "reviewed_at"} or a [card_id, rating, reviewed_at]
+    triple; reviewed_at is an optional ISO 8601 timestamp. Returns a list of
+    (card_id, rating, reviewed_at datetime or None) and raises ValueError on bad input.
+    """
+    parsed = []
+    for entry in reviews:
+        if isinstance(entry, dict):
+            card_id, rating, reviewed_at = entry.get("card_id"), entry.get("rating"), entry.get("reviewed_at")
+        elif isinstance(entry, (list, tuple)) and len(entry) in (2, 3):
+            card_id, rating, reviewed_at = (list(entry) + [None])[:3]
         else:
-            if card.get("repetitions", 0) == 0:
-                card["interval"] = 1
-            elif card["repetitions"] == 1:
-                card["interval"] = 6
-            else:
-                card["interval"] = round(card.get("interval", 1) * card.get("easiness_factor", 2.5))
-            card["repetitions"] = card.get("repetitions", 0) + 1
-
-        # Update easiness factor
-        easiness = card.get("easiness_factor", 2.5)
-        new_easiness = easiness + (0.1 - (5 - rating) * (0.08 + (5 - rating) * 0.02))
-        card["easiness_factor"] = max(1.3, new_easiness)
-
-        # Calculate next review date
-        next_date = datetime.now() + timedelta(days=card.get("interval", 1))
-        card["review_date"] = next_date.strftime("%Y-%m-%d")
-
-        save_anki_data(data)
+            raise ValueError(f"Malformed review entry: {entry!r}")
+        if not isinstance(card_id, str) or not card_id:
+            raise ValueError(f"Missing card_id in review entry: {entry!r}")
+        try:
+            rating = int(rating)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid rating in review entry: {entry!r}")
+        if not 0 <= rating <= 5:
+            raise ValueError(f"Rating out of range in review entry: {entry!r}")
+        if reviewed_at:
+            if not isinstance(reviewed_at, str):
+                raise ValueError(f"Invalid reviewed_at in review entry: {entry!r}")
+            # Timestamps from the browser arrive in UTC; convert to local wall-clock time.
+            reviewed_at = datetime.fromisoformat(reviewed_at)
+            if reviewed_at.tzinfo is not None:
+                reviewed_at = reviewed_at.astimezone().replace(tzinfo=None)
+        parsed.append((card_id, rating, reviewed_at or None))
+    return parsed
+
+
+@_cache.writer
+def process_card_reviews(reviews):
+    """
+    Applies a batch of reviews (see parse_reviews) with one load/save cycle.
+
+    Reviews are applied in order, so a card rated twice ends up with both updates.
+    Unknown card ids are skipped. Returns the number of reviews applied.
+    """
+    parsed = parse_reviews(reviews)
+    doc, generation, index = _snapshot()
+    data, cards = copy_path(doc, "cards")
+    copied = set()
+    touched = {}
+    for card_id, rating, reviewed_at in parsed:
+        pos = index.card_pos(doc, card_id)
+        if pos is None:
+            continue
+        if pos not in copied:
+            cards[pos] = dict(cards[pos])
+            copied.add(pos)
+        apply_sm2(cards[pos], rating, reviewed_at)
+        touched[card_id] = cards[pos]
+
+    if not touched:
+        return 0
+
+    def reschedule(queue):
+        for card_id, card in touched.items():
+            queue.schedule(card_id, card["review_date"])
+
+    records = [
+        set_fields(["cards", {"id": card_id}],
+                   {k: card[k] for k in ("repetitions", "interval", "easiness_factor", "review_date")})
+        for card_id, card in touched.items()
+    ]
+    _cache.append(data, records, base=generation, carry={'index': None, 'due': reschedule, 'search': None})
+    return sum(1 for card_id, _, _ in parsed if card_id in touched)
+
+
+# --- Optional SQLite backend: same functions, different storage ---
+if STORAGE_BACKEND == "sqlite":
+    from .sqlite_store import (  # noqa: E402,F811
+        load_anki_data, save_anki_data, create_card, get_card, update_card, delete_card,
+        get_due_cards, get_cards_page, get_next_due_card, process_card_review, process_card_reviews,
+        data_version, flush_anki_data, search_cards, iter_cards, import_cards
+    )
@@ -0,0 +1,133 @@
+"""
+Vectorized SM2 scheduling and review-workload simulation for the whole deck.
+
+The deck is held as columns (easiness_factor, interval, repetitions and review_date
+as day ordinals) so one SM2 step updates every reviewed card at once. The update is
+written to produce exactly what anki.apply_sm2 produces card by card, including
+round-half-to-even on the interval.
+
+Needs NumPy, which the rest of the app does not:
+
+    python -m pip install numpy
+    python -m src.anki_sim --days 30      # project the daily review load from anki.json
+"""
+import argparse
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed here
+    np = None
+
+# Cards without a review_date are never due (anki treats them as due on 9999-12-31).
+NEVER = date(9999, 12, 31).toordinal()
+
+# Default chance of each rating 0-5 when simulating future reviews.
+DEFAULT_RATING_WEIGHTS = (0.04, 0.04, 0.07, 0.30, 0.35, 0.20)
+
+# Easiness change for each rating 0-5, computed the way apply_sm2 computes it.
+EASINESS_CHANGE = [0.1 - (5 - rating) * (0.08 + (5 - rating) * 0.02) for rating in range(6)]
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The deck simulator needs NumPy: python -m pip install numpy")
+
+
+def deck_columns(cards):
+    """Converts card dicts into a dict of NumPy columns, in card order."""
+    _require_numpy()
+    # A deck has few distinct review dates, so each one is parsed once.
+    review_dates = [c.get("review_date") for c in cards]
+    days = {text: date.fromisoformat(text).toordinal() if text else NEVER for text in set(review_dates)}
+    return {
+        "easiness_factor": np.array([c.get("easiness_factor", 2.5) for c in cards], dtype=np.float64),
+        "interval": np.array([c.get("interval", 1) for c in cards], dtype=np.int64),
+        "repetitions": np.array([c.get("repetitions", 0) for c in cards], dtype=np.int64),
+        "review_day": np.fromiter(map(days.__getitem__, review_dates), dtype=np.int64, count=len(review_dates)),
+    }
+
+
+def sm2_step(deck, selected, ratings, day):
+    """
+    Applies one SM2 review to the selected cards, in place.
+
+    Args:
+        deck:     Columns from deck_columns().
+        selected: Boolean mask or integer index array picking the reviewed cards.
+        ratings:  Integer ratings (0-5) for the selected cards, in deck order.
+        day:      Day ordinal the reviews happen on.
+    """
+    ef = deck["easiness_factor"][selected]
+    reps = deck["repetitions"][selected]
+    ratings = np.asarray(ratings, dtype=np.int64)
+    failed = ratings < 3
+
+    # rint rounds half to even, matching round() in apply_sm2; the interval uses
+    # the easiness from before this review, as apply_sm2 does.
+    interval = np.rint(deck["interval"][selected] * ef).astype(np.int64)
+    interval = np.where(failed | (reps == 0), 1, np.where(reps == 1, 6, interval))
+    reps = np.where(failed, 0, reps + 1)
+    ef = np.maximum(ef + np.take(EASINESS_CHANGE, ratings), 1.3)
+
+    deck["easiness_factor"][selected] = ef
+    deck["interval"][selected] = interval
+    deck["repetitions"][selected] = reps
+    deck["review_day"][selected] = day + interval
+
+
+def simulate_workload(cards, days, start=None, rating_weights=DEFAULT_RATING_WEIGHTS,
+                      new_cards_per_day=0, seed=0):
+    """
+    Projects how many reviews fall due on each of the next `days` days.
+
+    Every due card (overdue ones included) is reviewed on the day it is due with a
+    rating drawn from `rating_weights`; `new_cards_per_day` fresh cards are added
+    each day. Returns a list of (date, reviews due) pairs.
+    """
+    _require_numpy()
+    start = start or date.today()
+    first, end = start.toordinal(), start.toordinal() + days
+    rng = np.random.default_rng(seed)
+    # The same draws rng.choice(6, p=weights) makes, without its per-call checks.
+    cdf = np.cumsum(rating_weights, dtype=np.float64)
+    cdf /= cdf[-1]
+    deck = deck_columns(cards)
+
+    # Cards not due before the end never change the projection, so only the rest
+    # are simulated.
+    live = deck["review_day"] < end
+    deck = {name: column[live] for name, column in deck.items()}
+
+    workload = []
+    for offset in range(days):
+        day = first + offset
+        if new_cards_per_day:
+            for name, value in (("easiness_factor", 2.5), ("interval", 1), ("repetitions", 0), ("review_day", day)):
+                deck[name] = np.concatenate([deck[name], np.full(new_cards_per_day, value, dtype=deck[name].dtype)])
+        due = np.flatnonzero(deck["review_day"] <= day)
+        if len(due):
+            sm2_step(deck, due, cdf.searchsorted(rng.random(len(due)), side="right"), day)
+        workload.append((start + timedelta(days=offset), len(due)))
+    return workload
+
+
+def main(argv=None):
+    from .anki import load_anki_data
+
+    parser = argparse.ArgumentParser(description="Project the daily Anki review load from anki.json.")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--new-per-day", type=int, default=0, help="new cards added each day")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    cards = load_anki_data().get("cards", [])
+    workload = simulate_workload(cards, args.days, new_cards_per_day=args.new_per_day, seed=args.seed)
+    for day, count in workload:
+        print(f"{day.isoformat()}  {count:6d}")
+    total = sum(count for _, count in workload)
+    print(f"total {total} reviews over {args.days} days, {total / max(args.days, 1):.1f}/day on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
-from flask import Flask, render_template, request, redirect, url_for, abort
+from flask import (Flask, render_template, stream_template, request, redirect, url_for, abort, jsonify,
+                   make_response, session)
+import csv
+import functools
+import hashlib
+import importlib.util
+import io
+import json
 import os
+import queue
+import signal
 import sys
+import uuid
 from operator import itemgetter
 from datetime import datetime, timedelta
 
@@ -12,30 +22,34 @@ if __package__ is None and __name__ == "__main__":
 # ---- absolute imports so PyInstaller won't choke ----
 from src.data_handler import (
     get_project, get_projects_by_category, create_project, update_project,
-    create_task, update_task, get_all_tasks, add_project_update, delete_project_update,
-    load_data
+    create_task, update_task, get_tasks_page, add_project_update, delete_project_update,
+    get_completion_counts, data_version, flush_data, search, get_index, DATA_DIR, STORAGE_BACKEND
 )
+import src.bulk as bulk
 import src.utils as utils
-
-# --- Anki Imports (optional module) ---
-try:
-    from src.anki import (
-        load_anki_data, save_anki_data, create_card, get_card, update_card,
-        delete_card, get_due_cards, process_card_review
-    )
-    anki_enabled = True
-except ImportError:
+import src.instrument as instrument
+from src.page_cache import PageCache
+from src.static_assets import IMMUTABLE, StaticAssets, choose_encoding, compress, compressible
+from src.template_cache import bytecode_cache
+from src.watcher import Watcher, diff_cards, diff_projects
+
+# --- Anki (optional module) ---
+# Imported by the first view that needs it rather than here, so starting the
+# backend doesn't pay for it.
+anki_enabled = importlib.util.find_spec("src.anki") is not None
+if not anki_enabled:
     print("WARNING: Anki module not found. Anki features will be disabled.")
-    anki_enabled = False
-    def load_anki_data(): return {"cards": []}
-    def save_anki_data(data): pass
-    def create_card(f, b, r): pass
-    def get_card(id): return None
-    def update_card(id, f, b, r): pass
-    def delete_card(id): pass
-    def get_due_cards(): return []
-    def process_card_review(id, r): pass
-# --- End Anki Imports ---
+
+
+def anki():
+    """The src.anki module, imported on first use."""
+    import src.anki
+    return src.anki
+
+
+def anki_data_version():
+    return anki().data_version() if anki_enabled else None
+# --- End Anki ---
 
 # In a PyInstaller EXE, assets are unpacked to sys._MEIPASS.
 # In dev, our templates/static live in the PROJECT ROOT (parent of /src).
@@ -49,14 +63,135 @@ app = Flask(
     template_folder=os.path.join(base_dir, "templates"),
     static_folder=os.path.join(base_dir, "static"),
 )
+# Compiled templates persist across starts; see src/template_cache.py.
+app.jinja_options = {**app.jinja_options, "bytecode_cache": bytecode_cache(DATA_DIR, app.template_folder)}
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "your_default_secret_key")
 STATIC_FOLDER = app.static_folder
+assets = StaticAssets(STATIC_FOLDER)
+instrument.init_app(app)
+
+# Compress large page and API responses for clients that accept it (off with PROJECTTRACKER_COMPRESS=0).
+COMPRESS_PAGES = os.environ.get("PROJECTTRACKER_COMPRESS", "1") != "0"
+
+
+# Rows per page on /tasks and /anki/manage; ?limit= can ask for up to MAX_PAGE_SIZE.
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Results on /search; ranked, so the first few are the ones that matter.
+SEARCH_LIMIT = 50
 
 
 @app.context_processor
 def inject_css_and_static_folder():
     """Inject CSS file list and STATIC_FOLDER into templates."""
-    return {**utils.inject_css_files(STATIC_FOLDER), 'STATIC_FOLDER': STATIC_FOLDER}
+    return {**utils.inject_css_files(assets), 'STATIC_FOLDER': STATIC_FOLDER}
+
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    """Adds ?v=<content hash> to url_for('static', ...), so the file can be cached for good."""
+    if endpoint == 'static' and 'v' not in values:
+        asset = assets.get(values.get('filename'))
+        if asset is not None:
+            values['v'] = asset.digest
+
+
+def serve_static(filename):
+    """Static files from memory, precompressed when the client accepts it; replaces Flask's view."""
+    asset = assets.get(filename)
+    if asset is None:
+        return app.send_static_file(filename)
+    encoding = choose_encoding(request, asset.variants)
+    response = app.response_class(asset.variants[encoding] if encoding else asset.body, mimetype=asset.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{asset.digest}-{encoding}" if encoding else asset.digest)
+    response.headers['Cache-Control'] = IMMUTABLE if request.args.get('v') == asset.digest else 'no-cache'
+    return response.make_conditional(request)
+
+
+app.view_functions['static'] = serve_static
+
+
+def page_args():
+    """Returns (cursor, page size, stream) from ?after=, ?limit= and ?stream=1."""
+    try:
+        limit = int(request.args.get('limit', PAGE_SIZE))
+    except ValueError:
+        limit = PAGE_SIZE
+    return request.args.get('after'), max(1, min(limit, MAX_PAGE_SIZE)), request.args.get('stream') == '1'
+
+
+def render_page(stream, template, **context):
+    """Renders a template, or streams it chunk by chunk so the first rows paint early."""
+    if stream:
+        return stream_template(template, **context)
+    return render_template(template, **context)
+
+
+# --- Conditional GET ---
+
+# New on every start, so responses cached against an older build are never reused.
+BOOT_ID = uuid.uuid4().hex
+
+# Rendered bodies of the conditional views, keyed by ETag.
+page_cache = PageCache()
+
+# Version tokens of the data files a view reads; each is a stat or counter read, never a load.
+DATA_VERSIONS = {'projects': data_version, 'anki': anki_data_version}
+
+
+def request_etag(sources):
+    """Strong ETag for this request: the data versions it reads plus what else shapes the page."""
+    key = repr((BOOT_ID, datetime.today().date().isoformat(), request.path, sorted(request.args.items(multi=True)),
+                session.get('current_style'), [DATA_VERSIONS[name]() for name in sources]))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def conditional(*sources):
+    """
+    Decorator for read-only views: answers If-None-Match with 304 before the view runs.
+
+    The ETag is taken before the view reads anything, so if the data changes while
+    the page is built the page simply carries an older tag and the next request
+    misses and refetches. A stale page is never labelled as current. The rendered
+    body is kept in page_cache under the same tag, so a repeat view of an unchanged
+    page skips loading and rendering even without If-None-Match.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = request_etag(sources)
+            encoding = choose_encoding(request) if COMPRESS_PAGES else None
+            if request.if_none_match.contains(etag) or request.if_none_match.contains(f"{etag}-{encoding}"):
+                response = app.response_class(status=304)
+            else:
+                cached = page_cache.get((etag, encoding))
+                if cached is not None:
+                    response = app.response_class(cached[0], content_type=cached[1])
+                    if cached[2]:
+                        response.headers['Content-Encoding'] = cached[2]
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if not response.is_streamed:
+                        body = response.get_data()
+                        if encoding and compressible(response.mimetype, len(body)):
+                            body = compress(body, encoding)
+                            response.set_data(body)
+                            response.headers['Content-Encoding'] = encoding
+                        page_cache.put((etag, encoding), body, response.content_type,
+                                       response.headers.get('Content-Encoding'))
+            if 'Content-Encoding' in response.headers:
+                etag = f"{etag}-{response.headers['Content-Encoding']}"
+            response.set_etag(etag)
+            response.vary.add('Accept-Encoding')
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
 
 
 @app.route("/__health")
@@ -64,9 +199,91 @@ def health():
     return "ok"
 
 
+@app.route("/__flush", methods=['POST'])
+def flush():
+    """Writes out saves still pending in write-behind mode; Electron calls this before quitting."""
+    flush_data()
+    if "src.anki" in sys.modules:  # never imported: nothing to flush
+        anki().flush_anki_data()
+    return "ok"
+
+
+@app.route("/__page_cache")
+def page_cache_stats():
+    """Size and hit/miss counters of the rendered-page cache; ?reset=1 empties it."""
+    stats = page_cache.stats()
+    if request.args.get("reset") == "1":
+        page_cache.clear()
+    return jsonify(stats)
+
+
+# --- Live updates ---
+
+# Worker threads of the waitress pool (see serve()).
+THREADS = int(os.environ.get("PROJECTTRACKER_THREADS", 8))
+# Each open event stream keeps a worker thread, so at most this many run at once
+# (default: half the pool); a new one ends the oldest, which is usually a page
+# already left behind, and a page still open simply reconnects.
+EVENT_STREAMS = int(os.environ.get("PROJECTTRACKER_EVENT_STREAMS", max(1, THREADS // 2)))
+# Seconds between keep-alive comments on an idle event stream.
+EVENTS_HEARTBEAT = 15
+# Seconds between checks that the client is still there, where the server can tell
+# (waitress); elsewhere a closed window is noticed on the next write.
+EVENTS_POLL = 1
+
+
+def project_snapshot():
+    return get_index()[0] if STORAGE_BACKEND == "json" else None
+
+
+def card_snapshot():
+    return anki().get_card_index()[0] if STORAGE_BACKEND == "json" else None
+
+
+watch_sources = {'projects': (data_version, project_snapshot, diff_projects)}
+if anki_enabled:
+    watch_sources['anki'] = (anki_data_version, card_snapshot, diff_cards)
+watcher = Watcher(DATA_DIR, watch_sources, max_subscribers=EVENT_STREAMS)
+
+
+@app.route("/events")
+def events():
+    """
+    Server-Sent Events: a `change` event with the changed ids whenever the data
+    files change, whoever changed them (see src/watcher.py). static/live.js
+    listens and refreshes the parts of the page that show those records.
+    """
+    changes = watcher.subscribe()
+    disconnected = request.environ.get("waitress.client_disconnected")
+
+    def stream():
+        try:
+            yield "retry: 2000\n\n"
+            idle = 0
+            while True:
+                try:
+                    change = changes.get(timeout=EVENTS_POLL if disconnected else EVENTS_HEARTBEAT)
+                except queue.Empty:
+                    if disconnected and disconnected():
+                        return
+                    idle += EVENTS_POLL if disconnected else EVENTS_HEARTBEAT
+                    if idle >= EVENTS_HEARTBEAT:
+                        idle = 0
+                        yield ": keep-alive\n\n"
+                    continue
+                if change is None:  # ended to make room for a newer stream
+                    return
+                idle = 0
+                yield f"event: change\ndata: {json.dumps(change)}\n\n"
+        finally:
+            watcher.unsubscribe(changes)
+
+    return app.response_class(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
 @app.route('/set_style', methods=['POST'])
 def set_style_route():
-    utils.set_style(request, STATIC_FOLDER)
+    utils.set_style(request, assets)
     return redirect(request.referrer)
 
 # --- Project Management Routes ---
@@ -84,32 +301,37 @@ def add_project():
     return render_template("add_project.html")
 
 
-@app.route("/project/<project_id>")
-def view_project(project_id):
+def project_with_tasks(project_id, sort_by, order, selected_task_statuses):
+    """
+    Returns (project, task statuses shown) with the project's tasks filtered and
+    sorted the way the project page shows them; project is None if it doesn't exist.
+    """
     project = get_project(project_id, task_status='active')
     if not project:
-        abort(404)
+        return None, selected_task_statuses
 
-    sort_by = request.args.get('sort_by', 'due_date')
-    order = request.args.get('order', 'asc')
-    selected_task_statuses = request.args.getlist('task_status')
+    if selected_task_statuses:
+        project['tasks'] = [t for t in get_project(project_id)['tasks'] if t['status'] in selected_task_statuses]
+    else:
+        selected_task_statuses = ['active']
 
     if sort_by == 'due_date':
         project['tasks'].sort(
             key=lambda x: x.get('target_completion_date', '') or '9999-12-31',
             reverse=(order == 'desc')
         )
+    return project, selected_task_statuses
 
-    if selected_task_statuses:
-        all_project_tasks = get_project(project_id)['tasks']
-        project['tasks'] = [t for t in all_project_tasks if t['status'] in selected_task_statuses]
-        if sort_by == 'due_date':
-            project['tasks'].sort(
-                key=lambda x: x.get('target_completion_date', '') or '9999-12-31',
-                reverse=(order == 'desc')
-            )
-    else:
-        selected_task_statuses = ['active']
+
+@app.route("/project/<project_id>")
+@conditional('projects')
+def view_project(project_id):
+    sort_by = request.args.get('sort_by', 'due_date')
+    order = request.args.get('order', 'asc')
+    project, selected_task_statuses = project_with_tasks(project_id, sort_by, order,
+                                                         request.args.getlist('task_status'))
+    if not project:
+        abort(404)
 
     return render_template(
         "project_detail.html",
@@ -139,18 +361,12 @@ def add_task(project_id):
     return redirect(url_for("view_project", project_id=project_id))
 
 
-@app.route("/", defaults={"category": "active"})
-@app.route("/projects", defaults={"category": "active"})
-@app.route("/projects/<category>")
-def list_projects_by_category(category):
-    valid_categories = ["active", "on hold", "complete", "archived", "ongoing"]
-    if category not in valid_categories:
-        return redirect(url_for("list_projects_by_category", category="active"))
+VALID_CATEGORIES = ["active", "on hold", "complete", "archived", "ongoing"]
 
-    projects = get_projects_by_category(category)
 
-    sort_by = request.args.get('sort_by', 'next_task_due_date')
-    sort_order = request.args.get('order', 'asc')
+def sorted_projects(category, sort_by, sort_order):
+    """Projects in `category`, sorted the way the project list shows them."""
+    projects = get_projects_by_category(category)
 
     if sort_by == 'start_date':
         projects.sort(key=itemgetter('start_date'), reverse=(sort_order == 'desc'))
@@ -158,14 +374,30 @@ def list_projects_by_category(category):
         projects.sort(key=lambda p: p.get('target_completion_date') or '9999-12-31',
                       reverse=(sort_order == 'desc'))
     elif sort_by == 'next_task_due_date':
-        projects.sort(key=lambda p: p.get('next_task_due_date', '9999-12-31'),
-                      reverse=(sort_order == 'desc'))
+        projects.sort(key=itemgetter('next_task_due_date'), reverse=(sort_order == 'desc'))
+    elif sort_by == 'last_update':
+        # Projects without updates sort as the oldest.
+        projects.sort(key=lambda p: p['last_update'] or '', reverse=(sort_order == 'desc'))
+    return projects
+
+
+@app.route("/", defaults={"category": "active"})
+@app.route("/projects", defaults={"category": "active"})
+@app.route("/projects/<category>")
+@conditional('projects')
+def list_projects_by_category(category):
+    if category not in VALID_CATEGORIES:
+        return redirect(url_for("list_projects_by_category", category="active"))
+
+    sort_by = request.args.get('sort_by', 'next_task_due_date')
+    sort_order = request.args.get('order', 'asc')
+    projects = sorted_projects(category, sort_by, sort_order)
 
     return render_template(
         "projects.html",
         projects=projects,
         current_category=category,
-        categories=valid_categories,
+        categories=VALID_CATEGORIES,
         sort_by=sort_by,
         sort_order=sort_order
     )
@@ -237,17 +469,26 @@ def edit_task(project_id, task_id):
     return render_template("edit_task.html", project_id=project_id, task=task)
 
 
+def task_filter_args():
+    """Returns (sort_by, order, project statuses, task statuses) for the all-tasks views."""
+    return (request.args.get('sort_by', 'due_date'),
+            request.args.get('order', 'asc'),
+            request.args.getlist('project_status') or ['active', 'ongoing'],
+            request.args.getlist('task_status') or ['active'])
+
+
 @app.route('/tasks')
+@conditional('projects')
 def list_all_tasks():
-    sort_by = request.args.get('sort_by', 'due_date')
-    order = request.args.get('order', 'asc')
-    selected_project_statuses = request.args.getlist('project_status') or ['active', 'ongoing']
-    selected_task_statuses = request.args.getlist('task_status') or ['active']
+    sort_by, order, selected_project_statuses, selected_task_statuses = task_filter_args()
+    after, limit, stream = page_args()
 
-    tasks = get_all_tasks(sort_by, order, selected_project_statuses, selected_task_statuses)
-    return render_template('tasks.html', tasks=tasks, sort_by=sort_by, order=order,
-                           selected_project_statuses=selected_project_statuses,
-                           selected_task_statuses=selected_task_statuses)
+    tasks, next_cursor = get_tasks_page(sort_by, order, selected_project_statuses,
+                                        selected_task_statuses, after, limit)
+    return render_page(stream, 'tasks.html', tasks=tasks, sort_by=sort_by, order=order,
+                       selected_project_statuses=selected_project_statuses,
+                       selected_task_statuses=selected_task_statuses,
+                       after=after, next_cursor=next_cursor, limit=limit)
 
 
 @app.route("/project/<project_id>/add_update", methods=["POST"])
@@ -270,70 +511,200 @@ def delete_update(project_id, update_id):
     return redirect(url_for("edit_project", project_id=project_id))
 
 
+# The calendar shows 53 full weeks ending today.
+CALENDAR_DAYS = 53 * 7
+
+
 @app.route("/calendar")
+@conditional('projects')
 def productivity_calendar():
+    today = datetime.today().date()
+    start_date = today - timedelta(days=CALENDAR_DAYS - 1)
+    calendar_dates = [start_date + timedelta(days=i) for i in range(CALENDAR_DAYS)]
     try:
-        data = load_data()
-        completion_dates = []
-        for project in data.get('projects', []):
-            if project.get('actual_completion_date'):
-                completion_dates.append(project['actual_completion_date'])
-            for task in project.get('tasks', []):
-                if task.get('actual_completion_date'):
-                    completion_dates.append(task['actual_completion_date'])
-
-        date_counts = {}
-        for date_str in completion_dates:
-            try:
-                date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                date_counts[date] = date_counts.get(date, 0) + 1
-            except (ValueError, TypeError):
-                continue
-
-        today = datetime.today().date()
-        total_days = 53 * 7
-        start_date = today - timedelta(days=total_days - 1)
-        calendar_dates = [start_date + timedelta(days=i) for i in range(total_days)]
-        if not calendar_dates:
-            calendar_dates = [today]
+        counts = get_completion_counts(start_date, today)
+        date_counts = {datetime.strptime(day, '%Y-%m-%d').date(): count for day, count in counts.items()}
     except Exception as e:
         print(f"Error generating calendar data: {e}")
         date_counts = {}
-        today = datetime.today().date()
-        total_days = 53 * 7
-        start_date = today - timedelta(days=total_days - 1)
-        calendar_dates = [start_date + timedelta(days=i) for i in range(total_days)]
 
     return render_template("calendar.html", date_counts=date_counts,
                            calendar_dates=calendar_dates, today=today)
 
 
+def search_results(query, limit):
+    """Projects, tasks, updates and cards matching `query`, merged best first."""
+    if not query.strip():
+        return []
+    results = search(query, limit) + (anki().search_cards(query, limit) if anki_enabled else [])
+    results.sort(key=itemgetter('score'), reverse=True)
+    return results[:limit]
+
+
+@app.route("/search")
+@conditional('projects', 'anki')
+def search_page():
+    query = request.args.get('q', '')
+    _, limit, _ = page_args()
+    return render_template("search.html", query=query, results=search_results(query, min(limit, SEARCH_LIMIT)),
+                           anki_enabled=anki_enabled)
+
+
+# --- Read-only JSON API (same data and ordering as the pages above) ---
+
+@app.route("/api/projects", defaults={"category": "active"})
+@app.route("/api/projects/<category>")
+@conditional('projects')
+def api_projects(category):
+    if category not in VALID_CATEGORIES:
+        abort(404)
+    projects = sorted_projects(category, request.args.get('sort_by', 'next_task_due_date'),
+                               request.args.get('order', 'asc'))
+    return jsonify({"category": category, "projects": projects})
+
+
+@app.route("/api/project/<project_id>")
+@conditional('projects')
+def api_project(project_id):
+    project, selected_task_statuses = project_with_tasks(
+        project_id, request.args.get('sort_by', 'due_date'), request.args.get('order', 'asc'),
+        request.args.getlist('task_status'))
+    if not project:
+        abort(404)
+    return jsonify({"project": project, "task_statuses": selected_task_statuses})
+
+
+@app.route("/api/tasks")
+@conditional('projects')
+def api_tasks():
+    sort_by, order, selected_project_statuses, selected_task_statuses = task_filter_args()
+    after, limit, _ = page_args()
+    tasks, next_cursor = get_tasks_page(sort_by, order, selected_project_statuses,
+                                        selected_task_statuses, after, limit)
+    return jsonify({"tasks": tasks, "next": next_cursor})
+
+
+@app.route("/api/calendar")
+@conditional('projects')
+def api_calendar():
+    """Completions per day; ?start=&end= (YYYY-MM-DD) default to the calendar's 53 weeks."""
+    today = datetime.today().date()
+    start = request.args.get('start') or (today - timedelta(days=CALENDAR_DAYS - 1)).isoformat()
+    end = request.args.get('end') or today.isoformat()
+    try:
+        datetime.strptime(start, '%Y-%m-%d')
+        datetime.strptime(end, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD"}), 400
+    counts = get_completion_counts(start, end, project_id=request.args.get('project_id'),
+                                   by_project=request.args.get('by_project') == '1')
+    return jsonify({"start": start, "end": end, "counts": counts})
+
+
+@app.route("/api/search")
+@conditional('projects', 'anki')
+def api_search():
+    """Search results for ?q=; ?limit= caps them (default and maximum SEARCH_LIMIT)."""
+    query = request.args.get('q', '')
+    _, limit, _ = page_args()
+    return jsonify({"query": query, "results": search_results(query, min(limit, SEARCH_LIMIT))})
+
+
+# --- Bulk export / import (see bulk.py) ---
+def bulk_kind(kind):
+    if kind not in bulk.KINDS or (kind == "cards" and not anki_enabled):
+        abort(404)
+
+
+@app.route("/export/<kind>.<fmt>")
+def export_records(kind, fmt):
+    """Streams every project, task or card as NDJSON or CSV."""
+    bulk_kind(kind)
+    if fmt not in bulk.FORMATS:
+        abort(404)
+    return app.response_class(bulk.export_lines(kind, fmt), mimetype=bulk.MIMETYPES[fmt],
+                              headers={"Content-Disposition": f'attachment; filename="{kind}.{fmt}"'})
+
+
+@app.route("/import/<kind>", methods=["POST"])
+def import_records(kind):
+    """
+    Imports an uploaded `file` (or the raw request body) of NDJSON or CSV rows;
+    ?format= overrides the file extension, ?batch=N saves every N rows and
+    ?dry_run=1 only validates. Returns the import report as JSON.
+    """
+    bulk_kind(kind)
+    # Touching request.files on any other body would parse it as a form and use it up.
+    upload = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+    fmt = request.args.get("format") or bulk.guess_format(upload.filename if upload else None)
+    if fmt not in bulk.FORMATS:
+        return jsonify(error=f"format must be one of {', '.join(bulk.FORMATS)}"), 400
+    stream = io.TextIOWrapper(upload.stream if upload else request.stream, encoding="utf-8-sig", newline="")
+    try:
+        report = bulk.import_rows(kind, stream, fmt, batch_size=request.args.get("batch", 0, type=int),
+                                  dry_run=request.args.get("dry_run") == "1")
+    except (UnicodeDecodeError, csv.Error) as e:
+        return jsonify(error=f"Could not read the file: {e}"), 400
+    return jsonify(report)
+
+
 # --- Anki Routes ---
 if anki_enabled:
+    # Cards handed to the browser per page in batch review mode.
+    ANKI_BATCH_SIZE = 50
+
     @app.route("/anki")
+    @conditional('anki')
     def anki_review():
+        batch = request.args.get("batch") == "1"
         try:
-            due_cards = get_due_cards()
-            return render_template("anki.html", due_cards=due_cards)
+            card, remaining = anki().get_next_due_card()
+            batch_cards = anki().get_due_cards(limit=ANKI_BATCH_SIZE) if batch else []
+            return render_template("anki.html", card=card, remaining=remaining,
+                                   batch=batch, batch_cards=batch_cards)
         except Exception as e:
             print(f"Error getting due Anki cards: {e}")
-            return render_template("anki.html", due_cards=[], error="Could not load due cards.")
+            return render_template("anki.html", card=None, remaining=0, batch=batch, batch_cards=[],
+                                   error="Could not load due cards.")
+
+    @app.route("/anki/review/batch", methods=["POST"])
+    def review_cards_batch():
+        """Applies buffered ratings: JSON list (or {"reviews": [...]}) of card_id/rating/reviewed_at."""
+        payload = request.get_json(silent=True)
+        reviews = payload.get("reviews") if isinstance(payload, dict) else payload
+        if not isinstance(reviews, list):
+            return jsonify(error="Expected a JSON list of reviews."), 400
+        try:
+            applied = anki().process_card_reviews(reviews)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+        return jsonify(applied=applied)
 
     @app.route("/anki/review/<card_id>", methods=["POST"])
     def review_card(card_id):
         try:
             rating = int(request.form["rating"])
-            process_card_review(card_id, rating)
+            anki().process_card_review(card_id, rating)
             return redirect(url_for("anki_review"))
         except Exception as e:
             print(f"Error processing Anki card review: {e}")
             return redirect(url_for("anki_review"))
 
+    @app.route("/api/anki")
+    @conditional('anki')
+    def api_anki():
+        card, remaining = anki().get_next_due_card()
+        return jsonify({"card": card, "remaining": remaining})
+
     @app.route("/anki/manage")
+    @conditional('anki')
     def manage_cards():
+        sort_by = request.args.get("sort_by", "review_date")
+        after, limit, stream = page_args()
         try:
-            data = load_anki_data()
-            return render_template("edit_anki.html", cards=data.get("cards", []), mode='list')
+            cards, next_cursor = anki().get_cards_page(sort_by, after, limit)
+            return render_page(stream, "edit_anki.html", cards=cards, mode='list', sort_by=sort_by,
+                               after=after, next_cursor=next_cursor, limit=limit)
         except Exception as e:
             print(f"Error loading Anki data: {e}")
             return render_template("edit_anki.html", cards=[], mode='list', error="Could not load card data.")
@@ -345,7 +716,7 @@ if anki_enabled:
                 front = request.form["front"]
                 back = request.form["back"]
                 reverse = "reverse" in request.form
-                create_card(front, back, reverse)
+                anki().create_card(front, back, reverse)
                 return redirect(url_for("manage_cards"))
             except Exception as e:
                 print(f"Error adding Anki card: {e}")
@@ -355,14 +726,14 @@ if anki_enabled:
     @app.route("/anki/edit/<card_id>", methods=["GET", "POST"])
     def edit_card(card_id):
         try:
-            card = get_card(card_id)
+            card = anki().get_card(card_id)
             if not card:
                 abort(404)
             if request.method == "POST":
                 front = request.form["front"]
                 back = request.form["back"]
                 reverse = "reverse" in request.form
-                update_card(card_id, front, back, reverse)
+                anki().update_card(card_id, front, back, reverse)
                 return redirect(url_for("manage_cards"))
             return render_template("edit_anki.html", card=card, mode='edit')
         except Exception as e:
@@ -372,7 +743,7 @@ if anki_enabled:
     @app.route("/anki/delete/<card_id>", methods=["POST"])
     def delete_card_route(card_id):
         try:
-            delete_card(card_id)
+            anki().delete_card(card_id)
             return redirect(url_for("manage_cards"))
         except Exception as e:
             print(f"Error deleting card {card_id}: {e}")
@@ -386,6 +757,38 @@ else:
         return "Anki functionality is currently disabled because the 'anki' module could not be found.", 404
 
 
+def serve(port):
+    """
+    Serves the app on 127.0.0.1:port with the server PROJECTTRACKER_SERVER names.
+
+    'waitress' runs the production WSGI server with a PROJECTTRACKER_THREADS pool;
+    'dev' (the default, and the fallback when waitress isn't installed) runs the
+    threaded Werkzeug development server. Once the socket is listening, prints
+    `PROJECTTRACKER_READY <port>` on stdout (the port actually bound, so port 0
+    works), which the Electron shell waits for instead of polling /__health.
+    """
+    if os.environ.get("PROJECTTRACKER_SERVER", "dev") == "waitress":
+        try:
+            from waitress import create_server
+        except ImportError:
+            print("WARNING: waitress is not installed; falling back to the development server.")
+        else:
+            # A lookahead lets /events see a closed connection (waitress.client_disconnected).
+            server = create_server(app, host="127.0.0.1", port=port, threads=THREADS, channel_request_lookahead=1)
+            announce_ready(server.effective_port)
+            server.run()
+            return
+    from werkzeug.serving import make_server
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    announce_ready(server.port)
+    server.serve_forever()
+
+
+def announce_ready(port):
+    print(f"PROJECTTRACKER_READY {port}", flush=True)
+
+
 if __name__ == "__main__":
-    port = int(os.environ.get("PROJECTTRACKER_PORT", 0))
-    app.run(host="127.0.0.1", port=port, debug=False)
+    # Electron stops the backend with SIGTERM; exit normally so atexit hooks flush pending saves.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    serve(int(os.environ.get("PROJECTTRACKER_PORT", 0)))
@@ -0,0 +1,351 @@
+"""
+Bulk export and import of projects, tasks and cards as NDJSON or CSV.
+
+Exports are generators: records are read one at a time (iter_projects,
+iter_cards) and written out in chunks of about CHUNK_BYTES, so memory stays flat
+however much data there is, and the web route can stream them as they come.
+
+Imports read the file a row at a time, validate each row as it arrives and
+collect the good ones; the whole file is then added with a single save (or one
+save per `batch_size` rows), instead of a load and save per record as the
+forms do. Rows keep their ids and card schedules, and empty dates stay empty
+(only a new card's dates default to today, as in anki.new_card_record), so an
+export imports back as it was. A row with an id already in use is skipped, as
+is a card whose normalized front and back match an existing one
+(anki.card_key). The report counts what happened and how fast:
+
+    python -m src.bulk export cards --format csv -o cards.csv
+    python -m src.bulk import cards cards.csv [--batch 10000] [--dry-run]
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime
+
+from . import data_handler
+
+KINDS = ("projects", "tasks", "cards")
+FORMATS = ("ndjson", "csv")
+MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+FIELDS = {
+    "projects": ["id", "title", "description", "status", "start_date", "target_completion_date",
+                 "actual_completion_date"],
+    "tasks": ["id", "project_id", "project_title", "description", "additional_info", "status", "start_date",
+              "target_completion_date", "actual_completion_date"],
+    "cards": ["id", "front", "back", "reverse", "easiness_factor", "interval", "repetitions", "review_date",
+              "created_date"],
+}
+PROJECT_STATUSES = ("active", "on hold", "complete", "archived", "ongoing")
+TASK_STATUSES = ("active", "completed", "on hold", "cancelled")
+CHUNK_BYTES = 64 * 1024
+# Errors beyond this many are counted but not listed in the report.
+MAX_ERRORS = 20
+
+
+def _anki():
+    from . import anki  # imported on use, like app.anki()
+    return anki
+
+
+def guess_format(filename, default="ndjson"):
+    """'csv' for a .csv name, 'ndjson' for .ndjson/.jsonl, else `default`."""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return default
+
+
+# --- Export ---
+
+def export_rows(kind):
+    """Yields the rows of `kind` as dicts; projects keep their updates (only NDJSON writes them)."""
+    if kind == "cards":
+        for card in _anki().iter_cards():
+            yield {field: card.get(field) for field in FIELDS["cards"]}
+        return
+    for project in data_handler.iter_projects(tasks=kind == "tasks"):
+        if kind == "projects":
+            row = {field: project.get(field) for field in FIELDS["projects"]}
+            row["updates"] = project.get("updates", [])
+            yield row
+            continue
+        for task in project.get("tasks", []):
+            row = {field: task.get(field) for field in FIELDS["tasks"]}
+            row["project_id"] = project["id"]
+            row["project_title"] = project.get("title")
+            yield row
+
+
+def export_lines(kind, fmt):
+    """Yields `kind` in `fmt` as text chunks of about CHUNK_BYTES."""
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, FIELDS[kind], extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps(row, ensure_ascii=False))
+            buffer.write("\n")
+    for row in export_rows(kind):
+        write(row)
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# --- Import ---
+
+def read_rows(stream, fmt):
+    """Yields (line number, row dict or None, error or None) for each record in a text stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if None in row:  # DictReader files cells beyond the header under None
+                columns = len(reader.fieldnames)
+                yield reader.line_num, None, f"{columns + len(row[None])} cells for {columns} columns"
+            else:
+                yield reader.line_num, row, None
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"not valid JSON ({e})"
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, "not a JSON object"
+
+
+def _text(row, field, required=False):
+    value = row.get(field)
+    if value is None:
+        value = ""
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be text")
+    if required and not value.strip():
+        raise ValueError(f"{field} is required")
+    return value
+
+
+def _date(row, field, default=None):
+    value = _text(row, field).strip()
+    if not value:
+        return default
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{field} must be a YYYY-MM-DD date, not {value!r}")
+    return value
+
+
+def _status(row, allowed):
+    value = _text(row, "status").strip() or "active"
+    if value not in allowed:
+        raise ValueError(f"status must be one of {', '.join(allowed)}, not {value!r}")
+    return value
+
+
+def _flag(row, field):
+    value = row.get(field)
+    if isinstance(value, bool) or value is None:
+        return bool(value)
+    value = str(value).strip().lower()
+    if value in ("1", "true", "yes", "y"):
+        return True
+    if value in ("", "0", "false", "no", "n"):
+        return False
+    raise ValueError(f"{field} must be true or false, not {value!r}")
+
+
+def _with_id(record, row):
+    """Keeps the row's id (so re-importing an export skips what is already there)."""
+    record_id = _text(row, "id").strip()
+    if record_id:
+        record["id"] = record_id
+    return record
+
+
+def parse_project(row):
+    """A project record from a row; raises ValueError if the row is invalid."""
+    project = data_handler.new_project_record(
+        _text(row, "title", required=True), _text(row, "description"),
+        _date(row, "start_date"), _date(row, "target_completion_date"),
+        _status(row, PROJECT_STATUSES))
+    project["actual_completion_date"] = _date(row, "actual_completion_date")
+    updates = row.get("updates")
+    if updates:
+        if not isinstance(updates, list):
+            raise ValueError("updates must be a list of update objects")
+        project["updates"] = [parse_update(update, number) for number, update in enumerate(updates, 1)]
+    return _with_id(project, row)
+
+
+def parse_update(update, number):
+    """A project update record from an object in a project row's "updates"; raises ValueError if invalid."""
+    if not isinstance(update, dict):
+        raise ValueError(f"update {number} must be an object")
+    try:
+        record = data_handler.new_update_record(_text(update, "description", required=True))
+        timestamp = _text(update, "timestamp", required=True).strip()
+        try:
+            datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            raise ValueError(f"timestamp must be YYYY-MM-DD HH:MM:SS, not {timestamp!r}")
+        record["timestamp"] = timestamp
+        return _with_id(record, update)
+    except ValueError as e:
+        raise ValueError(f"update {number}: {e}")
+
+
+def parse_task(row):
+    """A (project id, task record) pair from a row; raises ValueError if the row is invalid."""
+    project_id = _text(row, "project_id", required=True).strip()
+    task = data_handler.new_task_record(
+        _text(row, "description", required=True), _text(row, "additional_info"),
+        _date(row, "start_date"), _date(row, "target_completion_date"),
+        _date(row, "actual_completion_date"), _status(row, TASK_STATUSES))
+    return project_id, _with_id(task, row)
+
+
+def _number(row, field, kind, default):
+    value = row.get(field)
+    if value is None or value == "":
+        return default
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number, not {value!r}")
+
+
+def parse_card(row):
+    """
+    A card record from a row; raises ValueError if the row is invalid. Scheduling
+    fields the row has (an export does) are kept, the rest start as for a new card.
+    """
+    card = _anki().new_card_record(_text(row, "front", required=True), _text(row, "back", required=True),
+                                   _flag(row, "reverse"))
+    card["easiness_factor"] = _number(row, "easiness_factor", float, card["easiness_factor"])
+    card["interval"] = _number(row, "interval", int, card["interval"])
+    card["repetitions"] = _number(row, "repetitions", int, card["repetitions"])
+    card["review_date"] = _date(row, "review_date", card["review_date"])
+    card["created_date"] = _date(row, "created_date", card["created_date"])
+    return _with_id(card, row)
+
+
+PARSERS = {"projects": parse_project, "tasks": parse_task, "cards": parse_card}
+
+
+def _apply(kind, batch):
+    if kind == "projects":
+        return data_handler.import_projects(batch, [])
+    if kind == "tasks":
+        return data_handler.import_projects([], batch)
+    return _anki().import_cards(batch)
+
+
+def import_rows(kind, stream, fmt, batch_size=0, dry_run=False):
+    """
+    Validates and imports every row of `stream`; returns a report dict.
+
+    Rows are added with one save at the end, or one save every `batch_size`
+    valid rows when it is set. `dry_run` validates without saving anything.
+    """
+    parse = PARSERS[kind]
+    report = {"kind": kind, "format": fmt, "rows": 0, "valid": 0, "imported": 0, "duplicates": 0,
+              "unknown_project": 0, "invalid": 0, "errors": [], "saves": 0}
+    start = time.perf_counter()
+    batch = []
+
+    def flush():
+        if batch and not dry_run:
+            counts = _apply(kind, batch)
+            report["imported"] += counts.get(kind, 0)
+            report["duplicates"] += counts.get("duplicates", 0)
+            report["unknown_project"] += counts.get("unknown_project", 0)
+            report["saves"] += 1
+        batch.clear()
+
+    for line, row, error in read_rows(stream, fmt):
+        report["rows"] += 1
+        if error is None:
+            try:
+                record = parse(row)
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            report["invalid"] += 1
+            if len(report["errors"]) < MAX_ERRORS:
+                report["errors"].append(f"line {line}: {error}")
+            continue
+        report["valid"] += 1
+        batch.append(record)
+        if batch_size and len(batch) >= batch_size:
+            flush()
+    flush()
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["rows_per_second"] = round(report["rows"] / report["seconds"]) if report["seconds"] else None
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import ProjectTracker records as NDJSON or CSV.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write every record of a kind")
+    export.add_argument("kind", choices=KINDS)
+    export.add_argument("--format", choices=FORMATS, help="default: from the -o extension, else ndjson")
+    export.add_argument("-o", "--output", help="file to write (default: standard output)")
+    load = commands.add_parser("import", help="add the records in a file")
+    load.add_argument("kind", choices=KINDS)
+    load.add_argument("file", help="file to read ('-' for standard input)")
+    load.add_argument("--format", choices=FORMATS, help="default: from the file extension, else ndjson")
+    load.add_argument("--batch", type=int, default=0, help="save every N rows (default: one save at the end)")
+    load.add_argument("--dry-run", action="store_true", help="validate only")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        fmt = args.format or guess_format(args.output)
+        start, size = time.perf_counter(), 0
+        output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            for chunk in export_lines(args.kind, fmt):
+                output.write(chunk)
+                size += len(chunk)
+        finally:
+            if args.output:
+                output.close()
+        if args.output:
+            print(f"exported {args.kind} to {args.output} ({size} characters) in {time.perf_counter() - start:.2f} s")
+        return 0
+
+    fmt = args.format or guess_format(args.file)
+    if args.file == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+        report = import_rows(args.kind, stream, fmt, args.batch, args.dry_run)
+    else:
+        with open(args.file, encoding="utf-8-sig", newline="") as stream:
+            report = import_rows(args.kind, stream, fmt, args.batch, args.dry_run)
+    print(f"{report['rows']} rows in {report['seconds']} s ({report['rows_per_second']} rows/s): "
+          f"{report['imported']} imported, {report['duplicates']} duplicates, "
+          f"{report['unknown_project']} with an unknown project, {report['invalid']} invalid"
+          + (" (dry run)" if args.dry_run else ""))
+    for error in report["errors"]:
+        print(f"  {error}")
+    return 1 if report["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
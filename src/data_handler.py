@@ -1,36 +1,237 @@
-import json
+import atexit
+import bisect
 import os
 import uuid
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from .safe_io import atomic_write_json
+from .details import DIRECTORY, LAYOUT_KEY, SPLIT, DetailStore, join_document, join_project, split_project, split_task
+from .doc_cache import copy_json, copy_path
+from .indexes import ProjectIndex
+from .journal import append_item, remove_item, set_fields
+from .pagination import paginate
+from .search import open_index, save_index
+from .shards import SHARD_DIRECTORY, SHARDED, ShardedDocumentCache
 
 DATA_DIR = os.getenv("PROJECTTRACKER_DATA_DIR", os.getcwd())
 os.makedirs(DATA_DIR, exist_ok=True)
 DATA_FILE = os.path.join(DATA_DIR, "project_data.json")
+SEARCH_FILE = DATA_FILE + ".search"
+STORAGE_BACKEND = os.getenv("PROJECTTRACKER_STORAGE", "json")
+# "split" keeps project updates and task notes in one file per project (see details.py);
+# "sharded" keeps each whole project in its own file (see shards.py).
+SINGLE = "single"
+LAYOUTS = (SINGLE, SPLIT, SHARDED)
+LAYOUT = os.getenv("PROJECTTRACKER_LAYOUT", SINGLE)
+if LAYOUT not in LAYOUTS:
+    print(f"Unknown PROJECTTRACKER_LAYOUT {LAYOUT!r}. Using {SINGLE!r}.")
+    LAYOUT = SINGLE
+DETAILS_DIR = os.path.join(DATA_DIR, DIRECTORY)
+SHARDS_DIR = os.path.join(DATA_DIR, SHARD_DIRECTORY)
+# Bumped when build_project_summary() changes, so stored summaries are rebuilt on load.
+SUMMARY_KEY = "summary_version"
+SUMMARY_VERSION = 1
+
+_cache = ShardedDocumentCache(DATA_FILE, lambda: {"projects": [], SUMMARY_KEY: SUMMARY_VERSION}, SHARDS_DIR)
+_details = DetailStore(DETAILS_DIR)
+
+
+def _layout(doc):
+    return doc.get(LAYOUT_KEY, SINGLE)
+
+
+def _split_layout(doc):
+    return doc.get(LAYOUT_KEY) == SPLIT
+
+
+def build_project_summary(project, updates=None):
+    """
+    Derived fields the project list shows, kept in project['summary'] and refreshed
+    by every edit of the project: task counts per status, the sorted due dates of
+    its active tasks (the first is the next one due; those before today are
+    overdue) and the latest update's timestamp. `updates` defaults to the project's.
+    """
+    counts, due = {}, []
+    for task in project.get('tasks', []):
+        counts[task['status']] = counts.get(task['status'], 0) + 1
+        if task['status'] == 'active' and task.get('target_completion_date'):
+            due.append(task['target_completion_date'])
+    updates = project.get('updates', []) if updates is None else updates
+    return {
+        'task_counts': counts,
+        'active_due_dates': sorted(due),
+        'last_update': max((u['timestamp'] for u in updates if u.get('timestamp')), default=None),
+    }
+
+
+def _refresh_summary(project, updates=None):
+    """
+    Rebuilds the summary of a copied project after an edit and returns the journal
+    record for it. Without `updates` the previous last-update timestamp is kept.
+    """
+    summary = build_project_summary(project, updates or [])
+    if updates is None:
+        summary['last_update'] = (project.get('summary') or {}).get('last_update')
+    project['summary'] = summary
+    return set_fields(["projects", {"id": project['id']}], {'summary': summary})
+
+
+def project_list_entry(project, summary, today=None):
+    """
+    A project as the project list shows it: its own fields (no tasks or updates)
+    plus next_task_due_date, overdue_count, task_counts and last_update.
+    """
+    today = (today or date.today()).isoformat()
+    entry = {k: copy_json(v) for k, v in project.items() if k not in ('tasks', 'updates', 'summary')}
+    due = summary['active_due_dates']
+    # A far-off date sorts projects without active dated tasks last.
+    entry['next_task_due_date'] = due[0] if due else '9999-12-31'
+    entry['overdue_count'] = bisect.bisect_left(due, today)
+    entry['task_counts'] = dict(summary['task_counts'])
+    entry['last_update'] = summary['last_update']
+    return entry
+
+
+def _split_document(data):
+    """Writes each project's details file and returns `data` with only the summaries (split layout)."""
+    summaries = []
+    for project in data.get("projects", []):
+        summary, details = split_project(project)
+        _details.put(project["id"], details)
+        summaries.append(summary)
+    return dict(data, projects=summaries, **{LAYOUT_KEY: SPLIT})
+
+
+def _current_format(doc, layout):
+    return _layout(doc) == layout and doc.get(SUMMARY_KEY) == SUMMARY_VERSION
+
+
+def _store_layout(data, layout, base=None, carry=None):
+    """
+    Stores a full document (without a layout marker) in `layout`, with a fresh
+    summary in every project; the caller holds the lock.
+    """
+    old = _layout(_cache.peek())
+    data["projects"] = [dict(p, summary=build_project_summary(p)) for p in data.get("projects", [])]
+    data[SUMMARY_KEY] = SUMMARY_VERSION
+    if layout == SPLIT:
+        data = _split_document(data)
+    elif layout == SHARDED:
+        data[LAYOUT_KEY] = SHARDED
+    _cache.store(data, base, carry)
+    if old == SPLIT and layout != SPLIT:
+        for project_id in _details.project_ids():
+            _details.remove(project_id)
+
+
+def convert_layout(layout):
+    """
+    Rewrites the project data in `layout` ('single', 'split' or 'sharded') unless
+    it is already stored that way with up-to-date project summaries.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown layout {layout!r}")
+    with _cache.locked():
+        doc, generation = _cache.snapshot()
+        if _current_format(doc, layout):
+            return
+        data = join_document(doc, _details)
+        data = {k: v for k, v in data.items() if k != LAYOUT_KEY}
+        # Same projects and tasks in the same places, so the indexes stay valid.
+        _store_layout(data, layout, generation, carry={'index': None, 'search': None})
+
+
+def _ensure_layout():
+    """Converts the data file to PROJECTTRACKER_LAYOUT (and adds summaries) if it needs it."""
+    if not _current_format(_cache.peek(), LAYOUT):
+        convert_layout(LAYOUT)
 
 
 def load_data():
-    """Loads project data from the JSON file."""
-    if not os.path.exists(DATA_FILE):
-        return {"projects": []}
-    try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except json.JSONDecodeError:
-        print(f"Error decoding JSON from {DATA_FILE}. Returning empty project list.")
-        return {"projects": []}
+    """Loads project data (a private copy of the cached document, with every project's details)."""
+    _ensure_layout()
+    data = join_document(_cache.load(), _details)
+    data.pop(LAYOUT_KEY, None)
+    return data
 
 
 def save_data(data):
-    """Saves project data atomically using the safe_io module."""
-    atomic_write_json(DATA_FILE, data)
+    """Saves project data atomically and makes it the cached document."""
+    data["completion_counts"] = build_completion_counts(data)
+    data.pop(LAYOUT_KEY, None)
+    with _cache.locked():
+        _store_layout(data, LAYOUT)
+
+
+def data_version():
+    """Returns a token that changes whenever the data file changes (stat only, no load)."""
+    return _cache.version()
+
+
+def flush_data():
+    """Writes out a save still waiting in write-behind mode (and the search index); returns once on disk."""
+    _cache.flush()
+    _save_search_index()
+
+
+def get_index():
+    """Returns (cached document, ProjectIndex) for read-only lookups."""
+    _ensure_layout()
+    return _cache.derived('index', ProjectIndex)
+
+
+def project_search_fields(project):
+    return [(project.get('title'), 8), (project.get('description'), 2)]
+
+
+def task_search_fields(task):
+    return [(task.get('description'), 6), (task.get('additional_info'), 2)]
+
+
+def update_search_fields(update):
+    return [(update.get('description'), 1)]
+
+
+def _search_entries(data):
+    for project in data.get('projects', []):
+        if _split_layout(data):
+            project = join_project(project, _details.read(project['id']))
+        yield 'p', project['id'], None, project_search_fields(project)
+        for task in project.get('tasks', []):
+            yield 't', task['id'], project['id'], task_search_fields(task)
+        for update in project.get('updates', []):
+            yield 'u', update['id'], project['id'], update_search_fields(update)
+
+
+def get_search_index():
+    """Returns (cached document, SearchIndex), loading the persisted index when it is current."""
+    _ensure_layout()
+    return _cache.derived('search', lambda data: open_index(SEARCH_FILE, data, _search_entries))
+
+
+def _save_search_index():
+    save_index(SEARCH_FILE, _cache.cached('search'))
+
+
+atexit.register(_save_search_index)
+
+
+def _snapshot():
+    """Returns (cached document, generation, index) for a copy-on-write update."""
+    _ensure_layout()
+    doc, generation = _cache.snapshot()
+    return doc, generation, get_index()[1]
 
 
 def get_project(project_id, task_status='active'):
     """Retrieves a specific project by ID with optional task filtering."""
-    data = load_data()
-    project = next((p for p in data['projects'] if p['id'] == project_id), None)
+    data, index = get_index()
+    project = index.project(data, project_id)
+    if project:
+        # The list summary is bookkeeping for the list views, not part of the project.
+        project = {k: v for k, v in project.items() if k != 'summary'}
+        if _split_layout(data):
+            project = join_project(project, _details.get(project_id))
+        project = copy_json(project)
 
     if project and task_status:
         # Filter tasks based on status if provided
@@ -39,39 +240,48 @@ def get_project(project_id, task_status='active'):
     return project
 
 
-def get_projects_by_category(category):
-    """Filters projects based on their status category and adds next_task_due_date."""
-    data = load_data()
-    projects = []
-    for project in data['projects']:
-        if project['status'] == category:
-            # Get the active tasks for the project, handling missing dates
-            active_tasks = [
-                task for task in project.get('tasks', [])
-                if task['status'] == 'active' and task.get('target_completion_date')
-            ]
-
-            # Find the next task due date
-            if active_tasks:
-                next_task_due_date = min(
-                    task['target_completion_date'] for task in active_tasks
-                )
-            else:
-                # Use a far-off date if no active tasks with due dates
-                next_task_due_date = '9999-12-31'
-
-            project['next_task_due_date'] = next_task_due_date
-            projects.append(project)
-
-    return projects
+def iter_projects(tasks=True):
+    """
+    Yields every project with its updates, and its tasks unless `tasks` is False,
+    as private copies made one at a time.
+    """
+    data, _ = get_index()
+    split = _split_layout(data)
+    for project in data.get('projects', []):
+        project = {k: v for k, v in project.items() if k != 'summary' and (tasks or k != 'tasks')}
+        if split:
+            project = join_project(project, _details.get(project['id']))
+            if not tasks:
+                project.pop('tasks', None)
+        yield copy_json(project)
 
 
-def create_project(title, description, start_date, target_completion_date, status="active"):
-    """Creates a new project."""
-    data = load_data()
-    project_id = uuid.uuid4().hex
-    new_project = {
-        "id": project_id,
+def _put_details(project_id, updates=None, notes=None):
+    """Rewrites a project's details file with new `updates` and/or task notes {task id: text} (split layout)."""
+    details = dict(_details.get(project_id))
+    if updates is not None:
+        details['updates'] = updates
+    if notes:
+        merged = {**details['additional_info'], **notes}
+        details['additional_info'] = {task_id: info for task_id, info in merged.items() if info}
+    _details.put(project_id, details)
+
+
+def get_projects_by_category(category):
+    """
+    Returns the projects in a status category as project_list_entry() summaries,
+    read from the summaries stored with each project (no task is looked at).
+    """
+    data, index = get_index()
+    today = date.today()
+    return [project_list_entry(project, project['summary'], today)
+            for project in index.projects_with_status(data, [category])]
+
+
+def new_project_record(title, description, start_date, target_completion_date, status="active"):
+    """Builds a new project dict with a fresh id."""
+    return {
+        "id": uuid.uuid4().hex,
         "title": title,
         "description": description,
         "start_date": start_date,
@@ -81,88 +291,194 @@ def create_project(title, description, start_date, target_completion_date, statu
         "updates": [],
         "tasks": []
     }
-    data["projects"].append(new_project)
-    save_data(data)
+
+
+def new_task_record(description, additional_info, start_date, target_completion_date, actual_completion_date, status):
+    """Builds a new task dict with a fresh id."""
+    return {
+        "id": uuid.uuid4().hex,
+        "description": description,
+        "additional_info": additional_info,
+        "start_date": start_date,
+        "target_completion_date": target_completion_date,
+        "actual_completion_date": actual_completion_date,
+        "status": status,
+        "updates": []
+    }
+
+
+def new_update_record(update_text):
+    """Builds a new timestamped project update dict."""
+    return {
+        'id': uuid.uuid4().hex,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'description': update_text
+    }
+
+
+@_cache.writer
+def create_project(title, description, start_date, target_completion_date, status="active"):
+    """Creates a new project."""
+    doc, generation, _ = _snapshot()
+    new_project = new_project_record(title, description, start_date, target_completion_date, status)
+    project_id = new_project["id"]
+    new_project["summary"] = build_project_summary(new_project)
+    stored = split_project(new_project)[0] if _split_layout(doc) else new_project
+    data, projects = copy_path(doc, "projects")
+    pos = len(projects)
+    projects.append(stored)
+    _cache.append(data, [append_item(["projects"], stored)], base=generation,
+                  carry={'index': lambda index: index.add_project(stored, pos),
+                         'search': lambda search: search.add('p', project_id, None,
+                                                             project_search_fields(new_project))})
     return project_id
 
 
+@_cache.writer
 def update_project(project_id, title, description, status, start_date, target_completion_date, actual_completion_date, updates):
     """Updates an existing project."""
-    data = load_data()
-    project = next((p for p in data['projects'] if p['id'] == project_id), None)
-    if project:
-        project["title"] = title
-        project["description"] = description
-        project["status"] = status
-        project["start_date"] = start_date
-        project["target_completion_date"] = target_completion_date
-        project["actual_completion_date"] = actual_completion_date
-        project["updates"] = updates
-        save_data(data)
-
-
-def create_task(project_id, description, additional_info, start_date, target_completion_date, actual_completion_date, status):
-    """Creates a new task for a project."""
-    data = load_data()
-    project = next((p for p in data['projects'] if p['id'] == project_id), None)
-    if project:
-        task_id = uuid.uuid4().hex
-        new_task = {
-            "id": task_id,
+    doc, generation, index = _snapshot()
+    pos = index.project_pos(doc, project_id)
+    if pos is not None:
+        data, project = copy_path(doc, "projects", pos)
+        old_status = project["status"]
+        old_completion = project.get("actual_completion_date")
+        old_project = doc["projects"][pos]
+        split = _split_layout(doc)
+        old_updates = _details.get(project_id)['updates'] if split else old_project.get('updates', [])
+        fields = {
+            "title": title,
             "description": description,
-            "additional_info": additional_info,
+            "status": status,
             "start_date": start_date,
             "target_completion_date": target_completion_date,
             "actual_completion_date": actual_completion_date,
-            "status": status,
-            "updates": []
+            "updates": updates
         }
-        if "tasks" not in project:
-            project["tasks"] = []
-        project["tasks"].append(new_task)
-        save_data(data)
+        if split:
+            _put_details(project_id, updates=updates or [])
+            if updates:
+                del fields["updates"]
+        fields["summary"] = build_project_summary(project, updates or [])
+        project.update(fields)
+        records = [set_fields(["projects", {"id": project_id}], fields)]
+        records += _move_completion(data, project_id, old_completion, actual_completion_date)
+
+        def reindex(search):
+            search.replace(project_id, project_search_fields(old_project), project_search_fields(project))
+            old_by_id = {u['id']: u for u in old_updates}
+            new_by_id = {u['id']: u for u in updates or []}
+            for update_id, update in old_by_id.items():
+                if update_id not in new_by_id:
+                    search.remove(update_id, update_search_fields(update))
+            for update_id, update in new_by_id.items():
+                if update_id not in old_by_id:
+                    search.add('u', update_id, project_id, update_search_fields(update))
+                elif update.get('description') != old_by_id[update_id].get('description'):
+                    search.replace(update_id, update_search_fields(old_by_id[update_id]),
+                                   update_search_fields(update))
+
+        _cache.append(data, records, base=generation,
+                      carry={'index': lambda index: index.set_project_status(project_id, old_status, status),
+                             'search': reindex})
+
+
+@_cache.writer
+def create_task(project_id, description, additional_info, start_date, target_completion_date, actual_completion_date, status):
+    """Creates a new task for a project."""
+    doc, generation, index = _snapshot()
+    project_pos = index.project_pos(doc, project_id)
+    if project_pos is not None:
+        new_task = new_task_record(description, additional_info, start_date,
+                                   target_completion_date, actual_completion_date, status)
+        task_id = new_task["id"]
+        stored = new_task
+        if _split_layout(doc):
+            stored, info = split_task(new_task)
+            if info is not None:
+                _put_details(project_id, notes={task_id: info})
+        data, project = copy_path(doc, "projects", project_pos)
+        project["tasks"] = list(project.get("tasks", []))
+        pos = len(project["tasks"])
+        project["tasks"].append(stored)
+        records = [append_item(["projects", {"id": project_id}, "tasks"], stored), _refresh_summary(project)]
+        records += _move_completion(data, project_id, None, actual_completion_date)
+        _cache.append(data, records, base=generation,
+                      carry={'index': lambda index: index.add_task(project_id, stored, pos),
+                             'search': lambda search: search.add('t', task_id, project_id,
+                                                                 task_search_fields(new_task))})
         return task_id
 
 
+@_cache.writer
 def update_task(project_id, task_id, description, additional_info, status, start_date, target_completion_date, actual_completion_date):
     """Updates an existing task."""
-    data = load_data()
-    project = next((p for p in data['projects'] if p['id'] == project_id), None)
-    if project:
-        task = next((t for t in project.get('tasks', []) if t['id'] == task_id), None)
-        if task:
-            task["description"] = description
-            task["additional_info"] = additional_info
-            task["status"] = status
-            task["start_date"] = start_date
-            task["target_completion_date"] = target_completion_date
-            task["actual_completion_date"] = actual_completion_date
-            save_data(data)
+    doc, generation, index = _snapshot()
+    project_pos, pos = index.task_pos(doc, task_id)
+    if project_pos is not None and doc["projects"][project_pos]["id"] == project_id:
+        data, task = copy_path(doc, "projects", project_pos, "tasks", pos)
+        split = _split_layout(doc)
+        old_info = _details.get(project_id)['additional_info'].get(task_id) if split else task.get('additional_info')
+        old_fields = task_search_fields(dict(task, additional_info=old_info))
+        old_status = task["status"]
+        old_completion = task.get("actual_completion_date")
+        fields = {
+            "description": description,
+            "additional_info": additional_info,
+            "status": status,
+            "start_date": start_date,
+            "target_completion_date": target_completion_date,
+            "actual_completion_date": actual_completion_date
+        }
+        if split:
+            if (old_info or '') != (additional_info or ''):
+                _put_details(project_id, notes={task_id: additional_info})
+            if additional_info:
+                del fields["additional_info"]
+        task.update(fields)
+        new_fields = task_search_fields(dict(task, additional_info=additional_info))
+        path = ["projects", {"id": project_id}, "tasks", {"id": task_id}]
+        records = [set_fields(path, fields), _refresh_summary(data["projects"][project_pos])]
+        records += _move_completion(data, project_id, old_completion, actual_completion_date)
+        _cache.append(data, records, base=generation,
+                      carry={'index': lambda index: index.set_task_status(task_id, old_status, status),
+                             'search': lambda search: search.replace(task_id, old_fields, new_fields)})
 
 
 def get_all_tasks(sort_by='due_date', order='asc', selected_project_statuses=None, selected_task_statuses=None):
     """Retrieves all tasks with optional sorting and filtering."""
-    data = load_data()
+    data, index = get_index()
+    # Narrow the candidates with the status indexes before touching any task.
+    if selected_task_statuses:
+        candidates = index.tasks_with_status(data, selected_task_statuses)
+    elif selected_project_statuses:
+        candidates = [(project, task)
+                      for project in index.projects_with_status(data, selected_project_statuses)
+                      for task in project.get('tasks', [])]
+    else:
+        candidates = [(project, task)
+                      for project in data.get('projects', [])
+                      for task in project.get('tasks', [])]
+
     all_tasks = []
-    for project in data.get('projects', []):
-        for task in project.get('tasks', []):
-            task_data = {
-                'project_id': project['id'],
-                'project_title': project['title'],
-                'project_status': project['status'],
-                'task_id': task['id'],
-                'description': task['description'],
-                'target_completion_date': task.get('target_completion_date'),
-                'status': task['status']
-            }
-
-            # Apply filtering
-            if selected_project_statuses and task_data['project_status'] not in selected_project_statuses:
-                continue
-            if selected_task_statuses and task_data['status'] not in selected_task_statuses:
-                continue
+    for project, task in candidates:
+        task_data = {
+            'project_id': project['id'],
+            'project_title': project['title'],
+            'project_status': project['status'],
+            'task_id': task['id'],
+            'description': task['description'],
+            'target_completion_date': task.get('target_completion_date'),
+            'status': task['status']
+        }
+
+        # Apply filtering
+        if selected_project_statuses and task_data['project_status'] not in selected_project_statuses:
+            continue
+        if selected_task_statuses and task_data['status'] not in selected_task_statuses:
+            continue
 
-            all_tasks.append(task_data)
+        all_tasks.append(task_data)
 
     # Apply sorting
     if sort_by == 'due_date':
@@ -171,35 +487,240 @@ def get_all_tasks(sort_by='due_date', order='asc', selected_project_statuses=Non
     return all_tasks
 
 
-def add_project_update(project_id, update_text):
-    """Adds a new update to a project."""
-    data = load_data()
-    project = next((p for p in data['projects'] if p['id'] == project_id), None)
-    if project:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        new_update = {
-            'id': uuid.uuid4().hex,
-            'timestamp': timestamp,
-            'description': update_text
-        }
-        if "updates" not in project:
-            project["updates"] = []
-        project['updates'].append(new_update)
-        save_data(data)
+def _task_sort_key(sort_by):
+    if sort_by == 'due_date':
+        return lambda t: (t.get('target_completion_date') or '9999-12-31', t['task_id'])
+    return lambda t: (t['task_id'],)
+
+
+def get_tasks_page(sort_by='due_date', order='asc', selected_project_statuses=None,
+                   selected_task_statuses=None, after=None, limit=100):
+    """
+    Returns (tasks, next cursor or None): one page of get_all_tasks().
+
+    Pages are ordered by due date (then task id, so the order is total) or by task
+    id alone, and `after` is the cursor returned with the previous page.
+    """
+    tasks = get_all_tasks(None, order, selected_project_statuses, selected_task_statuses)
+    return paginate(tasks, _task_sort_key(sort_by), after, limit, reverse=(order == 'desc'))
+
+
+def search(query, limit=20):
+    """
+    Returns up to `limit` projects, tasks and project updates matching every word of
+    `query` (as a word or word prefix), best match first.
+
+    Each result is a dict with 'kind' ('project', 'task' or 'update'), 'score',
+    'project_id', 'project_title', 'text' and 'status', plus 'task_id' or
+    'update_id'/'timestamp' for tasks and updates.
+    """
+    data, index = get_index()
+    _, search_index = get_search_index()
+    results = []
+    for score, kind, item_id, parent_id in search_index.search(query, limit):
+        project = index.project(data, parent_id or item_id)
+        if project is None:
+            continue
+        result = {'score': score, 'project_id': project['id'], 'project_title': project['title']}
+        if kind == 'p':
+            result.update(kind='project', text=project.get('description'), status=project['status'])
+        elif kind == 't':
+            _, task = index.task(data, item_id)
+            if task is None:
+                continue
+            result.update(kind='task', task_id=item_id, text=task['description'], status=task['status'])
+        else:
+            updates = _details.get(project['id'])['updates'] if _split_layout(data) else project.get('updates', [])
+            update = next((u for u in updates if u['id'] == item_id), None)
+            if update is None:
+                continue
+            result.update(kind='update', update_id=item_id, text=update.get('description'),
+                          timestamp=update.get('timestamp'), status=project['status'])
+        results.append(result)
+    return results
 
 
+@_cache.writer
+def add_project_update(project_id, update_text):
+    """Adds a new update to a project."""
+    doc, generation, index = _snapshot()
+    pos = index.project_pos(doc, project_id)
+    if pos is not None:
+        new_update = new_update_record(update_text)
+        data, project = copy_path(doc, "projects", pos)
+        if _split_layout(doc):
+            updates = _details.get(project_id)['updates'] + [new_update]
+            _put_details(project_id, updates=updates)
+            records = []
+        else:
+            updates = project["updates"] = list(project.get("updates", []))
+            project['updates'].append(new_update)
+            records = [append_item(["projects", {"id": project_id}, "updates"], new_update)]
+        records.append(_refresh_summary(project, updates))
+        _cache.append(data, records, base=generation,
+                      carry={'index': None, 'search': lambda search: search.add(
+                          'u', new_update['id'], project_id, update_search_fields(new_update))})
+
+
+@_cache.writer
 def delete_project_update(project_id, update_id):
     """Deletes an update from a project."""
+    doc, generation, index = _snapshot()
+    pos = index.project_pos(doc, project_id)
+    if pos is None:
+        return
+    split = _split_layout(doc)
+    updates = _details.get(project_id)['updates'] if split else doc["projects"][pos].get("updates")
+    if updates is not None:
+        removed = [u for u in updates if u['id'] == update_id]
+        kept = [u for u in updates if u['id'] != update_id]
+        data, project = copy_path(doc, "projects", pos)
+        if split:
+            _put_details(project_id, updates=kept)
+            records = []
+            if not kept:  # empty updates stay in the summary, as split_project() leaves them
+                project['updates'] = kept
+                records.append(set_fields(["projects", {"id": project_id}], {"updates": kept}))
+        else:
+            project['updates'] = kept
+            records = [remove_item(["projects", {"id": project_id}, "updates"], update_id)]
+        records.append(_refresh_summary(project, kept))
+
+        def unindex(search):
+            for update in removed:
+                search.remove(update_id, update_search_fields(update))
+
+        _cache.append(data, records, base=generation, carry={'index': None, 'search': unindex})
+
+
+@_cache.writer
+def import_projects(projects, tasks):
+    """
+    Adds many projects and (project id, task) pairs with a single save.
+
+    Records whose id is already in use are skipped as duplicates, and tasks whose
+    project exists neither in the data nor in `projects` are left out. Returns
+    the counts {"projects", "tasks", "duplicates", "unknown_project"}.
+    """
     data = load_data()
-    project = next((p for p in data['projects'] if p['id'] == project_id), None)
-    if project and "updates" in project:
-        project['updates'] = [u for u in project['updates'] if u['id'] != update_id]
+    by_id = {project['id']: project for project in data['projects']}
+    task_ids = {task['id'] for project in data['projects'] for task in project.get('tasks', [])}
+    counts = {"projects": 0, "tasks": 0, "duplicates": 0, "unknown_project": 0}
+    for project in projects:
+        if project['id'] in by_id:
+            counts["duplicates"] += 1
+            continue
+        project = dict(project, tasks=list(project.get('tasks') or []))
+        by_id[project['id']] = project
+        data['projects'].append(project)
+        counts["projects"] += 1
+    for project_id, task in tasks:
+        project = by_id.get(project_id)
+        if project is None:
+            counts["unknown_project"] += 1
+        elif task['id'] in task_ids:
+            counts["duplicates"] += 1
+        else:
+            task_ids.add(task['id'])
+            project.setdefault('tasks', []).append(task)
+            counts["tasks"] += 1
+    if counts["projects"] or counts["tasks"]:
         save_data(data)
+    return counts
+
+
+def _completion_day(date_str):
+    """Normalizes an actual_completion_date to 'YYYY-MM-DD', or None if it isn't a date."""
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d').date().isoformat()
+    except (ValueError, TypeError):
+        return None
+
+
+def build_completion_counts(data):
+    """Builds the completion histogram {day: {project id: completions}} by scanning everything."""
+    counts = {}
+    for project in data.get('projects', []):
+        days = [project.get('actual_completion_date')]
+        days += [task.get('actual_completion_date') for task in project.get('tasks', [])]
+        for day in filter(None, map(_completion_day, days)):
+            bucket = counts.setdefault(day, {})
+            bucket[project['id']] = bucket.get(project['id'], 0) + 1
+    return counts
+
+
+def _move_completion(data, project_id, old_date, new_date):
+    """
+    Moves one completion of `project_id` from `old_date` to `new_date` in the
+    histogram stored in `data` (a copy-on-write root whose edit is already applied).
+    Either date may be None. Returns the journal records for the change.
+    """
+    old_day, new_day = _completion_day(old_date), _completion_day(new_date)
+    if old_day == new_day:
+        return []
+    if 'completion_counts' not in data:
+        # Documents written before the histogram existed get it on their first edit.
+        data['completion_counts'] = build_completion_counts(data)
+        return [set_fields([], {'completion_counts': data['completion_counts']})]
+    counts = data['completion_counts'] = dict(data['completion_counts'])
+    changed = {}
+    for day, delta in ((old_day, -1), (new_day, 1)):
+        if day is None:
+            continue
+        bucket = dict(counts.get(day, {}))
+        count = bucket.get(project_id, 0) + delta
+        if count > 0:
+            bucket[project_id] = count
+        else:
+            bucket.pop(project_id, None)
+        counts[day] = changed[day] = bucket
+    return [set_fields(['completion_counts'], changed)]
+
+
+def _completion_counts():
+    """Returns the stored completion histogram, building it once for older files."""
+    data = _cache.peek()
+    if 'completion_counts' in data:
+        return data['completion_counts']
+    return _cache.derived('completion_counts', build_completion_counts)[1]
+
+
+def get_completion_counts(start=None, end=None, project_id=None, by_project=False):
+    """
+    Returns completions per day from the stored histogram, without scanning tasks.
+
+    Args:
+        start, end: Inclusive date range (date objects or 'YYYY-MM-DD'); None leaves it open.
+        project_id: Only count completions in this project (its own and its tasks').
+        by_project: Return {day: {project id: count}} instead of {day: count}.
+    """
+    counts = _completion_counts()
+    start = start.isoformat() if isinstance(start, date) else start
+    end = end.isoformat() if isinstance(end, date) else end
+    if start and end and (date.fromisoformat(end) - date.fromisoformat(start)).days < len(counts):
+        # A short window: look its days up instead of walking the whole histogram.
+        first = date.fromisoformat(start)
+        span = (date.fromisoformat(end) - first).days + 1
+        days = [(first + timedelta(days=i)).isoformat() for i in range(span)]
+    else:
+        days = [day for day in counts if (not start or day >= start) and (not end or day <= end)]
+
+    result = {}
+    for day in days:
+        bucket = counts.get(day)
+        if not bucket:
+            continue
+        if project_id is not None:
+            bucket = {project_id: bucket[project_id]} if project_id in bucket else {}
+        total = sum(bucket.values())
+        if total:
+            result[day] = dict(bucket) if by_project else total
+    return result
 
 
 def get_completion_data():
     """Returns all completion dates from projects and tasks"""
-    data = load_data()
+    data = _cache.peek()
     completions = []
 
     for project in data.get('projects', []):
@@ -218,3 +739,13 @@ def get_completion_data():
                 })
 
     return completions
+
+
+# --- Optional SQLite backend: same functions, different storage ---
+if STORAGE_BACKEND == "sqlite":
+    from .sqlite_store import (  # noqa: E402,F811
+        load_data, save_data, get_project, get_projects_by_category, create_project,
+        update_project, create_task, update_task, get_all_tasks, add_project_update,
+        delete_project_update, get_completion_data, get_completion_counts, data_version,
+        flush_data, search, iter_projects, import_projects
+    )
@@ -0,0 +1,170 @@
+"""
+Split layout for project data: heavy fields live in one small file per project.
+
+List views only need a project's and its tasks' scalar fields, yet a project's
+`updates` history and its tasks' `additional_info` text are most of the bytes
+in project_data.json. With the split layout the main file keeps everything else
+(marked with "layout": "split") and each project's heavy fields go into
+`<directory>/<project id>.json`:
+
+    {"updates": [...], "additional_info": {task id: text, ...}}
+
+A project without updates or task notes has no file. Files are read on demand,
+one project at a time, and the most recently used ones stay cached.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .safe_io import atomic_write_json, loads_json
+
+# Directory beside project_data.json that holds the detail files.
+DIRECTORY = "project_details"
+LAYOUT_KEY = "layout"
+SPLIT = "split"
+
+# Detail documents kept in memory; each is one project's updates and task notes.
+CACHE_SIZE = 64
+
+
+def empty_details():
+    return {"updates": [], "additional_info": {}}
+
+
+def split_task(task):
+    """
+    Returns (summary, note) for a task: without additional_info and that text, or
+    the task itself and None when the text is empty.
+    """
+    info = task.get("additional_info")
+    if not info:
+        return task, None
+    return {k: v for k, v in task.items() if k != "additional_info"}, info
+
+
+def split_project(project):
+    """
+    Returns (summary, details) for a full project dict: the project without its
+    updates and its tasks without additional_info, and the fields taken out.
+    Empty values (None, "", []) stay in the summary and missing keys stay
+    missing, so join_project() gives back the same project.
+    """
+    updates = project.get("updates")
+    summary = {k: v for k, v in project.items() if k != "updates" or not updates}
+    details = {"updates": updates or [], "additional_info": {}}
+    if project.get("tasks"):
+        tasks = []
+        for task in project["tasks"]:
+            task_summary, info = split_task(task)
+            if info is not None:
+                details["additional_info"][task["id"]] = info
+            tasks.append(task_summary)
+        summary["tasks"] = tasks
+    return summary, details
+
+
+def join_project(summary, details):
+    """Inverse of split_project(): a new full project dict (sharing the field values)."""
+    project = dict(summary)
+    if details.get("updates"):
+        project["updates"] = list(details["updates"])
+    notes = details.get("additional_info")
+    if notes and project.get("tasks"):
+        project["tasks"] = [dict(task, additional_info=notes[task["id"]]) if task["id"] in notes else task
+                            for task in project["tasks"]]
+    return project
+
+
+def has_details(details):
+    return bool(details.get("updates") or details.get("additional_info"))
+
+
+class DetailStore:
+    """
+    The per-project detail files in one directory.
+
+    get() validates its cache entry against the file's stat, like DocumentCache,
+    so files rewritten by another process are picked up. Callers serialise
+    writes (data_handler holds the project file's lock around every edit).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._cache = OrderedDict()  # project id -> (stat key, details)
+        self._lock = threading.Lock()
+
+    def path(self, project_id):
+        return os.path.join(self.directory, f"{project_id}.json")
+
+    def read(self, project_id):
+        """Reads a project's details from disk, bypassing the cache."""
+        try:
+            with open(self.path(project_id), "rb") as file:
+                return loads_json(file.read())
+        except FileNotFoundError:
+            return empty_details()
+        except json.JSONDecodeError:
+            print(f"Error decoding JSON from {self.path(project_id)}. Treating it as empty.")
+            return empty_details()
+
+    def get(self, project_id):
+        """Returns a project's details (shared; treat as read-only)."""
+        key = _stat_key(self.path(project_id))
+        with self._lock:
+            cached = self._cache.get(project_id)
+            if cached is not None and cached[0] == key:
+                self._cache.move_to_end(project_id)
+                return cached[1]
+        details = self.read(project_id)
+        self._remember(project_id, key, details)
+        return details
+
+    def put(self, project_id, details):
+        """Writes a project's details atomically (or removes the file when there are none)."""
+        if has_details(details):
+            os.makedirs(self.directory, exist_ok=True)
+            atomic_write_json(self.path(project_id), details)
+        else:
+            self.remove(project_id)
+        self._remember(project_id, _stat_key(self.path(project_id)), details)
+
+    def remove(self, project_id):
+        try:
+            os.remove(self.path(project_id))
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._cache.pop(project_id, None)
+
+    def project_ids(self):
+        """Ids of the projects that have a detail file."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [name[:-5] for name in names if name.endswith(".json")]
+
+    def _remember(self, project_id, key, details):
+        with self._lock:
+            self._cache[project_id] = (key, details)
+            self._cache.move_to_end(project_id)
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def join_document(doc, store):
+    """A single-file document from a split one: every project joined with its details."""
+    if doc.get(LAYOUT_KEY) != SPLIT:
+        return doc
+    joined = {k: v for k, v in doc.items() if k != LAYOUT_KEY}
+    joined["projects"] = [join_project(p, store.read(p["id"])) for p in doc.get("projects", [])]
+    return joined
@@ -0,0 +1,527 @@
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+from .instrument import phase
+from .journal import apply_record, set_fields
+from .safe_io import FileLock, append_json_lines, atomic_write_json, loads_json
+
+# Opt-in write-ahead journal for small edits (see DocumentCache.append).
+JOURNAL_ENABLED = os.getenv("PROJECTTRACKER_JOURNAL", "0") == "1"
+JOURNAL_MAX_BYTES = int(os.getenv("PROJECTTRACKER_JOURNAL_MAX_BYTES", str(1024 * 1024)))
+
+# Opt-in write-behind: saves return at once and reach disk within this many milliseconds.
+WRITE_BEHIND_MS = int(os.getenv("PROJECTTRACKER_WRITE_BEHIND_MS", "0"))
+
+# How many times writer() reruns a read-modify-write that lost a race before giving up.
+CONFLICT_RETRIES = 5
+
+
+class WriteConflict(Exception):
+    """The file changed on disk after the document being stored was read from it."""
+
+
+class RWLock:
+    """
+    Many readers or one writer. Waiting writers go first, so a steady stream of
+    readers can't starve them. The writing thread may re-enter either side;
+    readers must not nest (or upgrade), since a queued writer would block them.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._depth = 0
+        self._waiting = 0
+
+    @contextlib.contextmanager
+    def read(self):
+        with self._cond:
+            owner = self._writer == threading.get_ident()
+            if not owner:
+                while self._writer is not None or self._waiting:
+                    self._cond.wait()
+                self._readers += 1
+        try:
+            yield
+        finally:
+            if not owner:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                self._waiting += 1
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._waiting -= 1
+                self._writer = me
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._depth -= 1
+                if not self._depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+def copy_json(obj):
+    """Deep-copies a JSON-shaped value (dicts, lists and scalars only).
+
+    Noticeably faster than copy.deepcopy because it skips the memo and the
+    generic type dispatch, which JSON documents never need.
+    """
+    if isinstance(obj, dict):
+        return {k: copy_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [copy_json(v) for v in obj]
+    return obj
+
+
+def copy_path(doc, *path):
+    """Copy-on-write step for writers: shallow-copies `doc` and each container on `path`.
+
+    Returns (new root, copied container at the end of `path`). Everything off the
+    path is still shared with `doc`, so only the returned root and the containers
+    along the path may be mutated; copy anything else before changing it.
+    """
+    root = node = dict(doc)
+    for step in path:
+        child = node[step]
+        child = dict(child) if isinstance(child, dict) else list(child)
+        node[step] = child
+        node = child
+    return root, node
+
+
+class DocumentCache:
+    """
+    In-process cache for a single JSON document on disk.
+
+    The parsed document is kept in memory and reused for as long as the file's
+    identity (mtime_ns, size, inode) is unchanged, so an external writer such as
+    OneDrive sync or a second instance invalidates it on the next access.
+
+    - peek() returns the cached document itself; callers must treat it as read-only.
+    - load() returns a private deep copy the caller may mutate freely.
+    - snapshot() returns the cached document and its generation for writers, which
+      build their new version with copy_path() instead of copying everything.
+    - store() writes through to disk with atomic_write_json and then adopts the
+      stored object as the cached document (the caller hands over ownership).
+    - derived() memoizes values computed from the document (e.g. id indexes) for
+      as long as the cached document stays current.
+
+    Every reload or store bumps `generation`. A writer that started from generation N
+    can ask store() to carry derived values forward, updating them incrementally
+    instead of rebuilding them, provided nothing else replaced the document meanwhile.
+
+    With journaling on, append() records small edits as delta lines in
+    `<path>.journal` instead of rewriting the whole file; the journal is folded back
+    into the document by compact() once it grows past JOURNAL_MAX_BYTES and at exit.
+    Every full write stamps a fresh `journal_epoch` into the document, and the
+    journal's first line carries the epoch it continues, so a journal left behind
+    by an interrupted compaction is recognised as already folded in and ignored.
+    A leftover journal is replayed on load whether or not journaling is currently
+    enabled. Together with `revision` the epoch identifies a document's content.
+
+    With write-behind on, store() (and append(), which then defers to it) only swaps
+    the document in memory and wakes a background writer. The writer waits out the
+    debounce window and writes whatever is newest then, so a burst of edits costs one
+    atomic_write_json. Until that write lands the in-memory document is
+    authoritative and the file is not re-checked. flush() writes a pending document
+    immediately; it also runs at exit.
+
+    Threads: the in-memory state (document, generation, derived values) sits behind
+    a reader/writer lock, so lookups run in parallel and only block for the moment
+    a new document is swapped in. Writers are serialised by a separate lock that is
+    held across the whole save, disk write included, so readers never wait on fsync.
+    A (document, derived value) pair handed to a reader stays consistent after the
+    lock is released, because a save carries derived values forward on copies.
+
+    Several processes may share the files. Every write happens under an exclusive
+    lock on `<path>.lock`, and functions wrapped with writer() hold it (plus the
+    in-process lock) for their whole read-modify-write, so their snapshot is
+    re-validated against the file after the lock is taken. store() refuses a
+    document whose base is older than the file (WriteConflict) and writer() reruns
+    the function on the fresh document. Each save also bumps the document's
+    `revision` stamp. Write-behind keeps the document in memory, so it only
+    takes the file lock for the background write and assumes a single backend.
+    """
+
+    def __init__(self, path, empty, journal=JOURNAL_ENABLED, write_behind_ms=WRITE_BEHIND_MS):
+        """
+        Args:
+            path:            JSON file backing the document.
+            empty:           Callable returning a fresh document when the file is missing or corrupt.
+            journal:         Record append() edits in the journal instead of rewriting the file.
+            write_behind_ms: Debounce window for background writes; 0 writes synchronously.
+        """
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.journal = journal
+        self._empty = empty
+        self._doc = None
+        self._key = None
+        self._journal_epoch = None  # epoch of the journal on disk, once verified
+        self._derived = {}
+        self._building = {}  # name -> carry updates saved meanwhile, or None once they can't be caught up
+        self._build_locks = {}
+        self.generation = 0
+        self._rw = RWLock()                    # guards the in-memory state
+        self._lock = threading.RLock()         # serialises writers (with _file_lock across processes)
+        self._file_lock = FileLock(path + ".lock")
+        self.write_behind = write_behind_ms / 1000
+        self._pending = None                   # document waiting for the background writer
+        self._write_lock = threading.Lock()    # one background write at a time (writer thread vs flush)
+        self._wake = threading.Event()
+        self._writer = None
+        if journal:
+            atexit.register(self.compact)
+        if self.write_behind:
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _stat_key(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _file_key(self):
+        return (self._stat_key(self.path), self._stat_key(self.journal_path))
+
+    def _read(self):
+        self._journal_epoch = None
+        if not os.path.exists(self.path):
+            doc = self._empty()
+        else:
+            try:
+                with open(self.path, 'rb') as file:
+                    doc = loads_json(file.read())
+            except json.JSONDecodeError:
+                return self._recover()
+        return self._replay(doc)
+
+    def _recover(self):
+        """Returns the document to use when the file can't be parsed."""
+        print(f"Error decoding JSON from {self.path}. Returning empty document.")
+        return self._empty()
+
+    def _replay(self, doc):
+        """Applies a leftover journal whose epoch matches the document."""
+        if not os.path.exists(self.journal_path):
+            return doc
+        records = []
+        with open(self.journal_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # torn final line from a crash mid-append
+        if not records or records[0].get("epoch") != doc.get("journal_epoch"):
+            return doc  # already folded in by a compaction that didn't get to delete it
+        for record in records[1:]:
+            apply_record(doc, record)
+        self._journal_epoch = records[0]["epoch"]
+        return doc
+
+    def version(self):
+        """Returns an opaque token that changes whenever the document changes.
+
+        Only stats the files, so callers can compare versions without loading anything.
+        While a write-behind save is pending the in-memory generation stands in for it.
+        """
+        with self._rw.read():
+            return self._file_key(), (self.generation if self._pending is not None else None)
+
+    def _fresh(self, key):
+        return self._doc is not None and (key == self._key or self._pending is not None)
+
+    def _current(self):
+        """Returns (document, generation), re-reading the file if it changed on disk."""
+        # Stat before reading: if the file changes in between, the stored key is
+        # older than the content and the next access simply reloads once more.
+        key = self._file_key()
+        with self._rw.read():
+            if self._fresh(key):
+                return self._doc, self.generation
+        with self._rw.write():
+            key = self._file_key()
+            if not self._fresh(key):  # unless another thread reloaded while we waited
+                with phase("load"):
+                    self._doc = self._read()
+                self._key = key
+                self._derived = {}
+                self._building = dict.fromkeys(self._building)
+                self.generation += 1
+            return self._doc, self.generation
+
+    def peek(self):
+        """Returns the cached document, re-reading the file if it changed on disk."""
+        return self._current()[0]
+
+    def load(self):
+        """Returns a deep copy of the document that is safe to mutate."""
+        return copy_json(self.peek())
+
+    def snapshot(self):
+        """Returns (cached document, its generation) for a copy-on-write writer."""
+        return self._current()
+
+    def derived(self, name, build):
+        """
+        Returns (document, build(document)), computing the value once per generation.
+
+        The build runs without the cache's locks, so a slow one (the search index)
+        holds up neither readers nor saves; one thread builds each name at a time.
+        Saves that land meanwhile hand their carry updates to it, and it is
+        published after catching up with them. If one can't be caught up (a reload,
+        or a save that doesn't carry `name`), it is returned with the document it
+        was built from and not kept.
+        """
+        key = self._file_key()
+        with self._rw.read():
+            if self._fresh(key) and name in self._derived:
+                return self._doc, self._derived[name]
+        with self._build_locks.setdefault(name, threading.Lock()):
+            with self._rw.write():
+                doc, _ = self._current()
+                if name in self._derived:
+                    return doc, self._derived[name]
+                self._building[name] = []
+            try:
+                value = build(doc)
+            except BaseException:
+                with self._rw.write():
+                    del self._building[name]
+                raise
+            with self._rw.write():
+                missed = self._building.pop(name)
+                if missed is None:
+                    return doc, value
+                for update in missed:
+                    update(value)
+                self._derived[name] = value
+                return self._doc, value
+
+    def cached(self, name):
+        """Returns (document, derived value) if `name` is built for the current document, else None."""
+        with self._rw.read():
+            if self._doc is not None and name in self._derived:
+                return self._doc, self._derived[name]
+        return None
+
+    def store(self, doc, base=None, carry=None):
+        """
+        Writes the document to disk atomically and makes it the cached copy.
+
+        Args:
+            doc:   The new document; the cache keeps a reference to it.
+            base:  Generation the caller checked the document out from. If the
+                   document was stored again since (in this process or, going by the
+                   file, another one), raises WriteConflict.
+            carry: {name: update} for derived values to keep. Each update is called
+                   with the value and must bring it in line with `doc` (None means
+                   the change does not affect it). A value with a copy() method is
+                   copied first and the copy updated, since readers may still be
+                   using the old one with the previous document; values without
+                   one (the search index) are updated in place and must guard
+                   themselves. Carried values are only kept when `base` is still
+                   the current generation; all other derived values are dropped
+                   and rebuilt on demand.
+        """
+        with self.locked():
+            doc["revision"] = doc.get("revision", 0) + 1
+            self._store(doc, base, carry)
+
+    def _store(self, doc, base, carry):
+        if base is not None and base != self.generation:
+            raise WriteConflict(f"{self.path} was stored since generation {base} was read")
+        # A new epoch marks any existing journal as folded into this write, and
+        # tells this document apart from others that reached the same revision.
+        doc["journal_epoch"] = uuid.uuid4().hex
+        if self.write_behind:
+            with self._rw.write():
+                self._adopt(doc, base, carry)
+                self._pending = doc
+            self._start_writer()
+            self._wake.set()
+            return
+        if base is not None and self._key is not None and self._file_key() != self._key:
+            raise WriteConflict(f"{self.path} was changed by another process")
+        try:
+            self._write(doc)
+        except Exception:
+            self.invalidate()
+            raise
+        with self._rw.write():
+            self._adopt(doc, base, carry)
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Holds the writer lock and, unless in write-behind mode, the file lock."""
+        with self._lock:
+            if self.write_behind:
+                yield
+            else:
+                with self._file_lock:
+                    yield
+
+    def writer(self, fn):
+        """
+        Decorator for read-modify-write functions built on snapshot() and store()/append().
+
+        Runs `fn` under locked(), so its snapshot reflects the latest file, and reruns
+        it from a fresh snapshot if the store still hits a WriteConflict.
+        """
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(CONFLICT_RETRIES):
+                with self.locked():
+                    try:
+                        return fn(*args, **kwargs)
+                    except WriteConflict:
+                        if attempt == CONFLICT_RETRIES - 1:
+                            raise
+                        self.invalidate()
+        return wrapper
+
+    def _write(self, doc):
+        """Writes `doc` and retires the journal it supersedes."""
+        journal_exists = os.path.exists(self.journal_path)
+        atomic_write_json(self.path, doc)
+        self._journal_epoch = None
+        if journal_exists:
+            try:
+                os.remove(self.journal_path)
+            except OSError:
+                pass  # stale epoch; ignored on replay and replaced by the next store
+
+    def flush(self):
+        """Writes a pending write-behind document now; returns once it is on disk."""
+        if not self.write_behind:
+            return
+        # Only the write lock is held while writing, so readers and new saves aren't
+        # blocked; it also keeps an older document from landing after a newer one.
+        with self._write_lock:
+            with self._rw.read():
+                doc = self._pending
+            if doc is None:
+                return
+            with self._file_lock:
+                self._write(doc)
+            with self._rw.write():
+                if self._pending is doc:
+                    self._pending = None
+                    if self._doc is doc:
+                        self._key = self._file_key()
+
+    def _start_writer(self):
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_behind_loop, daemon=True,
+                                            name=f"write-behind {os.path.basename(self.path)}")
+            self._writer.start()
+
+    def _write_behind_loop(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.write_behind)  # let the rest of the burst arrive
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing {self.path} in the background: {e}. Retrying.")
+                self._wake.set()
+
+    def append(self, doc, records, base=None, carry=None):
+        """
+        Persists an edit as journal records instead of rewriting the whole file.
+
+        `doc` must already contain the edit; `records` (see journal.py) describe it so
+        it can be replayed on load. Falls back to store() when journaling is off or
+        write-behind is on, when the document has no epoch yet, or when the files
+        changed behind our back.
+        """
+        with self.locked():
+            if (not self.journal or self.write_behind or "journal_epoch" not in doc or base != self.generation
+                    or self._file_key() != self._key):
+                return self.store(doc, base, carry)
+            if os.path.exists(self.journal_path):
+                if self._journal_epoch != doc["journal_epoch"]:
+                    return self.store(doc, base, carry)
+                lines = []
+            else:
+                lines = [{"epoch": doc["journal_epoch"]}]
+            doc["revision"] = doc.get("revision", 0) + 1
+            lines += list(records) + [set_fields([], {"revision": doc["revision"]})]
+            try:
+                size = append_json_lines(self.journal_path, lines)
+            except Exception:
+                self.invalidate()
+                raise
+            self._journal_epoch = doc["journal_epoch"]
+            with self._rw.write():
+                self._adopt(doc, base, carry)
+            if size > JOURNAL_MAX_BYTES:
+                self.compact()
+
+    def compact(self):
+        """Folds a pending journal into the document file with one atomic write."""
+        if not os.path.exists(self.journal_path):
+            return
+        with self.locked():
+            if not os.path.exists(self.journal_path):
+                return
+            doc, generation = self.snapshot()
+            with self._rw.read():
+                keep = dict.fromkeys([*self._derived, *self._building])
+            self._store(doc, generation, keep)
+
+    def _adopt(self, doc, base, carry):
+        """Makes a just-persisted document current, carrying derived values if valid (write lock held)."""
+        kept = {}
+        valid = carry and base is not None and base == self.generation
+        for name, missed in self._building.items():
+            if missed is not None:
+                if valid and name in carry:
+                    if carry[name] is not None:
+                        missed.append(carry[name])
+                else:
+                    self._building[name] = None
+        if valid:
+            for name, update in carry.items():
+                if name in self._derived:
+                    value = self._derived[name]
+                    if update is not None:
+                        if hasattr(value, "copy"):
+                            value = value.copy()
+                        update(value)
+                    kept[name] = value
+        self._doc = doc
+        self._key = self._file_key()
+        self._derived = kept
+        self.generation += 1
+
+    def invalidate(self):
+        """Drops the cached document so the next access re-reads the file."""
+        self.flush()
+        with self._rw.write():
+            self._doc = None
+            self._key = None
+            self._journal_epoch = None
+            self._derived = {}
+            self._building = dict.fromkeys(self._building)
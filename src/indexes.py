@@ -0,0 +1,315 @@
+"""
+Id and status indexes over the project and flashcard documents.
+
+Indexes store list positions rather than object references, so an index built from
+the cached document also resolves lookups on a private copy of it (the copy has the
+same layout). Every lookup checks the id at the stored position, so a stale index
+degrades to a linear scan instead of returning the wrong record.
+
+Writers never change an index a reader may hold: DocumentCache carries an index to
+the next document by updating a copy() of it. A copy shares its containers with the
+original and copies each one the first time it changes it. Maps that can hold
+every task or card are ShardedMaps, so that costs one shard; the smaller project
+and date maps are plain dicts, copied whole.
+"""
+import bisect
+import itertools
+
+SHARDS = 64
+
+
+class ShardedMap:
+    """
+    Dict-like map split into SHARDS dicts by key hash. copy() shares every shard
+    with the original; each side copies a shard on its first write to it. Iteration
+    order is by shard, not insertion.
+    """
+    __slots__ = ("_shards", "_owned")
+
+    def __init__(self, mapping=None):
+        self._shards = shards = [{} for _ in range(SHARDS)]
+        self._owned = [True] * SHARDS
+        for key, value in (mapping or {}).items():
+            shards[hash(key) % SHARDS][key] = value
+
+    def copy(self):
+        clone = ShardedMap.__new__(ShardedMap)
+        clone._shards = list(self._shards)
+        clone._owned = [False] * SHARDS
+        self._owned = [False] * SHARDS
+        return clone
+
+    def _writable(self, key):
+        i = hash(key) % SHARDS
+        if not self._owned[i]:
+            self._shards[i] = dict(self._shards[i])
+            self._owned[i] = True
+        return self._shards[i]
+
+    def get(self, key, default=None):
+        return self._shards[hash(key) % SHARDS].get(key, default)
+
+    def get_many(self, keys):
+        """[get(key) for key in keys], in one call."""
+        shards = self._shards
+        return [shards[hash(key) % SHARDS].get(key) for key in keys]
+
+    def __getitem__(self, key):
+        return self._shards[hash(key) % SHARDS][key]
+
+    def __contains__(self, key):
+        return key in self._shards[hash(key) % SHARDS]
+
+    def __setitem__(self, key, value):
+        self._writable(key)[key] = value
+
+    def setdefault(self, key, default=None):
+        shard = self._shards[hash(key) % SHARDS]
+        if key in shard:
+            return shard[key]
+        self._writable(key)[key] = default
+        return default
+
+    def pop(self, key, *default):
+        if key not in self._shards[hash(key) % SHARDS]:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        return self._writable(key).pop(key)
+
+    def __len__(self):
+        return sum(map(len, self._shards))
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._shards)
+
+    def items(self):
+        return itertools.chain.from_iterable(shard.items() for shard in self._shards)
+
+    def __eq__(self, other):
+        if isinstance(other, ShardedMap):
+            other = dict(other.items())
+        return dict(self.items()) == other
+
+
+def _status_set(by_status, status):
+    ids = by_status.get(status)
+    if ids is None:
+        ids = by_status[status] = ShardedMap()
+    return ids
+
+
+class ProjectIndex:
+    """Indexes projects and tasks by id, and both by status."""
+
+    def __init__(self, data):
+        self.projects = {}        # project id -> position in data['projects']
+        tasks, project_status, task_status = {}, {}, {}
+        for pos, project in enumerate(data.get('projects', [])):
+            self.projects.setdefault(project['id'], pos)
+            project_status.setdefault(project.get('status'), {})[project['id']] = None
+            for task_pos, task in enumerate(project.get('tasks', [])):
+                tasks.setdefault(task['id'], (project['id'], task_pos))
+                task_status.setdefault(task.get('status'), {})[task['id']] = None
+        self.tasks = ShardedMap(tasks)  # task id -> (project id, position in project['tasks'])
+        self.project_status = {status: ShardedMap(ids) for status, ids in project_status.items()}  # used as sets
+        self.task_status = {status: ShardedMap(ids) for status, ids in task_status.items()}
+        self._projects_shared = False
+
+    def copy(self):
+        clone = ProjectIndex.__new__(ProjectIndex)
+        clone.projects = self.projects
+        clone.tasks = self.tasks.copy()
+        clone.project_status = {status: ids.copy() for status, ids in self.project_status.items()}
+        clone.task_status = {status: ids.copy() for status, ids in self.task_status.items()}
+        clone._projects_shared = self._projects_shared = True
+        return clone
+
+    # --- maintenance ---
+
+    def add_project(self, project, pos):
+        if project['id'] not in self.projects:
+            if self._projects_shared:
+                self.projects = dict(self.projects)
+                self._projects_shared = False
+            self.projects[project['id']] = pos
+        _status_set(self.project_status, project.get('status'))[project['id']] = None
+
+    def add_task(self, project_id, task, pos):
+        self.tasks.setdefault(task['id'], (project_id, pos))
+        _status_set(self.task_status, task.get('status'))[task['id']] = None
+
+    def set_project_status(self, project_id, old, new):
+        if old != new:
+            self.project_status.get(old, {}).pop(project_id, None)
+            _status_set(self.project_status, new)[project_id] = None
+
+    def set_task_status(self, task_id, old, new):
+        if old != new:
+            self.task_status.get(old, {}).pop(task_id, None)
+            _status_set(self.task_status, new)[task_id] = None
+
+    # --- lookups ---
+
+    def project_pos(self, data, project_id):
+        """Returns the position of `project_id` in data['projects'], or None."""
+        projects = data.get('projects', [])
+        pos = self.projects.get(project_id)
+        if pos is not None and pos < len(projects) and projects[pos]['id'] == project_id:
+            return pos
+        return next((i for i, p in enumerate(projects) if p['id'] == project_id), None)
+
+    def task_pos(self, data, task_id):
+        """Returns (project position, task position) for `task_id`, or (None, None)."""
+        project_id, pos = self.tasks.get(task_id, (None, None))
+        project_pos = self.project_pos(data, project_id) if project_id else None
+        if project_pos is not None:
+            tasks = data['projects'][project_pos].get('tasks', [])
+            if pos < len(tasks) and tasks[pos]['id'] == task_id:
+                return project_pos, pos
+        for project_pos, project in enumerate(data.get('projects', [])):
+            for pos, task in enumerate(project.get('tasks', [])):
+                if task['id'] == task_id:
+                    return project_pos, pos
+        return None, None
+
+    def project(self, data, project_id):
+        """Returns the project with `project_id` from `data`, or None."""
+        pos = self.project_pos(data, project_id)
+        return None if pos is None else data['projects'][pos]
+
+    def task(self, data, task_id):
+        """Returns (project, task) for `task_id` from `data`, or (None, None)."""
+        project_pos, pos = self.task_pos(data, task_id)
+        if project_pos is None:
+            return None, None
+        project = data['projects'][project_pos]
+        return project, project['tasks'][pos]
+
+    def projects_with_status(self, data, statuses):
+        """Returns the projects whose status is in `statuses`, in document order."""
+        ids = [pid for status in dict.fromkeys(statuses) for pid in self.project_status.get(status, {})]
+        ids.sort(key=self.projects.__getitem__)
+        return [self.project(data, pid) for pid in ids]
+
+    def tasks_with_status(self, data, statuses):
+        """Returns (project, task) pairs whose task status is in `statuses`, in document order."""
+        ids = [tid for status in dict.fromkeys(statuses) for tid in self.task_status.get(status, {})]
+        located = sorted(zip(ids, self.tasks.get_many(ids)),
+                         key=lambda item: (self.projects[item[1][0]], item[1][1]))
+        projects, pairs = data.get('projects', []), []
+        for task_id, (project_id, pos) in located:
+            project_pos = self.projects[project_id]
+            project = projects[project_pos] if project_pos < len(projects) else None
+            tasks = project.get('tasks', []) if project is not None and project['id'] == project_id else []
+            if pos < len(tasks) and tasks[pos]['id'] == task_id:
+                pairs.append((project, tasks[pos]))
+            else:
+                pairs.append(self.task(data, task_id))
+        return pairs
+
+
+class CardIndex:
+    """Indexes flashcards by id."""
+
+    def __init__(self, data):
+        cards = {}  # card id -> position in data['cards']
+        for pos, card in enumerate(data.get('cards', [])):
+            cards.setdefault(card['id'], pos)
+        self.cards = ShardedMap(cards)
+
+    def copy(self):
+        clone = CardIndex.__new__(CardIndex)
+        clone.cards = self.cards.copy()
+        return clone
+
+    def add_card(self, card, pos):
+        self.cards.setdefault(card['id'], pos)
+
+    def card_pos(self, data, card_id):
+        """Returns the position of `card_id` in data['cards'], or None."""
+        cards = data.get('cards', [])
+        pos = self.cards.get(card_id)
+        if pos is not None and pos < len(cards) and cards[pos]['id'] == card_id:
+            return pos
+        return next((i for i, c in enumerate(cards) if c['id'] == card_id), None)
+
+    def card(self, data, card_id):
+        """Returns the card with `card_id` from `data`, or None."""
+        pos = self.card_pos(data, card_id)
+        return None if pos is None else data['cards'][pos]
+
+
+class DueQueue:
+    """
+    Flashcards bucketed by review date, for O(log D) rescheduling (D = distinct dates).
+
+    `dates` is the sorted list of bucket keys, so the next due card is the first
+    card of the earliest bucket and counting due cards only touches overdue dates.
+    Cards without a review_date are never due and are left out.
+    """
+
+    def __init__(self, data):
+        self.buckets = {}             # review_date -> {card id: None}, used as an ordered set
+        self.dates = []               # sorted keys of `buckets`
+        self.card_date = {}           # card id -> review_date
+        self._shared = set()          # dates whose bucket is shared with a copy
+        for card in data.get('cards', []):
+            self.schedule(card['id'], card.get('review_date'))
+        self.card_date = ShardedMap(self.card_date)
+
+    def copy(self):
+        clone = DueQueue.__new__(DueQueue)
+        clone.buckets = dict(self.buckets)
+        clone.dates = list(self.dates)
+        clone.card_date = self.card_date.copy()
+        clone._shared = set(self.buckets)
+        self._shared = set(self.buckets)
+        return clone
+
+    def _bucket(self, review_date):
+        """The bucket for `review_date`, copied first if it is shared."""
+        bucket = self.buckets[review_date]
+        if review_date in self._shared:
+            bucket = self.buckets[review_date] = dict(bucket)
+            self._shared.discard(review_date)
+        return bucket
+
+    def schedule(self, card_id, review_date):
+        """Adds or moves `card_id` to the bucket for `review_date`."""
+        self.remove(card_id)
+        if not review_date:
+            return
+        if review_date in self.buckets:
+            bucket = self._bucket(review_date)
+        else:
+            bucket = self.buckets[review_date] = {}
+            bisect.insort(self.dates, review_date)
+        bucket[card_id] = None
+        self.card_date[card_id] = review_date
+
+    def remove(self, card_id):
+        review_date = self.card_date.pop(card_id, None)
+        if review_date is None:
+            return
+        bucket = self._bucket(review_date)
+        bucket.pop(card_id, None)
+        if not bucket:
+            del self.buckets[review_date]
+            self._shared.discard(review_date)
+            del self.dates[bisect.bisect_left(self.dates, review_date)]
+
+    def next_due(self, today):
+        """Returns the id of the most overdue card due on or before `today`, or None."""
+        if self.dates and self.dates[0] <= today:
+            return next(iter(self.buckets[self.dates[0]]))
+        return None
+
+    def due_count(self, today):
+        """Returns how many cards are due on or before `today`."""
+        return sum(len(self.buckets[d]) for d in self.dates[:bisect.bisect_right(self.dates, today)])
+
+    def due_ids(self, today):
+        """Yields due card ids, most overdue first."""
+        for d in self.dates[:bisect.bisect_right(self.dates, today)]:
+            yield from self.buckets[d]
@@ -0,0 +1,189 @@
+"""
+Opt-in request instrumentation, enabled with PROJECTTRACKER_PROFILE=1.
+
+Each request's time is split into phases and aggregated into per-route histograms,
+served as JSON at /__stats (add ?reset=1 to clear). The phases are:
+
+    load             reading and parsing a JSON data file (plus journal replay)
+    render           Jinja template rendering
+    write.serialize  json.dump of a full save, write.fsync and write.replace (incl. retries)
+    write.journal    appending journal lines
+    query            everything else in the view: filtering, sorting, building rows
+
+Sending the header `X-Profile: 1` or adding `?_profile=1` also runs that request
+under cProfile and dumps a .pstats file to PROJECTTRACKER_PROFILE_DIR (default: a
+`profiles` folder in the data directory); the response's X-Profile-Dump header
+names it. Inspect it with `python -m pstats <file>`.
+
+When disabled nothing is registered with the app, and phase() hands back a shared
+no-op context manager, so the data layer pays one function call per timed block.
+"""
+import bisect
+import contextlib
+import os
+import threading
+import time
+from datetime import datetime
+
+ENABLED = os.getenv("PROJECTTRACKER_PROFILE", "0") == "1"
+PROFILE_DIR = os.getenv("PROJECTTRACKER_PROFILE_DIR") or os.path.join(
+    os.getenv("PROJECTTRACKER_DATA_DIR", os.getcwd()), "profiles")
+
+# Upper bucket bounds in milliseconds; the last bucket is open-ended.
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_NOOP = contextlib.nullcontext()
+_local = threading.local()
+_lock = threading.Lock()
+_routes = {}  # "METHOD rule" -> {"total": Histogram, "phases": {name: Histogram}}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with count, sum and max."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th percentile (max for the open bucket)."""
+        target, seen = self.count * pct / 100, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else round(self.max, 3)
+        return 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": {f"<={b}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}": n
+                        for i, (b, n) in enumerate(zip(BUCKETS_MS + (None,), self.counts)) if n},
+        }
+
+
+class _Phase:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        add(self.name, time.perf_counter() - self.start)
+
+
+def phase(name):
+    """Context manager timing a block as phase `name` of the current request."""
+    if not ENABLED:
+        return _NOOP
+    return _Phase(name)
+
+
+def add(name, seconds):
+    """Adds `seconds` to phase `name` of the current request (ignored outside requests)."""
+    phases = getattr(_local, "phases", None)
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+def stats(reset=False):
+    """Returns the per-route histograms as a JSON-ready dict."""
+    with _lock:
+        result = {route: {"total": entry["total"].to_dict(),
+                          "phases": {name: h.to_dict() for name, h in sorted(entry["phases"].items())}}
+                  for route, entry in sorted(_routes.items())}
+        if reset:
+            _routes.clear()
+    return result
+
+
+def _record(route, total, phases):
+    phases = dict(phases)
+    phases["query"] = max(total - sum(phases.values()), 0.0)
+    with _lock:
+        entry = _routes.setdefault(route, {"total": Histogram(), "phases": {}})
+        entry["total"].observe(total * 1e3)
+        for name, seconds in phases.items():
+            entry["phases"].setdefault(name, Histogram()).observe(seconds * 1e3)
+
+
+def init_app(app):
+    """Registers the timing hooks and /__stats on `app` when instrumentation is enabled."""
+    if not ENABLED:
+        return
+
+    import cProfile
+    from flask import g, jsonify, request
+    from flask.signals import before_render_template, template_rendered
+
+    def render_started(sender, **extra):
+        _local.render_start = time.perf_counter()
+
+    def render_finished(sender, **extra):
+        start = getattr(_local, "render_start", None)
+        if start is not None:
+            add("render", time.perf_counter() - start)
+            _local.render_start = None
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    @app.before_request
+    def start_request():
+        _local.phases = {}
+        g.instrument_start = time.perf_counter()
+        if request.headers.get("X-Profile") == "1" or request.args.get("_profile") == "1":
+            endpoint = (request.endpoint or "unknown").replace("/", "_")
+            g.profile_path = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{endpoint}.pstats")
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    def finish(route, start, profiler, profile_path):
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(profile_path)
+        phases, _local.phases = getattr(_local, "phases", None), None
+        if route is not None:
+            _record(route, time.perf_counter() - start, phases or {})
+
+    def pop_request_state():
+        route = None
+        if request.url_rule is not None and request.endpoint not in ("stats_view", "static"):
+            route = f"{request.method} {request.url_rule.rule}"
+        return route, g.pop("instrument_start"), g.pop("profiler", None), g.pop("profile_path", None)
+
+    @app.after_request
+    def finish_streamed(response):
+        if "profile_path" in g:
+            response.headers["X-Profile-Dump"] = g.profile_path
+        if response.is_streamed and "instrument_start" in g:
+            # The body is rendered while it is sent, after the request context is gone.
+            state = pop_request_state()
+            response.call_on_close(lambda: finish(*state))
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        if "instrument_start" in g:
+            finish(*pop_request_state())
+
+    @app.route("/__stats")
+    def stats_view():
+        return jsonify(stats(reset=request.args.get("reset") == "1"))
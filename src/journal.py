@@ -0,0 +1,58 @@
+"""
+Delta records for the write-ahead journal kept next to a JSON document.
+
+A record names a location in the document by a path of dict keys and list
+selectors ({"id": ...}) and says what to do there:
+
+    {"op": "set",    "path": [...], "value": {field: value, ...}}   # merge fields into a dict
+    {"op": "append", "path": [...], "value": item}                  # append item to a list
+    {"op": "remove", "path": [...], "id": item_id}                  # drop item from a list
+
+Every op is idempotent (appends skip ids that are already present), so replaying
+a journal over a document that already contains some of its records is harmless.
+"""
+
+
+def set_fields(path, fields):
+    return {"op": "set", "path": path, "value": fields}
+
+
+def append_item(path, item):
+    return {"op": "append", "path": path, "value": item}
+
+
+def remove_item(path, item_id):
+    return {"op": "remove", "path": path, "id": item_id}
+
+
+def _resolve(doc, path, create_list=False):
+    """Follows `path` through `doc`; returns None if any step is missing."""
+    node = doc
+    for i, step in enumerate(path):
+        if isinstance(step, dict):
+            node = next((item for item in node if item.get("id") == step["id"]), None)
+        elif create_list and i == len(path) - 1:
+            node = node.setdefault(step, [])
+        else:
+            node = node.get(step)
+        if node is None:
+            return None
+    return node
+
+
+def apply_record(doc, record):
+    """Applies one journal record to `doc` in place."""
+    op = record["op"]
+    if op == "set":
+        target = _resolve(doc, record["path"])
+        if target is not None:
+            target.update(record["value"])
+    elif op == "append":
+        target = _resolve(doc, record["path"], create_list=True)
+        item = record["value"]
+        if target is not None and not any(existing.get("id") == item.get("id") for existing in target):
+            target.append(item)
+    elif op == "remove":
+        target = _resolve(doc, record["path"])
+        if target is not None:
+            target[:] = [item for item in target if item.get("id") != record["id"]]
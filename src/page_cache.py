@@ -0,0 +1,63 @@
+"""
+In-memory cache of rendered responses for the read-only views.
+
+The key is the request's ETag (see app.request_etag) plus the content coding
+the response is sent in. The ETag covers the route, the query arguments, the
+stylesheet, today's date and the version token of every data file the view
+reads, so an edit (in this process or another one) changes the key and old
+entries are simply never asked for again. They age out of the LRU, which is
+capped by the bytes of the stored bodies (PROJECTTRACKER_PAGE_CACHE_MB,
+default 32; 0 turns the cache off).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+MAX_BYTES = int(float(os.getenv("PROJECTTRACKER_PAGE_CACHE_MB", 32)) * 1024 * 1024)
+
+
+class PageCache:
+    """LRU of rendered bodies, (body, content type, content encoding) per key, with hit and miss counters."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, content_type, encoding=None):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._entries[key] = (body, content_type, encoding)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (evicted, _, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry and zeroes the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
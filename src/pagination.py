@@ -0,0 +1,63 @@
+"""
+Keyset (cursor) pagination over in-memory rows.
+
+A page is the `limit` rows that sort right after the cursor, and the cursor is the
+encoded sort key of the last row handed out. Sort keys must be unique (end them
+with the row id), so pages never skip or repeat rows when rows are added or
+removed between requests, unlike offset paging.
+"""
+import base64
+import heapq
+import itertools
+import json
+
+
+def encode_cursor(key):
+    """Encodes a sort key tuple as an opaque, URL-safe cursor string."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, width=None):
+    """
+    Decodes a cursor back into its sort key tuple; None for a missing or malformed
+    cursor, including one that isn't `width` strings long (every sort key here is
+    a tuple of strings, so anything else can't be compared with the rows' keys).
+    """
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(key, list) or not all(isinstance(part, str) for part in key):
+        return None
+    if width is not None and len(key) != width:
+        return None
+    return tuple(key)
+
+
+def paginate(rows, key, after=None, limit=100, reverse=False):
+    """
+    Returns (page, next cursor or None) for the rows sorting after `after`.
+
+    Only the page is sorted (heap selection), so a page costs O(n log limit)
+    rather than a full sort of every row.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return [], None
+    rows = itertools.chain([first], rows)
+    after_key = decode_cursor(after, width=len(key(first)))
+    if after_key is not None:
+        if reverse:
+            rows = (row for row in rows if key(row) < after_key)
+        else:
+            rows = (row for row in rows if key(row) > after_key)
+    pick = heapq.nlargest if reverse else heapq.nsmallest
+    page = pick(limit + 1, rows, key=key)
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_cursor(key(page[-1]))
+    return page, None
@@ -1,14 +1,77 @@
 import json
 import os
 import tempfile
+import threading
 import time
 
+from .instrument import phase
+
+try:
+    import orjson  # optional; several times faster than the stdlib encoder and decoder
+except ImportError:
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Data files are written compactly unless PROJECTTRACKER_JSON_INDENT asks for
+# pretty-printing (e.g. for hand-editing); readers accept either.
+def _indent_setting(value):
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Invalid PROJECTTRACKER_JSON_INDENT {value!r}. Writing compact JSON.")
+        return None
+
+
+DEFAULT_INDENT = _indent_setting(os.getenv("PROJECTTRACKER_JSON_INDENT"))
+
+
+def dumps_json(obj, *, indent=None, ensure_ascii=False) -> bytes:
+    """
+    Encodes obj as UTF-8 JSON bytes.
+
+    Compact output (indent=None) goes through orjson when it's installed. Anything
+    orjson refuses (integers beyond 64 bits, lone surrogates, non-string keys) and
+    all pretty or ASCII-only output fall back to the stdlib encoder, so the result
+    parses back to the same document. (The one value orjson changes is a NaN or
+    infinite float, written as null; the tracker never stores those.)
+    """
+    if orjson is not None and indent is None and not ensure_ascii:
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            pass
+    separators = (",", ":") if indent is None else None
+    return json.dumps(obj, indent=indent, ensure_ascii=ensure_ascii, separators=separators).encode("utf-8")
+
+
+def loads_json(data: bytes):
+    """
+    Decodes JSON from bytes read straight off disk, with orjson when available.
+
+    Falls back to the stdlib parser for input orjson rejects but json.load accepts
+    (NaN/Infinity literals, huge integers). Raises json.JSONDecodeError when neither
+    can parse it.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data.decode("utf-8"))
+
 
 def atomic_write_json(
     path: str,
     obj,
     *,
-    indent: int = 4,
+    indent=DEFAULT_INDENT,
     ensure_ascii: bool = False,
     retries: int = 5,
     delay: float = 0.2,
@@ -16,20 +79,29 @@ def atomic_write_json(
     """
     Atomically write a JSON file with fsync + same-directory temp file and retries.
 
-    Why this works:
-    - We write to a temporary file in the SAME directory as the target, then os.replace().
-      On Windows (10/11) this is atomic at the filesystem level.
-    - fsync() ensures data hits disk before replace().
-    - Retries handle brief locks from sync clients (e.g., OneDrive) or AV scanners.
-
     Args:
         path: Destination JSON file path.
         obj:  JSON-serializable object.
-        indent: json.dump indent.
-        ensure_ascii: json.dump ensure_ascii.
+        indent: Pretty-print with this indent; None (the default) writes compact JSON.
+        ensure_ascii: Escape non-ASCII characters.
         retries: Number of replace retries on transient errors.
         delay: Seconds to sleep between retries.
     """
+    with phase("write.serialize"):
+        data = dumps_json(obj, indent=indent, ensure_ascii=ensure_ascii)
+    atomic_write_bytes(path, [data], retries=retries, delay=delay)
+
+
+def atomic_write_bytes(path: str, chunks, *, retries: int = 5, delay: float = 0.2) -> None:
+    """
+    Atomically replace `path` with the concatenated byte `chunks`.
+
+    Why this works:
+    - We write to a temporary file in the SAME directory as the target, then os.replace().
+      On Windows (10/11) this is atomic at the filesystem level.
+    - fsync() ensures data hits disk before replace().
+    - Retries handle brief locks from sync clients (e.g., OneDrive) or AV scanners.
+    """
     dirpath = os.path.dirname(os.path.abspath(path)) or "."
     os.makedirs(dirpath, exist_ok=True)
 
@@ -41,21 +113,25 @@ def atomic_write_json(
     )
 
     try:
-        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
-            json.dump(obj, tmp, indent=indent, ensure_ascii=ensure_ascii)
-            tmp.flush()
-            os.fsync(tmp.fileno())
+        with os.fdopen(fd, "wb") as tmp:
+            with phase("write.serialize"):
+                for chunk in chunks:
+                    tmp.write(chunk)
+                tmp.flush()
+            with phase("write.fsync"):
+                os.fsync(tmp.fileno())
 
         # Try to replace a few times to tolerate brief locks (e.g., OneDrive)
-        for i in range(retries):
-            try:
-                os.replace(tmp_path, path)
-                return
-            except (PermissionError, OSError) as e:
-                if i < retries - 1:
-                    time.sleep(delay)
-                else:
-                    raise e
+        with phase("write.replace"):
+            for i in range(retries):
+                try:
+                    os.replace(tmp_path, path)
+                    return
+                except (PermissionError, OSError) as e:
+                    if i < retries - 1:
+                        time.sleep(delay)
+                    else:
+                        raise e
     finally:
         # If replace succeeded, tmp_path no longer exists. If it failed, clean up.
         try:
@@ -64,3 +140,91 @@ def atomic_write_json(
         except OSError:
             # Best-effort cleanup; don't mask the original, more important error.
             pass
+
+
+def append_json_lines(path: str, records) -> int:
+    """
+    Append JSON records to a JSON-lines file and fsync before returning.
+
+    Each record is serialized compactly on its own line and the whole batch goes out
+    in a single write, so a crash can at worst leave one truncated final line (which
+    readers skip). Returns the file size after the append.
+    """
+    payload = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records)
+    with phase("write.journal"), open(path, "a", encoding="utf-8") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on `path`, shared by every process that uses it.
+
+    flock() on POSIX, a one-byte msvcrt lock on Windows. Re-entrant within a thread,
+    and other threads of the same process queue on an ordinary lock first, so one
+    instance can guard a file for the whole process. The lock file itself is never
+    deleted (doing so would let two processes lock different files).
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self) -> None:
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise TimeoutError(f"Timed out waiting for {self.path}")
+        self._depth += 1
+        if self._depth > 1:
+            return
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                self._lock_fd(fd)
+            except BaseException:
+                os.close(fd)
+                raise
+        except BaseException:
+            self._depth -= 1
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+
+    def _lock_fd(self, fd) -> None:
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for {self.path}")
+                time.sleep(0.005)
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
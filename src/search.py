@@ -0,0 +1,538 @@
+"""
+Inverted full-text index with prefix matching and ranked (top-k) queries.
+
+Each indexed item (project, task, project update, card) becomes a document with a
+small integer id. For every term the index keeps a posting list: the document ids
+containing it, in ascending order (array of int32), and one weight byte per
+document, the field-boosted term count capped at MAX_WEIGHT. Looking up a
+document's weight in a term is a bisect; listing a term's documents best-first is
+a memchr per weight level.
+
+Queries are ANDed terms, each also matching as a prefix (prefix-only matches
+count half). Scores are sum(weight * idf). When one word of a query is rare, the
+documents in its list are scored directly. Otherwise top-k uses Fagin's threshold
+algorithm: every term's list is walked best-first in lockstep and the walk stops
+once k results beat the best score any unseen document could still reach. One
+word stops after about k postings. Common words that seldom share a document can
+keep the bound high for a long walk, so a walk gives up after WALK_LIMIT postings.
+With fewer than k results in hand it ANDs per-term bitmaps and, if few documents
+match every word, scores exactly those. With k results it returns them, and that
+is the one approximate case: each result is a real match with its exact score,
+but a document the walk never reached may outscore some of them, so the top-k
+can miss documents and come back in a different order than a full scan's.
+Running the walk to its stopping condition costs 70-100 ms on such queries over
+900k documents, against 10 ms with the limit. scan() scores every matching
+document and is the exact reference: bench.search_bench checks search() against
+it, query by query.
+
+Terms common enough to be walked far get a per-document weight array, so scoring
+a document skips the bisect. It and the bitmaps are built on first use.
+
+The index is persisted beside the data file in a compact binary layout and
+stamped with the document's `journal_epoch` and `revision` (see doc_cache). The
+revision alone repeats across documents, e.g. after restoring a backup or when
+two copies of the data were edited apart, so both have to match or the index is
+rebuilt.
+"""
+import bisect
+import heapq
+import json
+import math
+import re
+import struct
+import sys
+import threading
+from array import array
+
+from .safe_io import atomic_write_bytes
+
+MAX_WEIGHT = 16
+PREFIX_EXPANSIONS = 16   # most frequent terms a query prefix may expand to
+SCAN_LIMIT = 2000        # multi-word matches scored directly rather than with the threshold walk
+DENSE_FRACTION = 16      # terms in at least 1/16 of documents get a per-doc weight array
+WALK_LIMIT = 3000        # postings a walk reads before settling for the best found so far
+FORMAT_VERSION = 2
+MAGIC = b"PTSRCH1\n"
+
+_TOKEN = re.compile(r"\w+")
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+def tokenize(text):
+    """Lower-cased word tokens of `text` (None and non-strings give none)."""
+    return _TOKEN.findall(text.lower()) if isinstance(text, str) else []
+
+
+def stamp(doc):
+    """What a persisted index must have been saved for to be current for `doc`."""
+    return [doc.get("journal_epoch"), doc.get("revision", 0)]
+
+
+def _weights(fields):
+    """{term: weight} for [(text, boost), ...]."""
+    weights = {}
+    for text, boost in fields:
+        for term in tokenize(text):
+            weights[term] = weights.get(term, 0) + boost
+    return {term: min(w, MAX_WEIGHT) for term, w in weights.items()}
+
+
+def _bit_positions(bits):
+    """Ascending positions of the set bits of int `bits`."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    positions = []
+    for match in _NONZERO.finditer(data):
+        byte, base = data[match.start()], match.start() * 8
+        positions.extend(base + i for i in range(8) if byte >> i & 1)
+    return positions
+
+
+def match_score(words, fields):
+    """
+    Scores [(text, boost), ...] against query `words` the way the index does, minus
+    idf: 0 unless every word matches a term or term prefix. For unindexed search.
+    """
+    weights = _weights(fields)
+    total = 0.0
+    for word in words:
+        best = max((w * (1.0 if term == word else 0.5) for term, w in weights.items() if term.startswith(word)),
+                   default=0)
+        if not best:
+            return 0.0
+        total += best
+    return total
+
+
+class _Postings:
+    """
+    Document ids containing one term (ascending) and their weights. Terms common
+    enough to be walked far by queries also get, once asked for, a weight per doc
+    (`dense`, so get() skips the bisect) and a bitmap; both are kept current.
+    """
+    __slots__ = ("docs", "weights", "dense", "_bitmap")
+
+    def __init__(self, docs=None, weights=None):
+        self.docs = docs if docs is not None else array("i")
+        self.weights = weights if weights is not None else bytearray()
+        self.dense = None
+        self._bitmap = None
+
+    def densify(self, n_docs):
+        if self.dense is None:
+            dense = bytearray(n_docs)
+            for doc, weight in zip(self.docs, self.weights):
+                dense[doc] = weight
+            self.dense = dense
+
+    def bitmap(self):
+        """The docs as an int with bit `doc` set for each."""
+        if self._bitmap is None:
+            bits = bytearray((self.docs[-1] >> 3) + 1 if self.docs else 0)
+            for doc in self.docs:
+                bits[doc >> 3] |= 1 << (doc & 7)
+            self._bitmap = int.from_bytes(bits, "little")
+        return self._bitmap
+
+    def get(self, doc):
+        dense = self.dense
+        if dense is not None:
+            return dense[doc] if doc < len(dense) else 0
+        docs = self.docs
+        i = bisect.bisect_left(docs, doc)
+        return self.weights[i] if i < len(docs) and docs[i] == doc else 0
+
+    def set(self, doc, weight):
+        docs = self.docs
+        if self.dense is not None:
+            if doc >= len(self.dense):
+                self.dense.extend(bytes(doc + 1 - len(self.dense)))
+            self.dense[doc] = weight
+        if self._bitmap is not None:
+            self._bitmap |= 1 << doc
+        if not docs or docs[-1] < doc:
+            docs.append(doc)
+            self.weights.append(weight)
+            return
+        i = bisect.bisect_left(docs, doc)
+        if i < len(docs) and docs[i] == doc:
+            self.weights[i] = weight
+        else:
+            docs.insert(i, doc)
+            self.weights.insert(i, weight)
+
+    def discard(self, doc):
+        docs = self.docs
+        i = bisect.bisect_left(docs, doc)
+        if i < len(docs) and docs[i] == doc:
+            del docs[i]
+            del self.weights[i]
+            if self.dense is not None:
+                self.dense[doc] = 0
+            if self._bitmap is not None:
+                self._bitmap &= ~(1 << doc)
+
+    def ranked(self):
+        """Yields (weight, doc), heaviest first."""
+        docs, weights = self.docs, self.weights
+        for w in range(MAX_WEIGHT, 0, -1):
+            pos = weights.find(w)
+            while pos != -1:
+                yield w, docs[pos]
+                pos = weights.find(w, pos + 1)
+
+
+class _QueryTerm:
+    """One query word: the terms it expands to, with their idf-scaled multipliers."""
+
+    def __init__(self, expansions):
+        self.expansions = expansions  # [(postings, multiplier)]
+        self.size = sum(len(p.docs) for p, _ in expansions)  # upper bound on matching docs
+
+    def score(self, doc):
+        if len(self.expansions) == 1:
+            p, m = self.expansions[0]
+            return p.get(doc) * m
+        return max(p.get(doc) * m for p, m in self.expansions)
+
+    def docs(self):
+        """Every matching doc, unordered."""
+        if len(self.expansions) == 1:
+            return self.expansions[0][0].docs
+        matched = set()
+        for p, _ in self.expansions:
+            matched.update(p.docs)
+        return matched
+
+    def bitmap(self):
+        bits = 0
+        for p, _ in self.expansions:
+            bits |= p.bitmap()
+        return bits
+
+    def ranked(self):
+        """Yields (score, doc), best first, across every expansion."""
+        streams = [_scaled(p, m) for p, m in self.expansions]
+        return streams[0] if len(streams) == 1 else heapq.merge(*streams, reverse=True)
+
+
+def _scaled(postings, multiplier):
+    for weight, doc in postings.ranked():
+        yield weight * multiplier, doc
+
+
+class SearchIndex:
+    """
+    Term -> postings index over small typed documents.
+
+    A document is (kind, item id, parent id or None, [(text, boost), ...]); kinds
+    are single characters ('p' project, 't' task, 'u' update, 'c' card). add(),
+    remove() and replace() keep the index current. Methods are thread-safe.
+    """
+
+    def __init__(self):
+        self.stamp = None
+        self.dirty = False
+        self._terms = {}         # term -> _Postings
+        self._vocab = []         # sorted terms (some may have emptied out)
+        self._ids = []           # doc -> item id ('' once removed)
+        self._kinds = bytearray()
+        self._parents = array("i")  # doc -> parent doc, or -1
+        self._by_id = None       # item id -> doc, built on first use
+        self._live = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, entries, stamp=None):
+        """Indexes every (kind, id, parent id, fields) from `entries`, stamped with `stamp`."""
+        index = cls()
+        index._by_id = {}
+        for kind, item_id, parent_id, fields in entries:
+            index._add(kind, item_id, parent_id, fields, building=True)
+        index._vocab = sorted(index._terms)
+        index.stamp = stamp
+        index.dirty = True
+        return index
+
+    def __len__(self):
+        return self._live
+
+    # --- maintenance ---
+
+    def _doc_of(self, item_id):
+        if self._by_id is None:
+            self._by_id = {item_id: doc for doc, item_id in enumerate(self._ids) if item_id}
+        return self._by_id.get(item_id)
+
+    def _add(self, kind, item_id, parent_id, fields, building=False):
+        doc = len(self._ids)
+        self._ids.append(item_id)
+        self._kinds.append(ord(kind))
+        parent = self._doc_of(parent_id) if parent_id else None
+        self._parents.append(-1 if parent is None else parent)
+        self._by_id[item_id] = doc
+        self._live += 1
+        terms = self._terms
+        for term, weight in _weights(fields).items():
+            postings = terms.get(term)
+            if postings is None:
+                postings = terms[term] = _Postings()
+                if not building:  # build() sorts the whole vocabulary once at the end
+                    bisect.insort(self._vocab, term)
+            postings.set(doc, weight)
+        return doc
+
+    def add(self, kind, item_id, parent_id, fields):
+        """Indexes a new item."""
+        with self._lock:
+            self._doc_of(item_id)
+            self._add(kind, item_id, parent_id, fields)
+            self.dirty = True
+
+    def replace(self, item_id, old_fields, new_fields):
+        """Re-indexes an item whose text changed from `old_fields` to `new_fields`."""
+        with self._lock:
+            doc = self._doc_of(item_id)
+            if doc is not None:
+                old, new = _weights(old_fields), _weights(new_fields)
+                for term in old.keys() - new.keys():
+                    self._terms[term].discard(doc)
+                for term, weight in new.items():
+                    if old.get(term) != weight:
+                        postings = self._terms.get(term)
+                        if postings is None:
+                            postings = self._terms[term] = _Postings()
+                            bisect.insort(self._vocab, term)
+                        postings.set(doc, weight)
+            self.dirty = True
+
+    def remove(self, item_id, fields):
+        """Drops an item indexed with `fields`."""
+        with self._lock:
+            doc = self._doc_of(item_id)
+            if doc is not None:
+                for term in _weights(fields):
+                    self._terms[term].discard(doc)
+                self._ids[doc] = ""
+                del self._by_id[item_id]
+                self._live -= 1
+            self.dirty = True
+
+    # --- queries ---
+
+    def _expand(self, word, n_docs):
+        """Query term for `word`: itself (if indexed) plus its most frequent prefix extensions."""
+        vocab, terms = self._vocab, self._terms
+        lo = bisect.bisect_left(vocab, word)
+        hi = bisect.bisect_left(vocab, word + "\U0010ffff", lo)
+        matches = [terms[t] for t in vocab[lo:hi] if t != word and terms[t].docs]
+        if len(matches) > PREFIX_EXPANSIONS:
+            matches = heapq.nlargest(PREFIX_EXPANSIONS, matches, key=lambda p: len(p.docs))
+        idf = lambda p: math.log(1 + n_docs / len(p.docs))  # noqa: E731
+        expansions = [(p, idf(p) / 2) for p in matches]
+        exact = terms.get(word)
+        if exact is not None and exact.docs:
+            expansions.insert(0, (exact, idf(exact)))
+        for p, _ in expansions:
+            if len(p.docs) * DENSE_FRACTION >= n_docs:
+                p.densify(len(self._ids))  # once; kept current by set() and discard()
+        return _QueryTerm(expansions) if expansions else None
+
+    def search(self, query, limit=20, kinds=None):
+        """
+        Returns up to `limit` (score, kind, item id, parent id) for documents matching
+        every word of `query`, best first. `kinds` restricts the result kinds.
+        Exact unless a walk reaches WALK_LIMIT (see the module docstring).
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words or limit <= 0:
+            return []
+        with self._lock:
+            query_terms = [self._expand(word, max(self._live, 1)) for word in words]
+            if not all(query_terms):
+                return []
+            allowed = {ord(k) for k in kinds} if kinds else None
+            query_terms.sort(key=lambda qt: qt.size)  # most selective first, so misses fail fast
+            if len(query_terms) > 1 and query_terms[0].size <= SCAN_LIMIT:
+                return self._results(self._score_all(query_terms[0].docs(), query_terms, limit, allowed))
+            streams = [qt.ranked() for qt in query_terms]
+            bounds = [math.inf] * len(streams)
+            seen, top = set(), []  # top: min-heap of (score, -doc)
+            budget = WALK_LIMIT
+            while True:
+                for i, stream in enumerate(streams):
+                    item = next(stream, None)
+                    if item is None:
+                        # Every document matching all words is in every word's list,
+                        # so once one list runs out all candidates have been scored.
+                        return self._results(top)
+                    bounds[i], doc = item
+                    if doc in seen:
+                        continue
+                    seen.add(doc)
+                    if allowed is not None and self._kinds[doc] not in allowed:
+                        continue
+                    score = 0.0
+                    for qt in query_terms:
+                        s = qt.score(doc)
+                        if not s:
+                            break
+                        score += s
+                    else:
+                        entry = (score, -doc)
+                        if len(top) < limit:
+                            heapq.heappush(top, entry)
+                        elif entry > top[0]:
+                            heapq.heapreplace(top, entry)
+                if len(top) >= limit and top[0][0] >= sum(bounds):
+                    return self._results(top)
+                budget -= len(streams)
+                if budget <= 0:
+                    if len(top) >= limit:
+                        return self._results(top)
+                    if budget > -len(streams):  # first time over: maybe few documents match at all
+                        candidates = self._intersection(query_terms)
+                        if candidates is not None:
+                            return self._results(self._score_all(candidates, query_terms, limit, allowed))
+
+    def scan(self, query, limit=20, kinds=None):
+        """
+        Like search(), but scores every document matching all the words: always
+        exact, and as slow as the number of matches. The reference for search().
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words or limit <= 0:
+            return []
+        with self._lock:
+            query_terms = [self._expand(word, max(self._live, 1)) for word in words]
+            if not all(query_terms):
+                return []
+            allowed = {ord(k) for k in kinds} if kinds else None
+            bits = query_terms[0].bitmap()
+            for qt in query_terms[1:]:
+                bits &= qt.bitmap()
+            return self._results(self._score_all(_bit_positions(bits), query_terms, limit, allowed))
+
+    @staticmethod
+    def _intersection(query_terms):
+        """Docs matching every query term if there are at most SCAN_LIMIT, else None."""
+        bits = query_terms[0].bitmap()
+        for qt in query_terms[1:]:
+            bits &= qt.bitmap()
+        return _bit_positions(bits) if bits.bit_count() <= SCAN_LIMIT else None
+
+    def _score_all(self, candidates, query_terms, limit, allowed):
+        """Top `limit` of `candidates` as a heap of (score, -doc), scoring each in full."""
+        top = []
+        for doc in candidates:
+            if allowed is not None and self._kinds[doc] not in allowed:
+                continue
+            score = 0.0
+            for qt in query_terms:
+                s = qt.score(doc)
+                if not s:
+                    break
+                score += s
+            else:
+                entry = (score, -doc)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+        return top
+
+    def _results(self, top):
+        results = []
+        for score, neg_doc in sorted(top, reverse=True):
+            doc = -neg_doc
+            parent = self._parents[doc]
+            results.append((round(score, 4), chr(self._kinds[doc]), self._ids[doc],
+                            (self._ids[parent] or None) if parent >= 0 else None))
+        return results
+
+    # --- persistence ---
+
+    def save(self, path):
+        """Writes the index to `path` atomically."""
+        with self._lock:
+            terms = [t for t in self._vocab if self._terms[t].docs]
+            postings = [self._terms[t] for t in terms]
+            ids = "\n".join(self._ids).encode("utf-8")
+            header = json.dumps({
+                "version": FORMAT_VERSION, "byteorder": sys.byteorder, "stamp": self.stamp,
+                "terms": terms, "counts": [len(p.docs) for p in postings],
+                "docs": len(self._ids), "live": self._live, "ids_bytes": len(ids),
+            }, separators=(",", ":")).encode("utf-8")
+            chunks = [MAGIC, struct.pack("<I", len(header)), header, ids, bytes(self._kinds),
+                      self._parents.tobytes()]
+            chunks += [p.docs.tobytes() for p in postings]
+            chunks += [bytes(p.weights) for p in postings]
+            atomic_write_bytes(path, chunks)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path, stamp):
+        """Reads an index saved for `stamp`; None if missing, stale or unreadable."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if not data.startswith(MAGIC):
+                return None
+            (header_len,) = struct.unpack_from("<I", data, len(MAGIC))
+            pos = len(MAGIC) + 4
+            header = json.loads(data[pos:pos + header_len])
+            if (header.get("version") != FORMAT_VERSION or header.get("byteorder") != sys.byteorder
+                    or header.get("stamp") != stamp):
+                return None
+            pos += header_len
+            n = header["docs"]
+            index = cls()
+            ids = data[pos:pos + header["ids_bytes"]].decode("utf-8")
+            index._ids = ids.split("\n") if n else []
+            pos += header["ids_bytes"]
+            index._kinds = bytearray(data[pos:pos + n])
+            pos += n
+            index._parents.frombytes(data[pos:pos + 4 * n])
+            pos += 4 * n
+            weights_pos = pos + 4 * sum(header["counts"])
+            for term, count in zip(header["terms"], header["counts"]):
+                docs = array("i")
+                docs.frombytes(data[pos:pos + 4 * count])
+                index._terms[term] = _Postings(docs, bytearray(data[weights_pos:weights_pos + count]))
+                pos += 4 * count
+                weights_pos += count
+            if len(index._ids) != n or weights_pos != len(data):
+                return None
+        except (OSError, ValueError, KeyError, TypeError, struct.error, UnicodeDecodeError):
+            return None
+        index._vocab = list(header["terms"])
+        index._live = header["live"]
+        index.stamp = stamp
+        return index
+
+
+def open_index(path, doc, entries):
+    """
+    Returns the SearchIndex for `doc`: loaded from `path` when it was saved for the
+    document's stamp(), otherwise built from entries(doc) and saved there.
+    """
+    current = stamp(doc)
+    index = SearchIndex.load(path, current)
+    if index is None:
+        index = SearchIndex.build(entries(doc), current)
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"Error saving search index {path}: {e}")
+    return index
+
+
+def save_index(path, cached):
+    """Saves the index from DocumentCache.cached() if it changed since it was loaded or saved."""
+    if cached is None or not cached[1].dirty:
+        return
+    doc, index = cached
+    index.stamp = stamp(doc)
+    try:
+        index.save(path)
+    except OSError as e:
+        print(f"Error saving search index {path}: {e}")
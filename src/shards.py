@@ -0,0 +1,189 @@
+"""
+Sharded layout for project data: one file per project plus a small manifest.
+
+With PROJECTTRACKER_LAYOUT=sharded, project_data.json becomes a manifest marked
+with "layout": "sharded". It keeps the document's top-level fields, but instead of
+`projects` it has `shards`, the project ids in order with the revision each
+project's file was last written at:
+
+    {"layout": "sharded", "revision": 42, "shards": [[project id, 17], ...]}
+
+Each project, tasks and updates included, lives in `projects/<project id>.json`.
+Saving an edit rewrites only the projects that changed and then the manifest, and
+a damaged project file costs that project rather than the whole document. The
+completion histogram is left out of the manifest and rebuilt from the projects
+on load.
+
+Convert a data folder between layouts ahead of time (the backend also converts
+on its first start with a new PROJECTTRACKER_LAYOUT):
+
+    python -m src.shards sharded   # project_data.json -> manifest + projects/*.json
+    python -m src.shards single    # back to one project_data.json
+"""
+import argparse
+import json
+import os
+import threading
+
+from .details import DIRECTORY as DETAILS_DIRECTORY, LAYOUT_KEY, DetailStore, join_document
+from .doc_cache import DocumentCache
+from .safe_io import atomic_write_json, loads_json
+
+SHARDED = "sharded"
+# Directory beside project_data.json that holds the project files.
+SHARD_DIRECTORY = "projects"
+
+# Top-level fields that stay out of the manifest (derived from the projects).
+DERIVED_FIELDS = ("projects", "completion_counts")
+
+
+class ShardedDocumentCache(DocumentCache):
+    """
+    DocumentCache for project data that may be stored sharded.
+
+    The in-memory document always has the usual `projects` list; the layout marker
+    of the document being written decides how it lands on disk. Sharded writes
+    compare each project with the object last read from or written to its file and
+    skip the ones that are unchanged. Copy-on-write writers leave untouched
+    projects as the same objects, so that is usually an identity check. On reload
+    a project whose stamp in the manifest is unchanged keeps its parsed object,
+    so an edit by another process only re-reads the projects it touched.
+
+    Sharded documents never use the journal: an edit already writes just one
+    small project file and the manifest.
+    """
+
+    def __init__(self, path, empty, directory, **kwargs):
+        super().__init__(path, empty, **kwargs)
+        self.directory = directory
+        self._shards = None  # {project id: (stamp, project)} as on disk while the file is a manifest
+        self._shards_lock = threading.Lock()
+
+    def shard_path(self, project_id):
+        return os.path.join(self.directory, f"{project_id}.json")
+
+    def _read(self):
+        doc = super()._read()
+        if doc.get(LAYOUT_KEY) != SHARDED:
+            with self._shards_lock:
+                self._shards = None
+            return doc
+        if "shards" not in doc:
+            return doc  # already assembled by _recover()
+        return self._assemble(doc)
+
+    def _read_shard(self, project_id):
+        path = self.shard_path(project_id)
+        try:
+            with open(path, "rb") as file:
+                return loads_json(file.read())
+        except FileNotFoundError:
+            print(f"Project file {path} is missing. Skipping that project.")
+        except json.JSONDecodeError:
+            print(f"Error decoding JSON from {path}. Skipping that project.")
+        return None
+
+    def _assemble(self, manifest):
+        """Builds the full document from a manifest, reusing projects whose stamp is unchanged."""
+        with self._shards_lock:
+            known = self._shards or {}
+        shards, projects = {}, []
+        for project_id, stamp in manifest["shards"]:
+            old = known.get(project_id)
+            project = old[1] if old is not None and old[0] == stamp else self._read_shard(project_id)
+            if project is not None:
+                shards[project_id] = (stamp, project)
+                projects.append(project)
+        with self._shards_lock:
+            self._shards = shards
+        doc = {k: v for k, v in manifest.items() if k != "shards"}
+        doc["projects"] = projects
+        return doc
+
+    def _recover(self):
+        """Rebuilds a damaged manifest from the project files, if there are any."""
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+        except FileNotFoundError:
+            names = []
+        if not names:
+            return super()._recover()
+        print(f"Error decoding JSON from {self.path}. Rebuilding it from the {len(names)} files in {self.directory}.")
+        projects = [p for p in map(self._read_shard, (name[:-5] for name in names)) if p is not None]
+        projects.sort(key=lambda p: (p.get("start_date") or "", p["id"]))
+        with self._shards_lock:
+            self._shards = {p["id"]: (0, p) for p in projects}
+        return {LAYOUT_KEY: SHARDED, "projects": projects}
+
+    def _write(self, doc):
+        if doc.get(LAYOUT_KEY) != SHARDED:
+            super()._write(doc)
+            self._drop_shards()
+            return
+        with self._shards_lock:
+            known = dict(self._shards or {})
+        stamp = doc.get("revision", 0)
+        shards, entries = {}, []
+        os.makedirs(self.directory, exist_ok=True)
+        for project in doc.get("projects", []):
+            project_id = project["id"]
+            old = known.get(project_id)
+            if old is None or (old[1] is not project and old[1] != project):
+                atomic_write_json(self.shard_path(project_id), project)
+                old = (stamp, project)
+            shards[project_id] = old
+            entries.append([project_id, old[0]])
+        manifest = {k: v for k, v in doc.items() if k not in DERIVED_FIELDS}
+        manifest["shards"] = entries
+        super()._write(manifest)
+        for project_id in known.keys() - shards.keys():
+            _remove(self.shard_path(project_id))
+        with self._shards_lock:
+            self._shards = shards
+
+    def _drop_shards(self):
+        """Deletes the project files once the document is stored in a single file again."""
+        with self._shards_lock:
+            known, self._shards = self._shards, None
+        for project_id in known or ():
+            _remove(self.shard_path(project_id))
+
+    def append(self, doc, records, base=None, carry=None):
+        if doc.get(LAYOUT_KEY) == SHARDED:
+            return self.store(doc, base, carry)
+        return super().append(doc, records, base, carry)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def read_project_data(path):
+    """
+    Returns the full project document stored at `path` in any layout, for tools
+    that read the data folder directly rather than through data_handler.
+    """
+    directory = os.path.dirname(path)
+    cache = ShardedDocumentCache(path, lambda: {"projects": []}, os.path.join(directory, SHARD_DIRECTORY),
+                                 journal=False, write_behind_ms=0)
+    doc = join_document(cache.load(), DetailStore(os.path.join(directory, DETAILS_DIRECTORY)))
+    doc.pop(LAYOUT_KEY, None)
+    return doc
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the ProjectTracker data folder between layouts.")
+    parser.add_argument("layout", choices=["single", "split", SHARDED])
+    args = parser.parse_args(argv)
+    os.environ["PROJECTTRACKER_STORAGE"] = "json"
+    from . import data_handler
+
+    data_handler.convert_layout(args.layout)
+    print(f"{data_handler.DATA_FILE} is now stored as {args.layout}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,807 @@
+"""
+SQLite storage backend, selected with PROJECTTRACKER_STORAGE=sqlite.
+
+Implements the same functions as data_handler and anki, so app.py does not care
+which backend is active. Every project, task and card row keeps its full JSON text
+in `doc` (key order included) next to a few extracted columns that carry the
+indexes, which keeps import/export between the JSON files and the database lossless.
+Edits only touch the affected rows instead of rewriting the whole document.
+Each project row also keeps its project-list summary (data_handler.build_project_summary),
+rewritten in the same transaction as any edit of the project's tasks or updates.
+
+One-shot migration:
+    python -m src.sqlite_store import   # project_data.json + anki.json -> projecttracker.db
+    python -m src.sqlite_store export   # projecttracker.db -> project_data.json + anki.json
+"""
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from .search import match_score, tokenize
+from .shards import read_project_data
+
+DATA_DIR = os.getenv("PROJECTTRACKER_DATA_DIR", os.getcwd())
+os.makedirs(DATA_DIR, exist_ok=True)
+DB_FILE = os.path.join(DATA_DIR, "projecttracker.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id                     TEXT PRIMARY KEY,
+    position               INTEGER NOT NULL,
+    status                 TEXT,
+    target_completion_date TEXT,
+    actual_completion_date TEXT,
+    doc                    TEXT NOT NULL,
+    summary                TEXT
+);
+CREATE INDEX IF NOT EXISTS projects_position ON projects(position);
+CREATE INDEX IF NOT EXISTS projects_status ON projects(status, position);
+CREATE INDEX IF NOT EXISTS projects_target ON projects(target_completion_date);
+CREATE INDEX IF NOT EXISTS projects_completed ON projects(actual_completion_date);
+CREATE TABLE IF NOT EXISTS tasks (
+    id                     TEXT PRIMARY KEY,
+    project_id             TEXT NOT NULL,
+    position               INTEGER NOT NULL,
+    status                 TEXT,
+    target_completion_date TEXT,
+    actual_completion_date TEXT,
+    doc                    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_project ON tasks(project_id, position);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS tasks_target ON tasks(target_completion_date);
+CREATE INDEX IF NOT EXISTS tasks_completed ON tasks(actual_completion_date);
+CREATE TABLE IF NOT EXISTS cards (
+    id          TEXT PRIMARY KEY,
+    position    INTEGER NOT NULL,
+    review_date TEXT,
+    doc         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cards_position ON cards(position);
+CREATE INDEX IF NOT EXISTS cards_review_date ON cards(review_date);
+"""
+
+_local = threading.local()
+
+
+def _connect():
+    """Returns this thread's connection, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_FILE, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.create_function("contains_words", -1, _contains_words, deterministic=True)
+        conn.executescript(SCHEMA)
+        _add_summaries(conn)
+        _local.conn = conn
+    return conn
+
+
+def _add_summaries(conn):
+    """Adds the projects.summary column to a database made before it existed, and fills it."""
+    if any(column[1] == "summary" for column in conn.execute("PRAGMA table_info(projects)")):
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another connection may have added it while this one waited for the lock.
+        if not any(column[1] == "summary" for column in conn.execute("PRAGMA table_info(projects)")):
+            conn.execute("ALTER TABLE projects ADD COLUMN summary TEXT")
+            for project_id, doc in conn.execute("SELECT id, doc FROM projects").fetchall():
+                _write_summary(conn, project_id, json.loads(doc).get("updates") or [])
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+@contextmanager
+def _transaction():
+    """Runs the block in a write transaction, taking the write lock up front."""
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        # Bumped by every write so data_version() can tell readers something changed.
+        conn.execute("INSERT INTO meta (key, value) VALUES ('data_version', '1') "
+                     "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _get_meta(conn, key, default):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, _dumps(value)))
+
+
+# Nested lists are stored in their own tables; the parent doc keeps a None
+# placeholder so the key (and its position in the dict) survives a round trip.
+
+def _placeholder(obj, key):
+    return {**obj, key: None} if key in obj else obj
+
+
+def _write_project(conn, project, position):
+    # An upsert rather than INSERT OR REPLACE, which would drop the stored summary.
+    conn.execute(
+        "INSERT INTO projects (id, position, status, target_completion_date, actual_completion_date, doc) "
+        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET position = excluded.position, "
+        "status = excluded.status, target_completion_date = excluded.target_completion_date, "
+        "actual_completion_date = excluded.actual_completion_date, doc = excluded.doc",
+        (project["id"], position, project.get("status"), project.get("target_completion_date"),
+         project.get("actual_completion_date"), _dumps(_placeholder(project, "tasks"))),
+    )
+
+
+def _write_summary(conn, project_id, updates=None, tasks=None):
+    """
+    Stores the project's summary; callers run it after writing the project's tasks
+    or updates, in the same transaction. `tasks` defaults to the task rows, and
+    without `updates` the stored last-update timestamp is kept.
+    """
+    from .data_handler import build_project_summary
+
+    if tasks is None:
+        tasks = [{"status": status, "target_completion_date": due} for status, due in conn.execute(
+            "SELECT status, target_completion_date FROM tasks WHERE project_id = ? ORDER BY position",
+            (project_id,))]
+    summary = build_project_summary({"tasks": tasks}, updates or [])
+    if updates is None:
+        row = conn.execute("SELECT summary FROM projects WHERE id = ?", (project_id,)).fetchone()
+        summary["last_update"] = json.loads(row[0])["last_update"] if row and row[0] else None
+    conn.execute("UPDATE projects SET summary = ? WHERE id = ?", (_dumps(summary), project_id))
+
+
+def _write_task(conn, project_id, task, position):
+    conn.execute(
+        "INSERT OR REPLACE INTO tasks (id, project_id, position, status, target_completion_date, actual_completion_date, doc) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (task["id"], project_id, position, task.get("status"), task.get("target_completion_date"),
+         task.get("actual_completion_date"), _dumps(task)),
+    )
+
+
+def _write_card(conn, card, position):
+    conn.execute(
+        "INSERT OR REPLACE INTO cards (id, position, review_date, doc) VALUES (?, ?, ?, ?)",
+        (card["id"], position, card.get("review_date"), _dumps(card)),
+    )
+
+
+def _next_position(conn, table, where="", params=()):
+    row = conn.execute(f"SELECT MAX(position) FROM {table} {where}", params).fetchone()
+    return 0 if row[0] is None else row[0] + 1
+
+
+def _row_project(conn, project_id):
+    """Returns (project dict without tasks filled in, position) or (None, None)."""
+    row = conn.execute("SELECT doc, position FROM projects WHERE id = ?", (project_id,)).fetchone()
+    return (json.loads(row[0]), row[1]) if row else (None, None)
+
+
+def _fill_tasks(project, tasks):
+    if "tasks" in project:
+        project["tasks"] = tasks
+    return project
+
+
+def data_version():
+    """Returns the write counter bumped by every transaction (one indexed read, no load)."""
+    row = _connect().execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+    return (DB_FILE, row[0] if row else None)
+
+
+def flush_data():
+    """Nothing to do: every write is committed before it returns."""
+
+
+flush_anki_data = flush_data
+
+
+# --- Project data (mirrors data_handler) ---
+
+def load_data():
+    """Loads the full project document from the database."""
+    conn = _connect()
+    data = _get_meta(conn, "project_data", {"projects": None})
+    tasks_by_project = {}
+    for project_id, doc in conn.execute("SELECT project_id, doc FROM tasks ORDER BY position"):
+        tasks_by_project.setdefault(project_id, []).append(json.loads(doc))
+    data["projects"] = [
+        _fill_tasks(json.loads(doc), tasks_by_project.get(project_id, []))
+        for project_id, doc in conn.execute("SELECT id, doc FROM projects ORDER BY position")
+    ]
+    return data
+
+
+def save_data(data):
+    """Replaces the whole project document in the database."""
+    from .data_handler import SUMMARY_KEY
+
+    with _transaction() as conn:
+        conn.execute("DELETE FROM projects")
+        conn.execute("DELETE FROM tasks")
+        for position, project in enumerate(data.get("projects", [])):
+            _write_project(conn, {k: v for k, v in project.items() if k != "summary"}, position)
+            for task_position, task in enumerate(project.get("tasks") or []):
+                _write_task(conn, project["id"], task, task_position)
+            _write_summary(conn, project["id"], project.get("updates"), project.get("tasks") or [])
+        # The completion histogram and project summaries are derived from the rows here.
+        meta = {k: v for k, v in data.items() if k not in ("completion_counts", SUMMARY_KEY)}
+        _set_meta(conn, "project_data", _placeholder(meta, "projects"))
+
+
+def get_project(project_id, task_status='active'):
+    """Retrieves a specific project by ID with optional task filtering."""
+    conn = _connect()
+    project, _ = _row_project(conn, project_id)
+    if not project:
+        return None
+    if task_status:
+        rows = conn.execute("SELECT doc FROM tasks WHERE project_id = ? AND status = ? ORDER BY position",
+                            (project_id, task_status))
+        project["tasks"] = [json.loads(doc) for doc, in rows]
+    else:
+        rows = conn.execute("SELECT doc FROM tasks WHERE project_id = ? ORDER BY position", (project_id,))
+        _fill_tasks(project, [json.loads(doc) for doc, in rows])
+    return project
+
+
+def _pages(conn, select, size=500):
+    """Rows of `select` (which must end in a position column) in position order, read a page at a time."""
+    after = -1
+    while True:
+        rows = conn.execute(f"{select} WHERE position > ? ORDER BY position LIMIT ?", (after, size)).fetchall()
+        yield from rows
+        if len(rows) < size:
+            return
+        after = rows[-1][-1]
+
+
+def iter_projects(tasks=True):
+    """Yields every project (with its tasks unless `tasks` is False), read from the database a page at a time."""
+    conn = _connect()
+    for project_id, _ in _pages(conn, "SELECT id, position FROM projects"):
+        project = get_project(project_id, task_status=None) if tasks else _row_project(conn, project_id)[0]
+        if project:
+            if not tasks:
+                project.pop("tasks", None)
+            yield project
+
+
+def get_projects_by_category(category):
+    """Returns the projects in a status category as data_handler.project_list_entry() summaries."""
+    from .data_handler import project_list_entry
+
+    today = date.today()
+    rows = _connect().execute("SELECT doc, summary FROM projects WHERE status = ? ORDER BY position", (category,))
+    return [project_list_entry(json.loads(doc), json.loads(summary), today) for doc, summary in rows]
+
+
+def create_project(title, description, start_date, target_completion_date, status="active"):
+    """Creates a new project."""
+    from .data_handler import new_project_record
+
+    new_project = new_project_record(title, description, start_date, target_completion_date, status)
+    with _transaction() as conn:
+        _write_project(conn, new_project, _next_position(conn, "projects"))
+        _write_summary(conn, new_project["id"], new_project.get("updates"), [])
+    return new_project["id"]
+
+
+def update_project(project_id, title, description, status, start_date, target_completion_date, actual_completion_date, updates):
+    """Updates an existing project."""
+    with _transaction() as conn:
+        project, position = _row_project(conn, project_id)
+        if project:
+            project["title"] = title
+            project["description"] = description
+            project["status"] = status
+            project["start_date"] = start_date
+            project["target_completion_date"] = target_completion_date
+            project["actual_completion_date"] = actual_completion_date
+            project["updates"] = updates
+            _write_project(conn, project, position)
+            _write_summary(conn, project_id, updates)
+
+
+def create_task(project_id, description, additional_info, start_date, target_completion_date, actual_completion_date, status):
+    """Creates a new task for a project."""
+    from .data_handler import new_task_record
+
+    with _transaction() as conn:
+        project, position = _row_project(conn, project_id)
+        if project:
+            new_task = new_task_record(description, additional_info, start_date,
+                                       target_completion_date, actual_completion_date, status)
+            if "tasks" not in project:
+                project["tasks"] = []
+                _write_project(conn, project, position)
+            task_position = _next_position(conn, "tasks", "WHERE project_id = ?", (project_id,))
+            _write_task(conn, project_id, new_task, task_position)
+            _write_summary(conn, project_id)
+            return new_task["id"]
+
+
+def update_task(project_id, task_id, description, additional_info, status, start_date, target_completion_date, actual_completion_date):
+    """Updates an existing task."""
+    with _transaction() as conn:
+        row = conn.execute("SELECT doc, position FROM tasks WHERE id = ? AND project_id = ?",
+                           (task_id, project_id)).fetchone()
+        if row:
+            task = json.loads(row[0])
+            task["description"] = description
+            task["additional_info"] = additional_info
+            task["status"] = status
+            task["start_date"] = start_date
+            task["target_completion_date"] = target_completion_date
+            task["actual_completion_date"] = actual_completion_date
+            _write_task(conn, project_id, task, row[1])
+            _write_summary(conn, project_id)
+
+
+def import_projects(projects, tasks):
+    """Adds many projects and (project id, task) pairs in one transaction; see data_handler.import_projects."""
+    counts = {"projects": 0, "tasks": 0, "duplicates": 0, "unknown_project": 0}
+    task_positions, touched = {}, set()
+    with _transaction() as conn:
+        position = _next_position(conn, "projects")
+        for project in projects:
+            if conn.execute("SELECT 1 FROM projects WHERE id = ?", (project["id"],)).fetchone():
+                counts["duplicates"] += 1
+                continue
+            project = dict(project, tasks=list(project.get("tasks") or []))
+            _write_project(conn, project, position)
+            for task_position, task in enumerate(project["tasks"]):
+                _write_task(conn, project["id"], task, task_position)
+            _write_summary(conn, project["id"], project.get("updates"), project["tasks"])
+            task_positions[project["id"]] = len(project["tasks"])
+            position += 1
+            counts["projects"] += 1
+        for project_id, task in tasks:
+            if project_id not in task_positions:
+                if not conn.execute("SELECT 1 FROM projects WHERE id = ?", (project_id,)).fetchone():
+                    counts["unknown_project"] += 1
+                    continue
+                task_positions[project_id] = _next_position(conn, "tasks", "WHERE project_id = ?", (project_id,))
+            if conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task["id"],)).fetchone():
+                counts["duplicates"] += 1
+                continue
+            _write_task(conn, project_id, task, task_positions[project_id])
+            task_positions[project_id] += 1
+            counts["tasks"] += 1
+            touched.add(project_id)
+        for project_id in touched:
+            _write_summary(conn, project_id)
+    return counts
+
+
+def get_all_tasks(sort_by='due_date', order='asc', selected_project_statuses=None, selected_task_statuses=None):
+    """Retrieves all tasks with optional sorting and filtering."""
+    sql = ("SELECT p.id, p.doc, p.status, t.id, t.doc, t.target_completion_date, t.status "
+           "FROM tasks t JOIN projects p ON p.id = t.project_id")
+    clauses, params = [], []
+    if selected_project_statuses:
+        clauses.append(f"p.status IN ({','.join('?' * len(selected_project_statuses))})")
+        params.extend(selected_project_statuses)
+    if selected_task_statuses:
+        clauses.append(f"t.status IN ({','.join('?' * len(selected_task_statuses))})")
+        params.extend(selected_task_statuses)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY p.position, t.position"
+
+    titles = {}
+    all_tasks = []
+    for project_id, project_doc, project_status, task_id, task_doc, due, status in _connect().execute(sql, params):
+        if project_id not in titles:
+            titles[project_id] = json.loads(project_doc)['title']
+        all_tasks.append({
+            'project_id': project_id,
+            'project_title': titles[project_id],
+            'project_status': project_status,
+            'task_id': task_id,
+            'description': json.loads(task_doc)['description'],
+            'target_completion_date': due,
+            'status': status
+        })
+
+    if sort_by == 'due_date':
+        all_tasks.sort(key=lambda x: x.get('target_completion_date') or '9999-12-31', reverse=(order == 'desc'))
+    return all_tasks
+
+
+def add_project_update(project_id, update_text):
+    """Adds a new update to a project."""
+    from .data_handler import new_update_record
+
+    with _transaction() as conn:
+        project, position = _row_project(conn, project_id)
+        if project:
+            project.setdefault("updates", []).append(new_update_record(update_text))
+            _write_project(conn, project, position)
+            _write_summary(conn, project_id, project["updates"])
+
+
+def delete_project_update(project_id, update_id):
+    """Deletes an update from a project."""
+    with _transaction() as conn:
+        project, position = _row_project(conn, project_id)
+        if project and "updates" in project:
+            project['updates'] = [u for u in project['updates'] if u['id'] != update_id]
+            _write_project(conn, project, position)
+            _write_summary(conn, project_id, project['updates'])
+
+
+def _contains_words(text, *words):
+    """SQL contains_words(text, word, ...): every word is in `text` lower-cased as tokenize() does it."""
+    if not isinstance(text, str):
+        return False
+    text = text.lower()
+    return all(word in text for word in words)
+
+
+def _words_filter(words, column="doc"):
+    """
+    WHERE clause and params matching rows whose `column` contains every word. SQLite's
+    LIKE only folds ASCII letters, so the match is made in Python with str.lower.
+    """
+    return f"contains_words({column}, {', '.join('?' for _ in words)})", list(words)
+
+
+def search(query, limit=20):
+    """
+    Returns up to `limit` projects, tasks and project updates matching every word of
+    `query`, best first (same result dicts as data_handler.search). Rows are found
+    with contains_words() and ranked in Python, so this scans the tables instead of
+    using an index.
+    """
+    from .data_handler import project_search_fields, task_search_fields, update_search_fields
+
+    words = list(dict.fromkeys(tokenize(query)))
+    if not words or limit <= 0:
+        return []
+    conn = _connect()
+    where, params = _words_filter(words)
+    scored = []
+    for (doc,) in conn.execute(f"SELECT doc FROM projects WHERE {where}", params):
+        project = json.loads(doc)
+        base = {'project_id': project['id'], 'project_title': project['title']}
+        score = match_score(words, project_search_fields(project))
+        if score:
+            scored.append((score, {**base, 'kind': 'project', 'text': project.get('description'),
+                                   'status': project['status']}))
+        for update in project.get('updates') or []:
+            score = match_score(words, update_search_fields(update))
+            if score:
+                scored.append((score, {**base, 'kind': 'update', 'update_id': update['id'],
+                                       'text': update.get('description'), 'timestamp': update.get('timestamp'),
+                                       'status': project['status']}))
+    rows = conn.execute(f"SELECT t.doc, p.id, json_extract(p.doc, '$.title') FROM tasks t "
+                        f"JOIN projects p ON p.id = t.project_id WHERE {_words_filter(words, 't.doc')[0]}", params)
+    for doc, project_id, project_title in rows:
+        task = json.loads(doc)
+        score = match_score(words, task_search_fields(task))
+        if score:
+            scored.append((score, {'project_id': project_id, 'project_title': project_title, 'kind': 'task',
+                                   'task_id': task['id'], 'text': task['description'], 'status': task['status']}))
+    top = heapq.nlargest(limit, scored, key=lambda item: item[0])
+    return [{'score': round(score, 4), **result} for score, result in top]
+
+
+def get_completion_counts(start=None, end=None, project_id=None, by_project=False):
+    """Returns completions per day, grouped from the indexed actual_completion_date columns."""
+    from .data_handler import _completion_day
+
+    start = start.isoformat() if hasattr(start, "isoformat") else start
+    end = end.isoformat() if hasattr(end, "isoformat") else end
+    clauses, params = ["actual_completion_date IS NOT NULL"], []
+    if project_id is not None:
+        clauses.append("project_id = ?")
+        params.append(project_id)
+    where = " AND ".join(clauses)
+    sql = (f"SELECT actual_completion_date, project_id, COUNT(*) FROM "
+           f"(SELECT actual_completion_date, id AS project_id FROM projects "
+           f" UNION ALL SELECT actual_completion_date, project_id FROM tasks) "
+           f"WHERE {where} GROUP BY actual_completion_date, project_id")
+
+    result = {}
+    for completed, pid, count in _connect().execute(sql, params):
+        # Range checks happen after normalizing, since stored dates may lack zero padding.
+        day = _completion_day(completed)
+        if day is None or (start and day < start) or (end and day > end):
+            continue
+        if by_project:
+            bucket = result.setdefault(day, {})
+            bucket[pid] = bucket.get(pid, 0) + count
+        else:
+            result[day] = result.get(day, 0) + count
+    return result
+
+
+def get_completion_data():
+    """Returns all completion dates from projects and tasks"""
+    completions = []
+    for project in load_data().get('projects', []):
+        if project.get('actual_completion_date'):
+            completions.append({'type': 'project', 'date': project['actual_completion_date'],
+                                'title': project['title']})
+        for task in project.get('tasks', []):
+            if task.get('actual_completion_date'):
+                completions.append({'type': 'task', 'date': task['actual_completion_date'],
+                                    'title': task['description']})
+    return completions
+
+
+# --- Flashcards (mirrors anki) ---
+
+def load_anki_data():
+    """Loads the full flashcard document from the database."""
+    conn = _connect()
+    data = _get_meta(conn, "anki", {"cards": None})
+    data["cards"] = [json.loads(doc) for doc, in conn.execute("SELECT doc FROM cards ORDER BY position")]
+    return data
+
+
+def save_anki_data(data):
+    """Replaces the whole flashcard document in the database."""
+    with _transaction() as conn:
+        conn.execute("DELETE FROM cards")
+        for position, card in enumerate(data.get("cards", [])):
+            _write_card(conn, card, position)
+        _set_meta(conn, "anki", _placeholder(data, "cards"))
+
+
+def _row_card(conn, card_id):
+    row = conn.execute("SELECT doc, position FROM cards WHERE id = ?", (card_id,)).fetchone()
+    return (json.loads(row[0]), row[1]) if row else (None, None)
+
+
+def _find_card(conn, front, back):
+    row = conn.execute(
+        "SELECT doc, position FROM cards WHERE json_extract(doc, '$.front') = ? AND json_extract(doc, '$.back') = ? "
+        "ORDER BY position LIMIT 1", (front, back)).fetchone()
+    return (json.loads(row[0]), row[1]) if row else (None, None)
+
+
+def create_card(front, back, reverse=False):
+    """Creates a new flashcard and its reverse if specified."""
+    from .anki import new_card_record
+
+    new_card = new_card_record(front, back, reverse)
+    with _transaction() as conn:
+        position = _next_position(conn, "cards")
+        _write_card(conn, new_card, position)
+        if reverse:
+            _write_card(conn, new_card_record(back, front, reverse=False), position + 1)
+    return new_card["id"]
+
+
+def get_card(card_id):
+    """Retrieves a specific flashcard by ID."""
+    return _row_card(_connect(), card_id)[0]
+
+
+def update_card(card_id, front, back, reverse=False):
+    """Updates an existing flashcard."""
+    from .anki import new_card_record
+
+    with _transaction() as conn:
+        card, position = _row_card(conn, card_id)
+        if not card:
+            return
+        original_back = card["back"]
+        was_reverse = card.get("reverse", False)
+
+        card["front"] = front
+        card["back"] = back
+        card["reverse"] = reverse
+        _write_card(conn, card, position)
+
+        # Find the potential reverse card based on the *original* content
+        reverse_card, reverse_position = _find_card(conn, original_back, card["front"])
+
+        if reverse and not was_reverse:
+            if not reverse_card:
+                _write_card(conn, new_card_record(back, front, reverse=False), _next_position(conn, "cards"))
+        elif not reverse and was_reverse:
+            if reverse_card:
+                conn.execute("DELETE FROM cards WHERE id = ?", (reverse_card["id"],))
+        elif reverse and was_reverse:
+            if reverse_card:
+                reverse_card["front"] = back
+                reverse_card["back"] = front
+                _write_card(conn, reverse_card, reverse_position)
+
+
+def delete_card(card_id):
+    """Deletes a flashcard and its reverse if it exists."""
+    with _transaction() as conn:
+        card, _ = _row_card(conn, card_id)
+        if not card:
+            return
+        if card.get("reverse"):
+            reverse_card, _ = _find_card(conn, card["back"], card["front"])
+            if reverse_card:
+                conn.execute("DELETE FROM cards WHERE id = ?", (reverse_card["id"],))
+        conn.execute("DELETE FROM cards WHERE id = ?", (card_id,))
+
+
+def iter_cards():
+    """Yields every card, read from the database one page at a time."""
+    for doc, _ in _pages(_connect(), "SELECT doc, position FROM cards"):
+        yield json.loads(doc)
+
+
+def import_cards(cards):
+    """Adds many card records in one transaction; see anki.import_cards."""
+    from .anki import card_key, new_card_record
+
+    added = duplicates = 0
+    with _transaction() as conn:
+        seen = {card_key(front, back) for front, back in conn.execute(
+            "SELECT json_extract(doc, '$.front'), json_extract(doc, '$.back') FROM cards")}
+        position = _next_position(conn, "cards")
+        for card in cards:
+            key = card_key(card["front"], card["back"])
+            if key in seen or conn.execute("SELECT 1 FROM cards WHERE id = ?", (card["id"],)).fetchone():
+                duplicates += 1
+                continue
+            seen.add(key)
+            new_cards = [card]
+            reverse_key = card_key(card["back"], card["front"])
+            if card.get("reverse") and reverse_key not in seen:
+                seen.add(reverse_key)
+                new_cards.append(new_card_record(card["back"], card["front"], reverse=False))
+            for new_card in new_cards:
+                _write_card(conn, new_card, position)
+                position += 1
+            added += len(new_cards)
+    return {"cards": added, "duplicates": duplicates}
+
+
+def get_due_cards(limit=None):
+    """Returns cards due for review (at most `limit`), most overdue first."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    rows = _connect().execute("SELECT doc FROM cards WHERE review_date <= ? ORDER BY review_date, position "
+                              "LIMIT ?", (today, -1 if limit is None else limit))
+    return [json.loads(doc) for doc, in rows]
+
+
+def get_cards_page(sort_by='review_date', after=None, limit=100):
+    """Returns (cards, next cursor or None) with a keyset query, so deep pages stay cheap."""
+    from .anki import card_sort_key
+    from .pagination import decode_cursor, encode_cursor
+
+    if sort_by == 'review_date':
+        key_sql = "(COALESCE(review_date, '9999-12-31'), id)"
+    else:
+        key_sql = "(id)"
+    width = 2 if sort_by == 'review_date' else 1
+    after_key = decode_cursor(after, width)
+    where, params = "", []
+    if after_key is not None:
+        where = f"WHERE {key_sql} > ({', '.join('?' * width)})"
+        params.extend(after_key)
+    rows = _connect().execute(f"SELECT doc FROM cards {where} ORDER BY {key_sql[1:-1]} LIMIT ?",
+                              params + [limit + 1])
+    cards = [json.loads(doc) for doc, in rows]
+    if len(cards) > limit:
+        cards = cards[:limit]
+        return cards, encode_cursor(card_sort_key(sort_by)(cards[-1]))
+    return cards, None
+
+
+def search_cards(query, limit=20):
+    """Returns up to `limit` cards matching every word of `query`, best first (table scan, as in search())."""
+    from .anki import card_search_fields
+
+    words = list(dict.fromkeys(tokenize(query)))
+    if not words or limit <= 0:
+        return []
+    where, params = _words_filter(words)
+    scored = []
+    for (doc,) in _connect().execute(f"SELECT doc FROM cards WHERE {where}", params):
+        card = json.loads(doc)
+        score = match_score(words, card_search_fields(card))
+        if score:
+            scored.append((score, card))
+    top = heapq.nlargest(limit, scored, key=lambda item: item[0])
+    return [{'score': round(score, 4), 'kind': 'card', 'card_id': card['id'], 'front': card['front'],
+             'back': card['back'], 'review_date': card.get('review_date')} for score, card in top]
+
+
+def get_next_due_card():
+    """Returns (most overdue due card or None, number of cards due today)."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    conn = _connect()
+    row = conn.execute("SELECT doc FROM cards WHERE review_date <= ? ORDER BY review_date, position LIMIT 1",
+                       (today,)).fetchone()
+    count = conn.execute("SELECT COUNT(*) FROM cards WHERE review_date <= ?", (today,)).fetchone()[0]
+    return (json.loads(row[0]) if row else None), count
+
+
+def process_card_review(card_id, rating):
+    """Processes a card review using the SM2 algorithm."""
+    from .anki import apply_sm2
+
+    with _transaction() as conn:
+        card, position = _row_card(conn, card_id)
+        if card:
+            apply_sm2(card, rating)
+            _write_card(conn, card, position)
+
+
+def process_card_reviews(reviews):
+    """Applies a batch of reviews (see anki.parse_reviews) in one transaction."""
+    from .anki import apply_sm2, parse_reviews
+
+    parsed = parse_reviews(reviews)
+    applied = 0
+    with _transaction() as conn:
+        for card_id, rating, reviewed_at in parsed:
+            card, position = _row_card(conn, card_id)
+            if card:
+                apply_sm2(card, rating, reviewed_at)
+                _write_card(conn, card, position)
+                applied += 1
+    return applied
+
+
+# --- Import / export ---
+
+def import_json(project_file=None, anki_file=None):
+    """Replaces the database contents with project_data.json and anki.json."""
+    project_file = project_file or os.path.join(DATA_DIR, "project_data.json")
+    anki_file = anki_file or os.path.join(DATA_DIR, "anki.json")
+    if os.path.exists(project_file):
+        # Split and sharded layouts keep part of the data in files beside it.
+        save_data(read_project_data(project_file))
+    if os.path.exists(anki_file):
+        with open(anki_file, 'r', encoding='utf-8') as file:
+            save_anki_data(json.load(file))
+
+
+def export_json(project_file=None, anki_file=None):
+    """Writes the database contents back out as project_data.json and anki.json."""
+    from .safe_io import atomic_write_json
+
+    # Exports are for people as much as for the app, so they stay pretty-printed.
+    atomic_write_json(project_file or os.path.join(DATA_DIR, "project_data.json"), load_data(), indent=4)
+    atomic_write_json(anki_file or os.path.join(DATA_DIR, "anki.json"), load_anki_data(), indent=4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move ProjectTracker data between the JSON files and SQLite.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("--projects", help="project_data.json path (default: in PROJECTTRACKER_DATA_DIR)")
+    parser.add_argument("--anki", help="anki.json path (default: in PROJECTTRACKER_DATA_DIR)")
+    args = parser.parse_args(argv)
+    if args.command == "import":
+        import_json(args.projects, args.anki)
+    else:
+        export_json(args.projects, args.anki)
+    print(f"{args.command} complete: {DB_FILE}")
+
+
+if __name__ == "__main__":
+    main()
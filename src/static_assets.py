@@ -0,0 +1,113 @@
+"""
+Static files served from memory with fingerprinted URLs and precompressed variants.
+
+StaticAssets reads each file in the static folder once, hashes it and keeps it
+with gzip (and, when the optional `brotli` package is installed, brotli) copies
+of the text files, so a stylesheet request costs a stat and a dict lookup.
+Templates keep calling url_for('static', filename=...); the app adds `?v=<hash>`
+and answers requests carrying the current hash with a year-long immutable
+Cache-Control, so the browser never asks again until the file changes. A file
+edited in place gets a new hash on its next stat, and the directory listing
+(the stylesheet picker) is redone when the folder's mtime changes.
+
+compress() and choose_encoding() are shared with the page responses in app.py.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+try:
+    import brotli  # optional; smaller than gzip, and every Chromium accepts it
+except ImportError:
+    brotli = None
+
+# Year-long caching for URLs that carry the file's current hash.
+IMMUTABLE = "public, max-age=31536000, immutable"
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+# Smaller files aren't worth a Content-Encoding.
+MIN_COMPRESS_BYTES = 1024
+
+
+def encodings():
+    """Content codings this process can produce, preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body, encoding, best=False):
+    """`body` in `encoding`; `best` trades time for size (static files are compressed once)."""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 5)
+    return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+
+
+def compressible(mimetype, size):
+    return size >= MIN_COMPRESS_BYTES and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def choose_encoding(request, available=None):
+    """The preferred coding the client accepts (of `available`, default all we produce), or None."""
+    accepted = request.accept_encodings
+    for encoding in available if available is not None else encodings():
+        if accepted[encoding]:
+            return encoding
+    return None
+
+
+class Asset:
+    def __init__(self, path, key):
+        with open(path, "rb") as file:
+            self.body = file.read()
+        self.key = key
+        self.digest = hashlib.sha1(self.body).hexdigest()[:12]
+        self.mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.variants = {}
+        if compressible(self.mimetype, len(self.body)):
+            for encoding in encodings():
+                self.variants[encoding] = compress(self.body, encoding, best=True)
+
+
+class StaticAssets:
+    """The files directly in `folder`, loaded on first use and re-read when they change."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._assets = {}  # file name -> Asset
+        self._listing = None  # (folder mtime, sorted file names)
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """The current Asset for `name`, or None if it isn't a file directly in the folder."""
+        if not name or name != os.path.basename(name):
+            return None
+        path = os.path.join(self.folder, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            asset = self._assets.get(name)
+        if asset is None or asset.key != key:
+            try:
+                asset = Asset(path, key)
+            except OSError:  # a folder, or removed since the stat
+                return None
+            with self._lock:
+                self._assets[name] = asset
+        return asset
+
+    def names(self):
+        """Sorted names of the files in the folder, listed again only when the folder changes."""
+        try:
+            mtime = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return []
+        listing = self._listing
+        if listing is None or listing[0] != mtime:
+            listing = self._listing = (mtime, sorted(os.listdir(self.folder)))
+        return listing[1]
+
+    def css_files(self):
+        return [name for name in self.names() if name.endswith(".css")]
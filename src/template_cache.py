@@ -0,0 +1,91 @@
+"""
+On-disk cache of compiled Jinja templates, so a fresh backend skips compiling them.
+
+Jinja compiles each template to Python code the first time it is rendered, which
+costs the first request to every page tens of milliseconds. TemplateBytecodeCache
+keeps the compiled code in `template_cache/` in the data folder (override with
+PROJECTTRACKER_TEMPLATE_CACHE, or set it to `off`), and falls back to the copies
+precompiled at build time and bundled next to the templates. Each entry carries the
+template source's checksum and the Python version, so an edited template or a new
+interpreter simply compiles again.
+
+Precompile every template into a folder (build-app.ps1 bundles the result):
+
+    python -m src.template_cache build/template_cache
+"""
+import argparse
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+# Folder beside the templates that holds the entries precompiled at build time.
+BUNDLED_DIRECTORY = "template_cache"
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """
+    FileSystemBytecodeCache keyed on the template name alone.
+
+    Jinja also hashes the template's path into the key, but a PyInstaller build
+    unpacks the templates into a new temporary folder on every start, so nothing
+    would ever be found again. The source checksum stored with each entry still
+    catches a changed template.
+    """
+
+    def __init__(self, directory, bundled=None):
+        super().__init__(directory)
+        self.bundled = bundled
+
+    def get_cache_key(self, name, filename=None):
+        return super().get_cache_key(name)
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        if bucket.code is None and self.bundled:
+            try:
+                with open(os.path.join(self.bundled, self.pattern % bucket.key), "rb") as file:
+                    bucket.load_bytecode(file)
+            except OSError:
+                pass
+
+    def dump_bytecode(self, bucket):
+        # A cache that can't be written (read-only data folder) just means compiling again next time.
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError as e:
+            print(f"Could not write template cache entry in {self.directory}: {e}")
+
+
+def bytecode_cache(data_dir, template_folder):
+    """The cache for the app's Jinja environment, or None when turned off."""
+    directory = os.getenv("PROJECTTRACKER_TEMPLATE_CACHE") or os.path.join(data_dir, "template_cache")
+    if directory.lower() == "off":
+        return None
+    bundled = os.path.join(os.path.dirname(template_folder), BUNDLED_DIRECTORY)
+    return TemplateBytecodeCache(directory, bundled if os.path.isdir(bundled) else None)
+
+
+def precompile(env, directory):
+    """Compiles every template `env` can find into `directory`; returns their names."""
+    os.makedirs(directory, exist_ok=True)
+    env = env.overlay(bytecode_cache=TemplateBytecodeCache(directory))
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompile the app's templates into a bytecode cache folder.")
+    parser.add_argument("directory")
+    args = parser.parse_args(argv)
+    os.environ["PROJECTTRACKER_TEMPLATE_CACHE"] = "off"
+    from .app import app
+
+    names = precompile(app.jinja_env, args.directory)
+    print(f"Precompiled {len(names)} templates into {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Watches the data folder and tells subscribers which records changed.
+
+A Watcher checks the version token of each data source (a stat of the data file,
+or the SQLite write counter) whenever something in the folder changes: on Linux
+it sleeps on inotify and wakes up on any file event there, elsewhere (or if
+inotify is unavailable) it polls every PROJECTTRACKER_WATCH_INTERVAL seconds
+(default 1). When a token moves it compares the document it saw last with the
+current one and publishes the ids that differ:
+
+    {"source": "projects", "projects": [project ids], "tasks": [task ids]}
+    {"source": "anki", "cards": [card ids]}
+
+Ids are None when the source can't be diffed (SQLite storage); listeners should
+then treat every record of that source as changed. A token change with no
+record changes (a journal fold, a search index save) publishes nothing.
+
+Unchanged projects and cards keep their object identity across copy-on-write
+edits (and across sharded reloads), so the comparison is mostly identity checks.
+"""
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import sys
+import threading
+import time
+
+INTERVAL = float(os.getenv("PROJECTTRACKER_WATCH_INTERVAL", 1))
+# With inotify, a check still runs this often in case an event was missed.
+INOTIFY_TIMEOUT = 10
+# Writes come in bursts (temp file, fsync, rename); wait this long after the first event.
+SETTLE = 0.05
+
+# inotify(7) event mask: anything that can change a file's contents or replace it.
+IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x2, 0x8, 0x80, 0x100, 0x200
+
+
+def _inotify(directory):
+    """A non-blocking inotify descriptor watching `directory`, or None where unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _drain(fd):
+    try:
+        while os.read(fd, 65536):
+            pass
+    except BlockingIOError:
+        pass
+
+
+def _changed(old_items, new_items):
+    """Ids of the items added, changed or removed between two lists of dicts with an "id"."""
+    old = {item["id"]: item for item in old_items}
+    changed = []
+    for item in new_items:
+        prev = old.pop(item["id"], None)
+        if prev is None or (prev is not item and prev != item):
+            changed.append(item["id"])
+    return changed + list(old)
+
+
+def diff_projects(old, new):
+    if old is None or new is None:
+        return {"projects": None, "tasks": None}
+    projects, tasks = [], []
+    old_projects = {p["id"]: p for p in old.get("projects", [])}
+    for project in new.get("projects", []):
+        prev = old_projects.pop(project["id"], None)
+        if prev is project or prev == project:
+            continue
+        projects.append(project["id"])
+        tasks += _changed(prev.get("tasks", []) if prev else [], project.get("tasks", []))
+    for prev in old_projects.values():
+        projects.append(prev["id"])
+        tasks += [task["id"] for task in prev.get("tasks", [])]
+    if not projects:
+        return None
+    return {"projects": projects, "tasks": tasks}
+
+
+def diff_cards(old, new):
+    if old is None or new is None:
+        return {"cards": None}
+    cards = _changed(old.get("cards", []), new.get("cards", []))
+    return {"cards": cards} if cards else None
+
+
+class Watcher:
+    """
+    Background thread that publishes record changes to subscriber queues.
+
+    `sources` maps a name to (version, snapshot, diff): version() returns the
+    source's cheap version token, snapshot() its current document (or None if it
+    can't be diffed), and diff(old, new) the changed ids (or None for no change).
+    The thread starts with the first subscriber. With `max_subscribers`, a new
+    subscriber beyond the limit ends the oldest one, which receives None.
+    """
+
+    def __init__(self, directory, sources, interval=INTERVAL, max_subscribers=None):
+        self.directory = directory
+        self.sources = sources
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}  # queue -> None, oldest first
+        self._lock = threading.Lock()
+        self._thread = None
+        self._seen = {}  # name -> (version, snapshot)
+
+    def subscribe(self):
+        """A new queue that receives every change from now on."""
+        changes = queue.Queue()
+        with self._lock:
+            while self.max_subscribers and len(self._subscribers) >= self.max_subscribers:
+                oldest = next(iter(self._subscribers))
+                del self._subscribers[oldest]
+                oldest.put(None)
+            self._subscribers[changes] = None
+            if self._thread is None:
+                self._seen = {name: (version(), snapshot()) for name, (version, snapshot, _) in self.sources.items()}
+                self._thread = threading.Thread(target=self._run, name="data-watcher", daemon=True)
+                self._thread.start()
+        return changes
+
+    def unsubscribe(self, changes):
+        with self._lock:
+            self._subscribers.pop(changes, None)
+
+    def check(self):
+        """Publishes the changes since the last check; returns them."""
+        published = []
+        for name, (version, snapshot, diff) in self.sources.items():
+            current = version()
+            seen_version, seen_doc = self._seen[name]
+            if current == seen_version:
+                continue
+            doc = snapshot()
+            self._seen[name] = (current, doc)
+            change = diff(seen_doc, doc)
+            if change is not None:
+                published.append({"source": name, **change})
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for change in published:
+            for changes in subscribers:
+                changes.put(change)
+        return published
+
+    def _run(self):
+        fd = _inotify(self.directory)
+        try:
+            while True:
+                if fd is None:
+                    time.sleep(self.interval)
+                elif select.select([fd], [], [], INOTIFY_TIMEOUT)[0]:
+                    time.sleep(SETTLE)
+                    _drain(fd)
+                try:
+                    self.check()
+                except Exception as e:
+                    print(f"Error checking {self.directory} for changes: {e}")
+        finally:
+            if fd is not None:
+                os.close(fd)
@@ -0,0 +1,55 @@
+// Live updates: when the data changes (in this window, another one, or another
+// program), refresh only the parts of the page that show the changed records.
+//
+// Elements opt in with an id and data-live, a space-separated list of what they
+// show: a source ("projects", "anki") or a record ("project:<id>", "task:<id>",
+// "card:<id>"). A list container also gets data-live-list; it is replaced as a
+// whole when records were added, removed or reordered, otherwise only its
+// changed items are. Elements holding the field being typed in are left alone.
+(function () {
+  if (!window.EventSource || !document.querySelector('[data-live]')) return;
+
+  let refreshing = Promise.resolve();
+
+  function affects(change, tokens) {
+    return tokens.split(' ').some((token) => {
+      if (token === change.source) return true;
+      const [kind, id] = token.split(':');
+      const ids = change[kind + 's'];
+      return ids !== undefined && (ids === null || ids.includes(id));
+    });
+  }
+
+  function itemIds(list) {
+    return [...list.querySelectorAll(':scope > [data-live]')].map((item) => item.id).join(' ');
+  }
+
+  function editing(element) {
+    const active = document.activeElement;
+    return active && active !== document.body && element.contains(active) && active.matches('input, textarea, select');
+  }
+
+  async function refresh(elements) {
+    const response = await fetch(location.href, { headers: { Accept: 'text/html' } });
+    if (!response.ok) return;
+    const page = new DOMParser().parseFromString(await response.text(), 'text/html');
+    for (const element of elements) {
+      if (!element.isConnected || editing(element)) continue;
+      const fresh = page.getElementById(element.id);
+      if (!fresh) {
+        element.remove();
+      } else if (!element.hasAttribute('data-live-list') || itemIds(element) !== itemIds(fresh)) {
+        element.replaceWith(document.importNode(fresh, true));
+      }
+    }
+  }
+
+  const events = new EventSource('/events');
+  events.addEventListener('change', (event) => {
+    const change = JSON.parse(event.data);
+    const stale = [...document.querySelectorAll('[data-live][id]')].filter((el) => affects(change, el.dataset.live));
+    if (stale.length) {
+      refreshing = refreshing.then(() => refresh(stale)).catch((e) => console.log('Live update failed', e));
+    }
+  });
+})();